@@ -147,4 +147,98 @@ MEDIA_URL = '/media/'
 
 # 로그인 관련 설정
 LOGIN_URL = '/login/'
-LOGIN_REDIRECT_URL = '/'
\ No newline at end of file
+LOGIN_REDIRECT_URL = '/'
+# 임베딩 파이프라인 설정 (배치 크기 / Ollama 동시 요청 수)
+EMBED_BATCH_SIZE = 32
+EMBED_MAX_WORKERS = 4
+
+# 같은 파일명으로 수정본이 올라오면 기존 컬렉션을 증분 갱신
+VECTORDB_INCREMENTAL_UPDATE = True
+
+# 워커별 벡터스토어 캐시 상한 (LRU 개수 / 유휴 만료 시간(초))
+VECTOR_STORE_CACHE_SIZE = 32
+VECTOR_STORE_CACHE_TTL = 3600
+
+# 임베딩 모델 (문서/질의 공통) 및 Ollama 연결 유지 설정
+EMBEDDING_MODEL = "bona/bge-m3-korean:latest"
+EMBEDDING_MODEL_KEEP_ALIVE = 1800
+EMBEDDING_HTTP_KEEPALIVE = 60.0
+
+# 질의 벡터 LRU 캐시 크기
+QUERY_EMBEDDING_CACHE_SIZE = 512
+
+# 작업 유형별 프롬프트 문서 토큰 예산
+CONTEXT_TOKEN_BUDGETS = {
+    "보고서": 5000,
+    "발표자료": 5000,
+    "요약": 3500,
+    "질의응답": 2500,
+}
+
+# 하이브리드 검색(벡터 + BM25) 순위 융합 상수
+HYBRID_RRF_K = 60
+
+# 긴 문서 map-reduce 요약 (그룹당 토큰 / Ollama 동시 요청 수 / 부분 요약 길이)
+SUMMARY_GROUP_TOKENS = 3000
+SUMMARY_MAX_WORKERS = 3
+SUMMARY_MAP_TOKENS = 512
+
+# 비동기 뷰에서 워커(이벤트 루프)당 동시에 기다릴 LLM 호출 수
+LLM_MAX_CONCURRENCY = 4
+
+ASGI_APPLICATION = 'FlowMate.asgi.application'
+
+# PDF 페이지 병렬 추출 (프로세스 수 / 프로세스당 페이지 구간 크기)
+PDF_EXTRACT_WORKERS = 4
+PDF_PAGES_PER_SHARD = 16
+# 앞 페이지를 기다리며 먼저 추출/분석해 둘 수 있는 최대 페이지 수 (구간 크기보다 작으면 구간 크기)
+PDF_REORDER_WINDOW = 64
+
+# 비전 모델(qwen2.5vl) 이미지 분석 동시 요청 수
+IMAGE_ANALYSIS_CONCURRENCY = 3
+
+# 이미지 분석 캐시: simple 모드에서 크기/압축만 다른 같은 이미지도 재사용 (dHash 해밍 거리, 256비트 기준)
+IMAGE_CACHE_PERCEPTUAL = True
+IMAGE_CACHE_MAX_DISTANCE = 16
+# 근접 일치 비교용으로 메모리에 올려 두는 프롬프트별 최근 항목 수
+IMAGE_CACHE_MAX_PERCEPTUAL_ENTRIES = 5000
+
+# 비전 모델 호출 전 이미지 분류 (장식용은 생략, 사진/단순 도형은 짧은 설명, 나머지는 기존 프롬프트로 분석)
+IMAGE_TRIAGE_ENABLED = True
+# 장식용 판정 기준 (짧은 변 픽셀 / 흑백 엔트로피 / 색 수가 적은 그래픽의 경계 비율)
+IMAGE_TRIAGE_MIN_SIDE = 48
+IMAGE_TRIAGE_MIN_ENTROPY = 0.1
+IMAGE_TRIAGE_MIN_EDGE_DENSITY = 0.005
+# 분류별 분석 모드 (utils.image_triage.TRIAGE_MODES 기본값에 덮어씀, 예: {"chart": "detailed", "text": "detailed"})
+IMAGE_TRIAGE_MODES = {
+    "photo": "brief",
+    "shape": "brief",
+}
+# brief 모드 응답 최대 토큰 수
+IMAGE_BRIEF_MAX_TOKENS = 128
+# 이미지 한 장 분석 제한 시간(초)
+IMAGE_ANALYSIS_TIMEOUT = 180
+
+# 토큰 기준 청킹 (bge-m3 토크나이저, 없으면 근사치)
+# 로컬 tokenizer.json 경로 (허브의 BAAI/bge-m3에서 받아 두기)
+CHUNK_TOKENIZER = os.path.join(BASE_DIR, 'models', 'bge-m3', 'tokenizer.json')
+# True면 위 경로가 허브 이름일 때 다운로드 허용 (HF_HUB_OFFLINE=1이면 무시)
+CHUNK_TOKENIZER_DOWNLOAD = False
+CHUNK_TOKENS = 512
+CHUNK_OVERLAP_TOKENS = 64
+EMBEDDING_MAX_TOKENS = 8192
+
+# Whisper 음성 인식 (장치 auto: GPU가 있으면 cuda, 없으면 cpu)
+WHISPER_MODEL_SIZE = "large-v2"
+WHISPER_DEVICE = "auto"
+WHISPER_COMPUTE_TYPE = "int8"
+# CPU 병렬 STT (프로세스 수 / VAD로 나눌 최대 구간 길이(초)), 프로세스마다 모델을 하나씩 로드
+STT_WORKERS = 2
+STT_WINDOW_SECONDS = 120
+
+# 작업 큐 워커 하트비트 (기록 간격 / 이 시간 넘게 응답 없으면 중단된 작업으로 간주 / 최대 시도 횟수)
+JOB_HEARTBEAT_SECONDS = 15
+JOB_STALE_SECONDS = 120
+JOB_MAX_ATTEMPTS = 2
+# 발표 분석 진행 상황 SSE 연결 최대 유지 시간(초), 이후에는 상태 조회 폴링
+ANALYSIS_STREAM_MAX_SECONDS = 600
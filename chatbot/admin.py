@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import UploadedFile, ChatSession, ChatMessage, GeneratedReport, UserProfile
+from .models import UploadedFile, IngestionJob, ChatSession, ChatMessage, GeneratedReport, UserProfile
 
 
 @admin.register(UserProfile)
@@ -63,6 +63,14 @@ class UploadedFileAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user')
 
 
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = ['file_path', 'status', 'stage', 'progress', 'worker', 'attempts', 'heartbeat_date', 'created_date', 'completed_date']
+    list_filter = ['status', 'created_date']
+    search_fields = ['file_path', 'error_message']
+    readonly_fields = ['created_date', 'started_date', 'completed_date']
+
+
 @admin.register(ChatSession)
 class ChatSessionAdmin(admin.ModelAdmin):
     list_display = ['title_display', 'user', 'message_count', 'created_date', 'last_activity', 'is_active']
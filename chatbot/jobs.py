@@ -0,0 +1,110 @@
+import os
+import traceback
+import django
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from utils.config import get_setting
+from utils.job_worker import get_active_job_filter, reap_stale_jobs, start_heartbeat
+
+
+def setup_django():
+    """spawn 방식으로 시작된 워커 프로세스에서 Django 초기화"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'FlowMate.settings')
+    django.setup()
+
+
+def enqueue_ingestion(file_path: str, user=None, original_filename: str = None):
+    """업로드 파일 벡터화 작업 등록 (로그인 사용자면 UploadedFile 기록도 생성)"""
+    from chatbot.models import IngestionJob, UploadedFile
+
+    uploaded_file = None
+    if user is not None and user.is_authenticated:
+        ext = file_path.split('.')[-1].lower()
+        file_types = dict(UploadedFile.FILE_TYPES)
+        uploaded_file = UploadedFile.objects.create(
+            user=user,
+            original_filename=original_filename or os.path.basename(file_path),
+            file_path=file_path,
+            file_type=ext if ext in file_types else 'other',
+            file_size=os.path.getsize(file_path),
+        )
+    return IngestionJob.objects.create(uploaded_file=uploaded_file, file_path=file_path)
+
+
+def get_pending_job(file_path: str):
+    """
+    해당 파일의 아직 끝나지 않은 최신 작업 (없으면 None)
+    워커가 죽어 하트비트가 끊긴 작업은 제외 (처리 중 안내가 계속되지 않도록)
+    """
+    from chatbot.models import IngestionJob
+
+    return IngestionJob.objects.filter(file_path=file_path).filter(
+        get_active_job_filter(get_setting("JOB_STALE_SECONDS", 120))
+    ).order_by('-created_date').first()
+
+
+def claim_next_job(worker_name: str):
+    """
+    대기 중인 가장 오래된 작업을 원자적으로 가져오기 (다른 워커와 중복 처리 방지)
+    먼저 하트비트가 끊긴 처리 중 작업을 다시 대기열로 돌리거나 실패 처리
+    """
+    from chatbot.models import IngestionJob
+
+    reap_stale_jobs(IngestionJob, get_setting("JOB_STALE_SECONDS", 120), get_setting("JOB_MAX_ATTEMPTS", 2))
+    with transaction.atomic():
+        job = IngestionJob.objects.filter(status='queued').order_by('created_date').first()
+        if job is None:
+            return None
+        claimed = IngestionJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', worker=worker_name, started_date=timezone.now(),
+            heartbeat_date=timezone.now(), attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_ingestion_job(job):
+    """작업 하나 처리: 추출 → 청킹 → 임베딩, 진행률은 DB에 기록"""
+    from chatbot.models import IngestionJob
+    from vectordb_upload_search import data_to_vectorstore
+
+    def on_progress(stage, done, total):
+        # 추출 단계 10%, 임베딩 단계 90% 비중
+        if stage == "extract":
+            job.update_progress("extract", 0.05)
+        elif total:
+            job.update_progress(stage, 0.1 + 0.9 * min(done / total, 1.0))
+        else:
+            # 스트리밍 적재는 전체 청크 수를 미리 알 수 없으므로 완료 전까지 점근적으로 증가
+            job.update_progress(stage, 0.1 + 0.85 * done / (done + 200))
+
+    print(f"[벡터화 작업 시작] #{job.pk} {job.file_path}")
+    stop_heartbeat = start_heartbeat(
+        lambda: IngestionJob.objects.filter(pk=job.pk).update(heartbeat_date=timezone.now()),
+        get_setting("JOB_HEARTBEAT_SECONDS", 15),
+    )
+    try:
+        vector_store = data_to_vectorstore(job.file_path, progress_callback=on_progress)
+        if vector_store is None:
+            job.mark_failed("벡터스토어 생성 실패")
+        else:
+            job.mark_completed()
+        print(f"[벡터화 작업 종료] #{job.pk} {job.status}")
+    except Exception as e:
+        traceback.print_exc()
+        job.mark_failed(str(e))
+    finally:
+        stop_heartbeat()
+
+
+def ingestion_worker_main(index: int, poll_interval: float = 2.0):
+    """워커 프로세스 진입점"""
+    from utils.job_worker import get_worker_name, poll_jobs
+
+    setup_django()
+    worker_name = get_worker_name("ingestion", index)
+    print(f"[벡터화 워커 시작] {worker_name}")
+    poll_jobs(claim_next_job, run_ingestion_job, worker_name, poll_interval=poll_interval)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from chatbot.jobs import ingestion_worker_main
+from utils.job_worker import run_worker_pool
+
+
+class Command(BaseCommand):
+    help = "업로드 파일 벡터화 작업 큐를 처리하는 워커 프로세스 실행"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="워커 프로세스 수")
+
+    def handle(self, *args, **options):
+        run_worker_pool(ingestion_worker_main, options["workers"])
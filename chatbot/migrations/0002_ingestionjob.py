@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=500, verbose_name='처리할 파일 경로')),
+                ('status', models.CharField(choices=[('queued', '대기 중'), ('running', '처리 중'), ('completed', '완료'), ('failed', '실패')], db_index=True, default='queued', max_length=15)),
+                ('progress', models.FloatField(default=0.0, verbose_name='진행률(0~1)')),
+                ('stage', models.CharField(blank=True, default='', max_length=50, verbose_name='처리 단계')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='오류 내용')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='처리 워커')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='등록 시간')),
+                ('started_date', models.DateTimeField(blank=True, null=True, verbose_name='시작 시간')),
+                ('completed_date', models.DateTimeField(blank=True, null=True, verbose_name='완료 시간')),
+                ('uploaded_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_jobs', to='chatbot.uploadedfile', verbose_name='업로드 파일')),
+            ],
+            options={
+                'verbose_name': '벡터화 작업',
+                'verbose_name_plural': '벡터화 작업들',
+                'ordering': ['created_date'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='attempts',
+            field=models.IntegerField(default=0, verbose_name='처리 시도 횟수'),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='heartbeat_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='마지막 워커 응답'),
+        ),
+    ]
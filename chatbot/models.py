@@ -48,6 +48,71 @@ class UploadedFile(models.Model):
         super().delete(*args, **kwargs)
 
 
+class IngestionJob(models.Model):
+    """업로드 파일 벡터화 작업 큐 (워커 프로세스가 DB에서 가져가 처리)"""
+    
+    STATUS_CHOICES = [
+        ('queued', '대기 중'),
+        ('running', '처리 중'),
+        ('completed', '완료'),
+        ('failed', '실패'),
+    ]
+    
+    uploaded_file = models.ForeignKey(
+        UploadedFile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='ingestion_jobs',
+        verbose_name="업로드 파일"
+    )
+    file_path = models.CharField(max_length=500, verbose_name="처리할 파일 경로")
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='queued', db_index=True)
+    progress = models.FloatField(default=0.0, verbose_name="진행률(0~1)")
+    stage = models.CharField(max_length=50, blank=True, default="", verbose_name="처리 단계")
+    error_message = models.TextField(blank=True, null=True, verbose_name="오류 내용")
+    worker = models.CharField(max_length=100, blank=True, default="", verbose_name="처리 워커")
+    attempts = models.IntegerField(default=0, verbose_name="처리 시도 횟수")
+    heartbeat_date = models.DateTimeField(null=True, blank=True, verbose_name="마지막 워커 응답")
+    created_date = models.DateTimeField(default=timezone.now, verbose_name="등록 시간")
+    started_date = models.DateTimeField(null=True, blank=True, verbose_name="시작 시간")
+    completed_date = models.DateTimeField(null=True, blank=True, verbose_name="완료 시간")
+    
+    class Meta:
+        verbose_name = "벡터화 작업"
+        verbose_name_plural = "벡터화 작업들"
+        ordering = ['created_date']
+    
+    def __str__(self):
+        return f"{os.path.basename(self.file_path)} - {self.get_status_display()}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    def update_progress(self, stage, progress):
+        """진행 단계/진행률 갱신"""
+        self.stage = stage
+        self.progress = round(progress, 3)
+        self.save(update_fields=['stage', 'progress'])
+    
+    def mark_completed(self):
+        """처리 완료 처리 (업로드 파일의 벡터화 완료 여부도 갱신)"""
+        self.status = 'completed'
+        self.progress = 1.0
+        self.completed_date = timezone.now()
+        self.save(update_fields=['status', 'progress', 'completed_date'])
+        if self.uploaded_file_id:
+            UploadedFile.objects.filter(pk=self.uploaded_file_id).update(is_processed=True)
+    
+    def mark_failed(self, error_message):
+        """처리 실패 처리"""
+        self.status = 'failed'
+        self.error_message = error_message
+        self.completed_date = timezone.now()
+        self.save(update_fields=['status', 'error_message', 'completed_date'])
+
+
 class ChatSession(models.Model):
     """사용자의 채팅 세션 관리"""
     
@@ -1,3 +1,821 @@
-from django.test import TestCase
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from datetime import timedelta
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from langchain_core.documents import Document
+
+import vectordb_upload_search
+from chatbot import jobs, views
+from chatbot.models import IngestionJob
+from utils import chunk_utils, embedding_cache, extracting_xlsx, image_cache, image_triage, image_utils, summarizer
+from utils.chunk_utils import estimate_tokens, find_table_parts, iter_split_segments, pack_table_rows
+from utils.context_packer import pack_context
+from utils.extracting_csv import extract_csv_content, iter_csv_segments
+from utils.sparse_index import SparseIndex, reciprocal_rank_fusion
+from utils.table_block import TableBlock
+from utils.transcript_segment import TranscriptSegment
+
+
+# 토크나이저 파일 유무와 관계없이 같은 결과가 나오도록 근사 토큰 수 사용
+@override_settings(CHUNK_TOKENS=64, CHUNK_OVERLAP_TOKENS=0)
+@mock.patch.object(chunk_utils, "count_tokens", estimate_tokens)
+class TableChunkingTests(SimpleTestCase):
+    header = "이름 | 부서 | 연락처"
+
+    def make_rows(self, start, count):
+        return [f"직원{i} | 영업{i % 3}팀 | 010-0000-{i:04d}" for i in range(start, start + count)]
+
+    def test_pack_table_rows_covers_every_row_once(self):
+        rows = self.make_rows(0, 30)
+        groups = pack_table_rows(self.header, rows, budget=64)
+        self.assertGreater(len(groups), 1)
+        self.assertEqual(groups[0][0], 0)
+        self.assertEqual(groups[-1][1], len(rows))
+        for (_, hi), (lo, _) in zip(groups, groups[1:]):
+            self.assertEqual(hi, lo)
+
+    def test_pack_table_rows_keeps_oversized_row_alone(self):
+        rows = ["짧은 행 | 1", "아주 긴 행 | " + "가" * 200, "짧은 행 | 2"]
+        self.assertEqual(pack_table_rows("항목 | 값", rows, budget=64), [(0, 1), (1, 2), (2, 3)])
+
+    def test_header_repeated_with_one_based_row_range(self):
+        rows = self.make_rows(0, 30)
+        chunks = list(iter_split_segments([TableBlock(self.header, rows, sheet="직원", start_row=0)]))
+
+        self.assertGreater(len(chunks), 1)
+        covered = []
+        for text, metadata in chunks:
+            self.assertEqual(metadata["type"], "table")
+            self.assertEqual(metadata["sheet"], "직원")
+            self.assertIn(self.header, text.split("\n"))
+            self.assertIn(f"[직원 시트 {metadata['row_start']}~{metadata['row_end']}행]", text)
+            covered.extend(range(metadata["row_start"], metadata["row_end"] + 1))
+            # 행 범위의 첫 행/마지막 행이 실제로 청크에 들어 있음
+            self.assertIn(rows[metadata["row_start"] - 1], text)
+            self.assertIn(rows[metadata["row_end"] - 1], text)
+        self.assertEqual(covered, list(range(1, len(rows) + 1)))
+
+    def test_contiguous_table_blocks_are_merged(self):
+        first, second = self.make_rows(0, 7), self.make_rows(7, 7)
+        chunks = list(iter_split_segments([
+            TableBlock(self.header, first, sheet="직원", start_row=0),
+            TableBlock(self.header, second, sheet="직원", start_row=7),
+        ]))
+
+        ranges = [(metadata["row_start"], metadata["row_end"]) for _, metadata in chunks]
+        self.assertEqual(ranges[0][0], 1)
+        self.assertEqual(ranges[-1][1], 14)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(start, end + 1)
+        # 블록 경계(7행/8행)에서 끊기지 않고 두 블록의 행이 한 청크에 함께 들어감
+        self.assertTrue(any(start <= 7 < end for start, end in ranges))
+
+    def test_blocks_from_different_sheets_are_not_merged(self):
+        chunks = list(iter_split_segments([
+            TableBlock(self.header, self.make_rows(0, 2), sheet="1월", start_row=0),
+            TableBlock(self.header, self.make_rows(2, 2), sheet="2월", start_row=2),
+        ]))
+
+        self.assertEqual(
+            [(m["sheet"], m["row_start"], m["row_end"]) for _, m in chunks],
+            [("1월", 1, 2), ("2월", 3, 4)],
+        )
+
+    def test_find_table_parts_splits_prose_and_table(self):
+        text = "\n".join([
+            "분기별 실적입니다.",
+            "분기 | 매출",
+            "--- | ---",
+            "1분기 | 100",
+            "2분기 | 120",
+            "이상입니다.",
+        ])
+        self.assertEqual(find_table_parts(text), [
+            ("text", "분기별 실적입니다."),
+            ("table", "분기 | 매출", ["1분기 | 100", "2분기 | 120"]),
+            ("text", "이상입니다."),
+        ])
+
+    def test_inline_table_repeats_header(self):
+        rows = [f"{i}번 | 제품{i} | {i * 100}원" for i in range(40)]
+        text = "\n".join(["번호 | 제품 | 가격"] + rows)
+        chunks = list(iter_split_segments([text]))
+
+        self.assertGreater(len(chunks), 1)
+        for chunk, metadata in chunks:
+            self.assertEqual(metadata["type"], "table")
+            self.assertEqual(chunk.split("\n")[0], "번호 | 제품 | 가격")
+        body = [line for chunk, _ in chunks for line in chunk.split("\n")[1:]]
+        self.assertEqual(body, rows)
+
+
+@override_settings(CHUNK_TOKENS=64, CHUNK_OVERLAP_TOKENS=0)
+@mock.patch.object(chunk_utils, "count_tokens", estimate_tokens)
+class TranscriptChunkingTests(SimpleTestCase):
+    def make_segments(self, count):
+        return [TranscriptSegment(i * 2.0, i * 2.0 + 1.5, f" {i}번째 발화입니다") for i in range(count)]
+
+    def test_segments_are_grouped_with_time_range(self):
+        segments = self.make_segments(40)
+        chunks = list(iter_split_segments(segments))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertLess(len(chunks), len(segments))
+        spoken = []
+        for text, metadata in chunks:
+            self.assertEqual(metadata["type"], "transcript")
+            self.assertLessEqual(metadata["start_time"], metadata["end_time"])
+            self.assertRegex(text, r"^\[\d{2}:\d{2}:\d{2}~\d{2}:\d{2}:\d{2}\]\n")
+            spoken.extend(text.split("\n", 1)[1].split(" 발화입니다"))
+        # 모든 발화가 순서대로 한 번씩 들어감
+        said = [part.strip() for part in spoken if part.strip()]
+        self.assertEqual(said, [f"{i}번째" for i in range(len(segments))])
+        starts = [metadata["start_time"] for _, metadata in chunks]
+        self.assertEqual(starts, sorted(starts))
+
+    def test_tail_is_carried_into_next_chunk(self):
+        segments = self.make_segments(40)
+        chunks = list(iter_split_segments(segments))
+
+        # 꽉 차지 않은 마지막 구간은 다음 발화와 합쳐지므로 청크 경계가 이어짐
+        for (_, previous), (_, current) in zip(chunks, chunks[1:]):
+            self.assertEqual(current["start_time"], previous["end_time"] + 0.5)
+        self.assertEqual(chunks[0][1]["start_time"], 0.0)
+        self.assertEqual(chunks[-1][1]["end_time"], segments[-1].end)
+
+    def test_prose_before_transcript_is_flushed(self):
+        chunks = list(iter_split_segments(["회의록 제목", *self.make_segments(3)]))
+
+        self.assertEqual(chunks[0][0], "회의록 제목")
+        self.assertEqual([metadata.get("type") for _, metadata in chunks[1:]], ["transcript"])
+        self.assertEqual(chunks[1][1]["end_time"], 5.5)
+
+
+class PackContextTests(SimpleTestCase):
+    def test_keeps_best_duplicate_and_original_order(self):
+        docs = [
+            (Document(page_content="세 번째 청크", metadata={"order": 2}), 0.9),
+            (Document(page_content="첫 번째 청크", metadata={"order": 0}), 0.5),
+            (Document(page_content="세 번째 청크", metadata={"order": 2}), 0.3),
+        ]
+        packed = pack_context(docs, token_budget=500)
+        self.assertEqual([doc.metadata["order"] for doc in packed], [0, 2])
+
+    def test_respects_budget_by_score(self):
+        docs = [
+            (Document(page_content="가" * 100, metadata={"order": 0}), 0.2),
+            (Document(page_content="나" * 100, metadata={"order": 1}), 0.9),
+            (Document(page_content="다" * 100, metadata={"order": 2}), 0.5),
+        ]
+        packed = pack_context(docs, token_budget=250)
+        self.assertEqual([doc.metadata["order"] for doc in packed], [1, 2])
+
+    def test_strips_overlap_between_adjacent_chunks(self):
+        base = " ".join(f"{i}번째 문장입니다." for i in range(20))
+        docs = [
+            (Document(page_content=base[:80], metadata={"order": 0}), 0.9),
+            (Document(page_content=base[60:140], metadata={"order": 1}), 0.8),
+        ]
+        packed = pack_context(docs, token_budget=500)
+
+        self.assertEqual(packed[0].page_content, base[:80])
+        self.assertEqual(packed[1].page_content, base[80:140].lstrip())
+        self.assertEqual(packed[0].page_content + " " + packed[1].page_content, base[:140])
+
+    def test_same_content_under_different_order_kept_once(self):
+        docs = [
+            (Document(page_content="같은 내용", metadata={"order": 0, "content_hash": "h"}), 0.4),
+            (Document(page_content="같은 내용", metadata={"order": 5, "content_hash": "h"}), 0.8),
+        ]
+        packed = pack_context(docs, token_budget=500)
+        self.assertEqual([doc.metadata["order"] for doc in packed], [5])
+
+
+class HybridSearchTests(SimpleTestCase):
+    def test_rrf_prefers_ids_found_by_both_searches(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4]], k=10, rrf_k=60)
+
+        ranked = [doc_id for doc_id, _ in fused]
+        self.assertEqual(ranked[:2], [3, 1])
+        self.assertEqual(set(ranked[2:]), {2, 4})
+        scores = dict(fused)
+        self.assertAlmostEqual(scores[3], 1 / 63 + 1 / 61)
+        self.assertAlmostEqual(scores[1], 1 / 61)
+
+    def test_rrf_truncates_to_k(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [4, 5, 6]], k=2, rrf_k=60)
+        self.assertEqual(len(fused), 2)
+        self.assertEqual({doc_id for doc_id, _ in fused}, {1, 4})
+
+    def test_sparse_index_matches_identifiers_and_josa(self):
+        index = SparseIndex()
+        index.add(0, "제품코드 AB-1234 판매량은 320개입니다.")
+        index.add(1, "2024년 매출보고서 요약")
+        self.assertEqual(index.search("AB-1234의 판매량", 1)[0][0], 0)
+        self.assertEqual(index.search("매출보고서를", 1)[0][0], 1)
+
+        restored = SparseIndex.from_dict(index.to_dict())
+        self.assertEqual(restored.search("AB-1234", 2), index.search("AB-1234", 2))
+
+
+class FakeMapLLM:
+    model = "fake-map"
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return mock.Mock(content="요약")
+
+
+@override_settings(SUMMARY_GROUP_TOKENS=100, SUMMARY_MAX_WORKERS=2)
+class SummarizeDocumentTests(SimpleTestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(summarizer, "SUMMARY_CACHE_DIR", cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.llm = FakeMapLLM()
+        self.loads = 0
+
+    def load_texts(self, count):
+        def load():
+            self.loads += 1
+            return ("가" * 40 for _ in range(count))
+        return load
+
+    def test_short_document_is_returned_as_is_and_cached(self):
+        first = summarizer.summarize_document(self.llm, self.load_texts(2), "doc", 1000, "hash:2")
+        second = summarizer.summarize_document(self.llm, self.load_texts(2), "doc", 1000, "hash:2")
+
+        self.assertEqual(first, ["가" * 40] * 2)
+        self.assertEqual(second, first)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.llm.calls, 0)
+
+    def test_long_document_is_mapped_once_per_document_key(self):
+        sources = summarizer.summarize_document(self.llm, self.load_texts(20), "doc", 300, "hash:20")
+        calls = self.llm.calls
+        self.assertGreater(calls, 0)
+        self.assertLess(len(sources), 20)
+
+        self.assertEqual(summarizer.summarize_document(self.llm, self.load_texts(20), "doc", 300, "hash:20"), sources)
+        self.assertEqual((self.loads, self.llm.calls), (1, calls))
+
+        # 내용이 바뀐 문서(다른 키)는 원문을 다시 읽음
+        summarizer.summarize_document(self.llm, self.load_texts(21), "doc", 300, "hash2:21")
+        self.assertEqual(self.loads, 2)
+
+    def test_map_phase_starts_before_all_texts_are_read(self):
+        read = []
+
+        def load():
+            for i in range(20):
+                read.append(i)
+                yield "나" * 40
+
+        def invoke(messages):
+            seen_at_first_call.append(len(read))
+            return mock.Mock(content="요약")
+
+        seen_at_first_call = []
+        self.llm.invoke = invoke
+        summarizer.summarize_document(self.llm, load, "doc", 300, "hash:stream")
+        self.assertLess(seen_at_first_call[0], 20)
+
+
+class ImageTriageTests(SimpleTestCase):
+    def setUp(self):
+        image_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(image_dir.cleanup)
+        self.image_dir = image_dir.name
+
+    def save(self, name, image):
+        path = os.path.join(self.image_dir, f"{name}.png")
+        image.save(path)
+        return path
+
+    def canvas(self):
+        image = Image.new("RGB", (400, 300), "white")
+        return image, ImageDraw.Draw(image)
+
+    def make_images(self):
+        icon = Image.new("RGB", (32, 32), (200, 30, 30))
+
+        shape, draw = self.canvas()
+        draw.ellipse((100, 50, 300, 250), fill=(30, 120, 200))
+
+        chart, draw = self.canvas()
+        draw.line((40, 260, 380, 260), fill="black")
+        draw.line((40, 20, 40, 260), fill="black")
+        for i, height in enumerate([120, 200, 80, 160]):
+            draw.rectangle((70 + i * 80, 260 - height, 110 + i * 80, 260), fill=(50, 100, 200))
+            draw.text((70 + i * 80, 265), f"Q{i + 1}", fill="black")
+            draw.text((70 + i * 80, 245 - height), str(height), fill="black")
+
+        text, draw = self.canvas()
+        for y in range(10, 290, 14):
+            draw.text((10, y), "Quarterly revenue 12,345 and costs 6,789", fill="black")
+
+        noise = np.random.default_rng(0).normal(128, 40, (300, 400, 3)).clip(0, 255).astype("uint8")
+        return {
+            "icon": icon, "shape": shape, "chart": chart, "text": text, "photo": Image.fromarray(noise),
+        }
+
+    def test_classify_image_categories(self):
+        expected = {
+            "icon": image_triage.DECORATIVE, "shape": image_triage.SHAPE, "chart": image_triage.CHART,
+            "text": image_triage.TEXT, "photo": image_triage.PHOTO,
+        }
+        for name, image in self.make_images().items():
+            with self.subTest(name=name):
+                self.assertEqual(image_triage.classify_image(self.save(name, image)), expected[name])
+
+    def test_default_modes_per_category(self):
+        paths = {name: self.save(name, image) for name, image in self.make_images().items()}
+        modes = {name: image_triage.get_triage_mode(path) for name, path in paths.items()}
+        self.assertEqual(modes, {"icon": None, "shape": "brief", "photo": "brief", "chart": "simple", "text": "simple"})
+
+    def test_settings_override_and_disable(self):
+        chart = self.save("chart", self.make_images()["chart"])
+        with override_settings(IMAGE_TRIAGE_MODES={"chart": "detailed"}):
+            self.assertEqual(image_triage.get_triage_mode(chart), "detailed")
+        with override_settings(IMAGE_TRIAGE_ENABLED=False):
+            self.assertEqual(image_triage.get_triage_mode(self.save("icon", self.make_images()["icon"])), "simple")
+
+    def test_unreadable_image_is_not_skipped(self):
+        path = os.path.join(self.image_dir, "broken.png")
+        with open(path, "wb") as f:
+            f.write(b"not an image")
+        self.assertEqual(image_triage.classify_image(path), image_triage.CHART)
+
+    @override_settings(IMAGE_BRIEF_MAX_TOKENS=64)
+    def test_brief_mode_uses_short_prompt_and_output_cap(self):
+        self.assertNotEqual(image_utils.get_image_analysis_prompt("brief"), image_utils.get_image_analysis_prompt("simple"))
+        self.assertEqual(image_utils._build_image_llm("qwen2.5vl:3b", "brief").num_predict, 64)
+        self.assertIsNone(image_utils._build_image_llm("qwen2.5vl:3b", "simple").num_predict)
+
+
+class ImageCacheTests(SimpleTestCase):
+    prompt_key = "prompt"
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        for name, value in [
+            ("CACHE_PATH", os.path.join(cache_dir.name, "cache.sqlite3")),
+            ("_local", threading.local()),
+            ("_perceptual_indexes", {}),
+        ]:
+            patcher = mock.patch.object(image_cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_image(self, seed, size=(256, 256), fmt="PNG"):
+        pattern = np.random.default_rng(seed).integers(0, 256, (16, 16, 3), dtype=np.uint8)
+        path = os.path.join(self.cache_dir, f"{seed}_{size[0]}.{fmt.lower()}")
+        Image.fromarray(pattern).resize(size, Image.BILINEAR).save(path, fmt)
+        return path
+
+    def test_exact_and_perceptual_hits(self):
+        original = image_cache.get_image_hashes(self.make_image(1))
+        resized = image_cache.get_image_hashes(self.make_image(1, size=(200, 200), fmt="JPEG"))
+        other = image_cache.get_image_hashes(self.make_image(2))
+        image_cache.put_cached_analysis(original, self.prompt_key, "로고")
+
+        self.assertEqual(image_cache.get_cached_analysis(original, self.prompt_key, allow_near_match=False), "로고")
+        self.assertNotEqual(resized[0], original[0])
+        self.assertEqual(image_cache.get_cached_analysis(resized, self.prompt_key), "로고")
+        self.assertIsNone(image_cache.get_cached_analysis(resized, self.prompt_key, allow_near_match=False))
+        self.assertIsNone(image_cache.get_cached_analysis(other, self.prompt_key))
+        self.assertIsNone(image_cache.get_cached_analysis(original, "other-prompt"))
+
+    def test_rows_written_elsewhere_are_picked_up(self):
+        first = image_cache.get_image_hashes(self.make_image(1))
+        second = image_cache.get_image_hashes(self.make_image(2))
+        image_cache.put_cached_analysis(first, self.prompt_key, "첫 번째")
+        self.assertIsNone(image_cache.get_cached_analysis(("missing", second[1]), self.prompt_key))
+
+        # 다른 프로세스가 같은 캐시 파일에 기록
+        conn = sqlite3.connect(image_cache.CACHE_PATH)
+        with conn:
+            conn.execute(
+                "INSERT INTO image_analysis (content_hash, perceptual_hash, prompt_key, result) VALUES (?, ?, ?, ?)",
+                (second[0], second[1], self.prompt_key, "두 번째"),
+            )
+        conn.close()
+        self.assertEqual(image_cache.get_cached_analysis(("missing", second[1]), self.prompt_key), "두 번째")
+
+    @override_settings(IMAGE_CACHE_MAX_PERCEPTUAL_ENTRIES=2)
+    def test_index_keeps_most_recent_entries(self):
+        hashes = [image_cache.get_image_hashes(self.make_image(seed)) for seed in range(3)]
+        for i, entry in enumerate(hashes):
+            image_cache.put_cached_analysis(entry, self.prompt_key, f"{i}번")
+
+        near = [("missing", perceptual_hash) for _, perceptual_hash in hashes]
+        self.assertIsNone(image_cache.get_cached_analysis(near[0], self.prompt_key))
+        self.assertEqual(image_cache.get_cached_analysis(near[2], self.prompt_key), "2번")
+        self.assertEqual(len(image_cache._perceptual_indexes[self.prompt_key].entries), 2)
+
+    def test_band_index_finds_every_hash_within_distance(self):
+        index = image_cache._PerceptualIndex(max_distance=16, max_entries=10)
+        base = int("f0" * 32, 16)
+        index.add("a", (base, [8, 8, 8]), "결과")
+        # 서로 다른 구간에 흩어진 16비트를 뒤집어도 찾고, 17비트면 찾지 않음
+        flipped = base
+        for bit in range(0, 256, 16):
+            flipped ^= 1 << bit
+        self.assertEqual(index.find((flipped, [8, 8, 8])), "결과")
+        self.assertIsNone(index.find((flipped ^ (1 << 255), [8, 8, 8])))
+
+
+class ImageAnalysisLimiterTests(SimpleTestCase):
+    def test_limit_is_shared_across_event_loops(self):
+        limiter = image_utils.ImageAnalysisLimiter(2)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        async def analyze():
+            async with limiter:
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                await asyncio.sleep(0.02)
+                with lock:
+                    active.pop()
+
+        async def document():
+            await asyncio.gather(*(analyze() for _ in range(4)))
+
+        def sync_analyze():
+            with limiter.slot():
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                threading.Event().wait(0.02)
+                with lock:
+                    active.pop()
+
+        # 문서마다 별도 스레드의 asyncio.run + 동기 호출이 섞여도 동시 요청은 2개까지
+        threads = [threading.Thread(target=asyncio.run, args=(document(),)) for _ in range(3)]
+        threads += [threading.Thread(target=sync_analyze) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(len(peak), 15)
+        self.assertEqual(max(peak), 2)
+
+    def test_cancelled_waiter_does_not_leak_slot(self):
+        limiter = image_utils.ImageAnalysisLimiter(1)
+
+        async def scenario():
+            await limiter.acquire_async()
+            waiter = asyncio.ensure_future(limiter.acquire_async())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            limiter.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            await asyncio.sleep(0)
+            await asyncio.wait_for(limiter.acquire_async(), 1)
+
+        asyncio.run(scenario())
+
+
+class SpreadsheetExtractionTests(SimpleTestCase):
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.work_dir = work_dir.name
+
+    def make_xlsx(self):
+        import openpyxl
+
+        path = os.path.join(self.work_dir, "sheet.xlsx")
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "매출"
+        for row in [["월", "매출"], ["1월", 100], [None, None], ["3월", 300]]:
+            ws.append(row)
+        wb.save(path)
+        return path
+
+    def test_xlsx_keeps_empty_rows_and_row_numbers(self):
+        path = self.make_xlsx()
+        segments = list(extracting_xlsx.iter_xlsx_segments(path, enable_image_analysis=False, rows_per_segment=2))
+
+        self.assertEqual(extracting_xlsx.extract_xlsx_content(path, enable_image_analysis=False), "".join(map(str, segments)))
+        self.assertEqual(
+            extracting_xlsx.extract_xlsx_content(path, enable_image_analysis=False),
+            "# 시트: 매출\n\n[표 또는 셀 텍스트]\n\n월 | 매출\n1월 | 100\n | \n3월 | 300",
+        )
+        blocks = [segment for segment in segments if isinstance(segment, TableBlock)]
+        self.assertEqual([(block.start_row, block.rows) for block in blocks], [(0, ["1월 | 100", " | "]), (2, ["3월 | 300"])])
+
+    def test_xls_releases_workbook_when_closed_early(self):
+        sheet = mock.Mock(nrows=3)
+        sheet.name = "시트1"
+        sheet.row_values.side_effect = lambda idx: [f"값{idx}", idx]
+        book = mock.Mock()
+        book.sheets.return_value = [sheet]
+
+        with mock.patch.object(extracting_xlsx.xlrd, "open_workbook", return_value=book):
+            segments = extracting_xlsx.iter_xlsx_segments("old.xls")
+            next(segments)
+            book.release_resources.assert_not_called()
+            segments.close()
+        book.release_resources.assert_called_once_with()
+
+    def test_csv_segments_match_full_extraction(self):
+        path = os.path.join(self.work_dir, "data.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("이름,점수,비고\n김,90,\n이,,결석\n박,007,\n")
+
+        segments = list(iter_csv_segments(path, rows_per_segment=2))
+        self.assertEqual("".join(map(str, segments)), extract_csv_content(path))
+        self.assertEqual(extract_csv_content(path).split("\n"), [
+            "# CSV 파일", "[표 형식 데이터]", "이름 | 점수 | 비고", "--- | --- | ---",
+            "김 | 90 | ", "이 |  | 결석", "박 | 007 | ",
+        ])
+        self.assertEqual([block.start_row for block in segments[1:]], [0, 2])
+
+
+class ContentHashManifestTests(SimpleTestCase):
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.work_dir = work_dir.name
+        for name, value in [
+            ("MANIFEST_PATH", os.path.join(work_dir.name, "manifest.json")),
+            ("_file_hash_memo", {}),
+            ("HASH_CHUNK_SIZE", 4),
+        ]:
+            patcher = mock.patch.object(vectordb_upload_search, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, name, data):
+        path = os.path.join(self.work_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_hash_follows_content_not_name_or_mtime(self):
+        first = self.write("a.txt", b"same bytes across chunks")
+        copy = self.write("b.txt", b"same bytes across chunks")
+        os.utime(copy, (0, 0))
+        other = self.write("c.txt", b"same bytes across chunkz")
+
+        get_file_hash = vectordb_upload_search.get_file_hash
+        self.assertEqual(get_file_hash(first), get_file_hash(copy))
+        self.assertNotEqual(get_file_hash(first), get_file_hash(other))
+
+    def test_hash_is_recomputed_when_file_changes(self):
+        path = self.write("doc.txt", b"version one")
+        before = vectordb_upload_search.get_file_hash(path)
+        self.write("doc.txt", b"version two!")
+        self.assertNotEqual(vectordb_upload_search.get_file_hash(path), before)
+
+    def test_manifest_records_sources_and_previous_versions(self):
+        record = vectordb_upload_search.record_manifest
+        record("h1", "/uploads/report.pdf", "doc_h1", chunk_count=10)
+        record("h1", "/other/copy.pdf", "doc_h1")
+        record("h2", "/uploads/memo.pdf", "doc_h2")
+
+        manifest = vectordb_upload_search.load_manifest()
+        self.assertEqual(manifest["h1"]["sources"], ["report.pdf", "copy.pdf"])
+        self.assertEqual(manifest["h1"]["chunks"], 10)
+
+        # 파일명을 공유하는 컬렉션은 이전 버전으로 보지 않음
+        find = vectordb_upload_search.find_previous_manifest_entry
+        self.assertEqual(find("/uploads/report.pdf", "h3"), (None, None))
+        self.assertEqual(find("/uploads/memo.pdf", "h3")[0], "h2")
+        self.assertEqual(find("/uploads/memo.pdf", "h2"), (None, None))
+
+        vectordb_upload_search.forget_manifest("h2")
+        self.assertNotIn("h2", vectordb_upload_search.load_manifest())
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        for name, value in [
+            ("CACHE_PATH", os.path.join(cache_dir.name, "embeddings.sqlite3")),
+            ("_local", threading.local()),
+            ("_QUERY_BATCH", 2),
+        ]:
+            patcher = mock.patch.object(embedding_cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_round_trip_keeps_order_and_marks_misses(self):
+        embedding_cache.put_cached_embeddings(["가", "나", "다"], [[0.5, 1.0], [1.5, 2.0], [2.5, 3.0]], "m")
+
+        self.assertEqual(
+            embedding_cache.get_cached_embeddings(["다", "없음", "가", "다", "나"], "m"),
+            [[2.5, 3.0], None, [0.5, 1.0], [2.5, 3.0], [1.5, 2.0]],
+        )
+        # 모델이 다르면 같은 텍스트라도 재사용하지 않음
+        self.assertEqual(embedding_cache.get_cached_embeddings(["가"], "other"), [None])
+        self.assertEqual(embedding_cache.get_embedding_cache_stats(), {"m": 3})
+
+    def test_embed_batch_only_embeds_uncached_chunks(self):
+        embeddings = mock.Mock(model="m")
+        embeddings.embed_documents.side_effect = lambda texts: [[float(len(text))] for text in texts]
+        vector_store = mock.Mock(embeddings=embeddings, content_payload_key="page_content", metadata_payload_key="metadata")
+
+        def batch(*texts):
+            return [Document(page_content=text, metadata={"order": i}) for i, text in enumerate(texts)]
+
+        vectordb_upload_search._embed_batch(vector_store, batch("하나", "둘둘"))
+        points = vectordb_upload_search._embed_batch(vector_store, batch("둘둘", "셋셋셋", "하나"))
+
+        self.assertEqual(
+            [call.args[0] for call in embeddings.embed_documents.call_args_list],
+            [["하나", "둘둘"], ["셋셋셋"]],
+        )
+        self.assertEqual([point.vector for point in points], [[2.0], [3.0], [2.0]])
+        self.assertEqual([point.id for point in points], [0, 1, 2])
+
+
+class VectorStoreCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 0.0
+        patcher = mock.patch.object(vectordb_upload_search.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = vectordb_upload_search.VectorStoreCache(max_size=2, ttl_seconds=None)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        self.assertEqual(cache.get("a"), "A")
+        cache.put("c", "C")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), ("A", "C"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_idle_entries_expire_but_used_ones_stay(self):
+        cache = vectordb_upload_search.VectorStoreCache(max_size=10, ttl_seconds=60)
+        cache.put("idle", "I")
+        cache.put("busy", "B")
+        for _ in range(3):
+            self.now += 40
+            self.assertEqual(cache.get("busy"), "B")
+
+        self.assertIsNone(cache.get("idle"))
+        self.assertEqual(len(cache), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (3, 1, 1))
+
+    def test_data_to_vectorstore_reuses_cached_store_for_same_content(self):
+        cache = vectordb_upload_search.VectorStoreCache(max_size=2, ttl_seconds=60)
+        store = object()
+        cache.put("hash", store)
+        with mock.patch.object(vectordb_upload_search, "_vector_store_cache", cache), \
+                mock.patch.object(vectordb_upload_search, "get_file_hash", return_value="hash"), \
+                mock.patch.object(vectordb_upload_search, "get_qdrant_client") as get_client:
+            self.assertIs(vectordb_upload_search.data_to_vectorstore("/uploads/renamed.pdf"), store)
+        get_client.assert_not_called()
+
+
+class UploadViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("tester", password="pw")
+        self.client = Client(enforce_csrf_checks=True)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        patcher = mock.patch.object(views, "TEMP_DIR", temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, client=None, **extra):
+        return (client or self.client).post("/upload/", {"file": SimpleUploadedFile("memo.txt", "메모".encode())}, **extra)
+
+    def test_anonymous_upload_is_rejected(self):
+        response = self.upload(Client())
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(IngestionJob.objects.exists())
+
+    def test_upload_requires_csrf_token(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.upload().status_code, 403)
+
+    def test_uploaded_job_status_is_visible_to_uploader(self):
+        self.client.force_login(self.user)
+        self.client.get("/chat_page/")
+        token = self.client.cookies["csrftoken"].value
+
+        payload = self.upload(HTTP_X_CSRFTOKEN=token).json()
+        self.assertTrue(payload["success"])
+        job = IngestionJob.objects.get(pk=payload["job_id"])
+        self.assertEqual(job.uploaded_file.user, self.user)
+
+        status = self.client.get(payload["status_url"])
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.json()["status"], "queued")
+
+
+class AskStreamTests(TestCase):
+    def fake_stream(self, query, file_path, memory):
+        memory.history.append({"role": "user", "content": query})
+        yield {"type": "status", "stage": "generate", "task": "질의응답"}
+        yield {"type": "token", "content": "안녕"}
+        yield {"type": "done", "state": mock.Mock(success=True, task_type=None, final_response="안녕하세요")}
+
+    def test_history_is_saved_after_stream(self):
+        with mock.patch.object(views, "execute_workflow_stream", self.fake_stream), \
+                mock.patch.object(views, "get_pending_job", return_value=None):
+            response = self.client.post("/ask/stream/", {"message": "질문"}, content_type="application/json")
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertLess(body.index("event: token"), body.index("event: done"))
+        self.assertIn('"answer": "안녕하세요"', body)
+        self.assertEqual(self.client.session["chat_history"], [{"role": "user", "content": "질문"}])
+
+    def test_stream_session_save_closes_thread_connection(self):
+        session = mock.Mock()
+        with mock.patch.object(views, "connection") as connection:
+            views.save_session_from_stream(session, close_connection=True)
+        session.save.assert_called_once_with()
+        connection.close.assert_called_once_with()
+
+
+@override_settings(JOB_STALE_SECONDS=120, JOB_MAX_ATTEMPTS=2, JOB_HEARTBEAT_SECONDS=3600)
+class IngestionJobQueueTests(TestCase):
+    def make_job(self, path, **fields):
+        return IngestionJob.objects.create(file_path=path, **fields)
+
+    def stale_running(self, path, attempts):
+        old = timezone.now() - timedelta(seconds=600)
+        return self.make_job(path, status="running", attempts=attempts, started_date=old, heartbeat_date=old)
+
+    def test_claims_oldest_queued_job_once(self):
+        first = self.make_job("a.pdf", created_date=timezone.now() - timedelta(seconds=10))
+        second = self.make_job("b.pdf")
+
+        claimed = jobs.claim_next_job("worker-1")
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.worker, claimed.attempts), ("running", "worker-1", 1))
+        self.assertEqual(jobs.claim_next_job("worker-2").pk, second.pk)
+        self.assertIsNone(jobs.claim_next_job("worker-3"))
+
+    def test_stale_jobs_are_requeued_then_failed(self):
+        retry = self.stale_running("retry.pdf", attempts=1)
+        give_up = self.stale_running("give_up.pdf", attempts=2)
+        alive = self.make_job("alive.pdf", status="running", attempts=1, heartbeat_date=timezone.now())
+
+        # 정리된 작업을 바로 다시 가져감
+        self.assertEqual(jobs.claim_next_job("worker-1").pk, retry.pk)
+        give_up.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(give_up.status, "failed")
+        self.assertEqual(alive.status, "running")
+        retry.refresh_from_db()
+        self.assertEqual(retry.attempts, 2)
+
+    def test_pending_job_ignores_dead_workers(self):
+        self.stale_running("dead.pdf", attempts=1)
+        self.assertIsNone(jobs.get_pending_job("dead.pdf"))
+        queued = self.make_job("dead.pdf")
+        self.assertEqual(jobs.get_pending_job("dead.pdf").pk, queued.pk)
+
+    def test_run_ingestion_job_records_result(self):
+        ok = self.make_job("ok.pdf", status="running")
+        broken = self.make_job("broken.pdf", status="running")
+
+        def fake_vectorstore(path, progress_callback=None):
+            progress_callback("embed", 5, 10)
+            if path == "broken.pdf":
+                raise RuntimeError("임베딩 서버 응답 없음")
+            return object()
+
+        with mock.patch("vectordb_upload_search.data_to_vectorstore", fake_vectorstore):
+            jobs.run_ingestion_job(ok)
+            jobs.run_ingestion_job(broken)
+
+        ok.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual((ok.status, ok.progress), ("completed", 1.0))
+        self.assertEqual((broken.status, broken.stage, broken.error_message), ("failed", "embed", "임베딩 서버 응답 없음"))
@@ -1,12 +1,14 @@
 from django.urls import path, include
-from .views import chat_page, upload_file, ask_question, list_uploaded_files, home, download_report, list_generated_files, clear_history, user_login, signup, user_logout, hr_evaluation_page, hr_evaluation_predict
+from .views import chat_page, upload_file_async, upload_status, ask_question_async, ask_question_stream, list_uploaded_files, home, download_report, list_generated_files, clear_history, user_login, signup, user_logout, hr_evaluation_page, hr_evaluation_predict
 
 
 urlpatterns = [
     path("", home, name="home"),
     path("chat_page/", chat_page, name="chat_page"),
-    path("upload/", upload_file, name="upload_file"),
-    path("ask/", ask_question, name="ask_question"),
+    path("upload/", upload_file_async, name="upload_file"),
+    path("upload/status/<int:job_id>/", upload_status, name="upload_status"),
+    path("ask/", ask_question_async, name="ask_question"),
+    path("ask/stream/", ask_question_stream, name="ask_question_stream"),
     path("list_files/", list_uploaded_files, name="list_files"),
     path("list_generated_files/", list_generated_files, name="list_generated_files"),  # ← 추가!
     path("presentation/", include('presentation.urls')),
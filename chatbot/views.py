@@ -1,21 +1,26 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, FileResponse
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-import os, json, uuid
+import os, json, uuid, asyncio
 from django.conf import settings
+from django.db import connection
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from vectordb_upload_search import data_to_vectorstore, question_answer_with_memory, BufferMemory, ensure_korean_only
+from vectordb_upload_search import question_answer_with_memory, BufferMemory, ensure_korean_only
 from utils.docx_writer import markdown_to_styled_docx
 from utils.pptx_writer import save_structured_text_to_pptx
 from utils.intent_classifier import check_intent, normalize_label
 from utils.eval_hr import hr_predict
-from langgraph_workflow import execute_workflow, TaskType
+from langgraph_workflow import execute_workflow, aexecute_workflow, execute_workflow_stream, TaskType
+from chatbot.jobs import enqueue_ingestion, get_pending_job
+from chatbot.models import IngestionJob
 
 # 업로드/생성 파일 폴더 경로 분리
 TEMP_DIR = os.path.join(settings.BASE_DIR, "temp")
@@ -103,7 +108,15 @@ def chat_page(request):
     }
     return render(request, "chatbot/chat.html", context)
 
-@csrf_exempt
+def save_uploaded_file(uploaded_file) -> str:
+    """업로드 파일을 temp/ 폴더에 저장하고 경로 반환"""
+    save_path = os.path.join(TEMP_DIR, uploaded_file.name)
+    with open(save_path, "wb") as f:
+        for chunk in uploaded_file.chunks():
+            f.write(chunk)
+    return save_path
+
+@login_required
 def upload_file(request):
     """사용자 파일 업로드: temp/ 폴더에 저장"""
     if request.method == "POST":
@@ -111,18 +124,103 @@ def upload_file(request):
         if not uploaded_file:
             return JsonResponse({"success": False, "message": "파일이 없습니다."})
 
-        save_path = os.path.join(TEMP_DIR, uploaded_file.name)
-        with open(save_path, "wb") as f:
-            for chunk in uploaded_file.chunks():
-                f.write(chunk)
+        save_path = save_uploaded_file(uploaded_file)
 
-        try:
-            data_to_vectorstore(save_path)
-        except Exception as e:
-            return JsonResponse({"success": False, "message": f"벡터화 실패: {str(e)}"})
-        return JsonResponse({"success": True, "file_path": save_path})
+        # 벡터화는 워커 프로세스에서 처리 (run_ingestion_workers)
+        job = enqueue_ingestion(save_path, request.user, uploaded_file.name)
+        return JsonResponse(build_upload_payload(job))
+    return JsonResponse({"success": False, "message": "POST 요청만 지원합니다."})
+
+@login_required
+async def upload_file_async(request):
+    """
+    upload_file 비동기 버전: 저장/벡터화는 스레드에서 실행해 이벤트 루프를 막지 않음
+    작업 상태 조회(upload_status)가 업로드한 사용자 기준이므로 로그인 필수
+    """
+    if request.method == "POST":
+        uploaded_file = request.FILES.get("file")
+        if not uploaded_file:
+            return JsonResponse({"success": False, "message": "파일이 없습니다."})
+
+        save_path = await sync_to_async(save_uploaded_file, thread_sensitive=False)(uploaded_file)
+
+        # 벡터화는 워커 프로세스에서 처리 (run_ingestion_workers)
+        user = await request.auser()
+        job = await sync_to_async(enqueue_ingestion)(save_path, user, uploaded_file.name)
+        return JsonResponse(build_upload_payload(job))
     return JsonResponse({"success": False, "message": "POST 요청만 지원합니다."})
 
+def build_upload_payload(job) -> dict:
+    """업로드 응답: 파일 경로와 벡터화 작업 상태 조회 주소"""
+    return {
+        "success": True,
+        "file_path": job.file_path,
+        "job_id": job.pk,
+        "status": job.status,
+        "status_url": f"/upload/status/{job.pk}/",
+    }
+
+@login_required
+def upload_status(request, job_id):
+    """벡터화 작업 진행률 조회 (프론트엔드 폴링용, 본인이 올린 파일의 작업만)"""
+    try:
+        job = IngestionJob.objects.get(pk=job_id, uploaded_file__user=request.user)
+    except IngestionJob.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+    return JsonResponse({
+        "job_id": job.pk,
+        "file_path": job.file_path,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": round(job.progress, 3),
+        "error": job.error_message or None,
+    })
+
+PROCESSING_MESSAGE = "파일을 처리하고 있습니다. 벡터화가 끝난 뒤 다시 질문해주세요."
+
+def build_answer_payload(result) -> dict:
+    """워크플로우 결과를 태스크별 응답 형식으로 변환"""
+    if not result.success:
+        # 에러 처리
+        return {
+            "answer": result.final_response,
+            "error": result.error_message
+        }
+    # 태스크별 응답 형식
+    if result.task_type in [TaskType.REPORT, TaskType.PRESENTATION]:
+        filename = result.output_file_path.split('/')[-1] if result.output_file_path else None
+        return {
+            "report_markdown": result.final_response,
+            "report_file_url": f"/download_report/?filename={filename}" if filename else None
+        }
+    # 요약, 질의응답 등
+    return {"answer": result.final_response}
+
+def save_session_from_stream(session, close_connection: bool = False):
+    """
+    스트리밍 응답 도중 세션 저장 (응답 헤더가 이미 나가 SessionMiddleware가 저장하지 못함)
+    ASGI에서는 요청과 무관한 실행기 스레드에서 호출되므로 close_connection으로 이 스레드가 연 DB 연결을 바로 닫음
+    """
+    try:
+        session.save()
+    finally:
+        if close_connection:
+            connection.close()
+
+def format_sse(event: str, data: dict) -> str:
+    """Server-Sent Events 메시지 형식"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _aiter_in_thread(iterator):
+    """동기 제너레이터를 스레드에서 한 항목씩 꺼내 비동기로 전달 (ASGI 스트리밍용)"""
+    sentinel = object()
+    iterator = iter(iterator)
+    while True:
+        item = await sync_to_async(next, thread_sensitive=False)(iterator, sentinel)
+        if item is sentinel:
+            break
+        yield item
+
 @csrf_exempt
 def ask_question(request):
     """LangGraph 워크플로우 기반 통합 처리"""
@@ -135,6 +233,11 @@ def ask_question(request):
         query = data.get("message")
         file_path = data.get("file_path", DEFAULT_FILE_PATH)
 
+        # 벡터화가 끝나지 않은 파일이면 바로 안내
+        pending = get_pending_job(file_path)
+        if pending:
+            return JsonResponse({"answer": PROCESSING_MESSAGE, "status": pending.status, "job_id": pending.pk})
+
         # 세션에서 BufferMemory 불러오기
         memory = get_buffer_memory_from_session(request.session)
 
@@ -146,25 +249,7 @@ def ask_question(request):
             if result.success:
                 # BufferMemory를 세션에 저장
                 save_buffer_memory_to_session(request.session, memory)
-                
-                # 태스크별 응답 형식
-                if result.task_type in [TaskType.REPORT, TaskType.PRESENTATION]:
-                    filename = result.output_file_path.split('/')[-1] if result.output_file_path else None
-                    return JsonResponse({
-                        "report_markdown": result.final_response,
-                        "report_file_url": f"/download_report/?filename={filename}" if filename else None
-                    })
-                else:
-                    # 요약, 질의응답 등
-                    return JsonResponse({
-                        "answer": result.final_response
-                    })
-            else:
-                # 에러 처리
-                return JsonResponse({
-                    "answer": result.final_response,
-                    "error": result.error_message
-                })
+            return JsonResponse(build_answer_payload(result))
                 
         except Exception as e:
             # 폴백: 기존 시스템 사용
@@ -175,6 +260,93 @@ def ask_question(request):
 
     return JsonResponse({"error": "Invalid method"}, status=405)
 
+@csrf_exempt
+async def ask_question_async(request):
+    """ask_question 비동기 버전: LLM/임베딩 호출을 기다리는 동안 워커를 점유하지 않음"""
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid method"}, status=405)
+
+    # 세션 미생성 시 강제 생성
+    if not await sync_to_async(lambda: request.session.session_key)():
+        await request.session.acreate()
+
+    data = json.loads(request.body)
+    query = data.get("message")
+    file_path = data.get("file_path", DEFAULT_FILE_PATH)
+
+    # 벡터화가 끝나지 않은 파일이면 바로 안내
+    pending = await sync_to_async(get_pending_job)(file_path)
+    if pending:
+        return JsonResponse({"answer": PROCESSING_MESSAGE, "status": pending.status, "job_id": pending.pk})
+
+    # 세션에서 BufferMemory 불러오기
+    memory = await sync_to_async(get_buffer_memory_from_session)(request.session)
+
+    try:
+        result = await aexecute_workflow(query, file_path, memory)
+        if result.success:
+            await sync_to_async(save_buffer_memory_to_session)(request.session, memory)
+        return JsonResponse(build_answer_payload(result))
+
+    except Exception as e:
+        # 폴백: 기존 시스템 사용
+        print(f"[LangGraph 워크플로우 실패] {str(e)} - 기존 시스템으로 폴백")
+        answer = await sync_to_async(question_answer_with_memory, thread_sensitive=False)(file_path, query, memory)
+        await sync_to_async(save_buffer_memory_to_session)(request.session, memory)
+        return JsonResponse({"answer": answer})
+
+@csrf_exempt
+def ask_question_stream(request):
+    """
+    /ask/ 스트리밍 버전: LLM 토큰을 Server-Sent Events로 바로 전달
+    이벤트 순서: status* → token* → done(최종 응답, /ask/와 같은 JSON 형식)
+    한국어 검증에서 번역된 경우 done의 응답이 토큰 누적본을 대체
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid method"}, status=405)
+
+    # 세션 미생성 시 강제 생성
+    if not request.session.session_key:
+        request.session.create()
+
+    data = json.loads(request.body)
+    query = data.get("message")
+    file_path = data.get("file_path", DEFAULT_FILE_PATH)
+
+    # 벡터화가 끝나지 않은 파일이면 바로 안내
+    pending = get_pending_job(file_path)
+    if pending:
+        return JsonResponse({"answer": PROCESSING_MESSAGE, "status": pending.status, "job_id": pending.pk})
+
+    memory = get_buffer_memory_from_session(request.session)
+    is_asgi = isinstance(request, ASGIRequest)
+
+    def event_stream():
+        try:
+            for event in execute_workflow_stream(query, file_path, memory):
+                if event["type"] == "token":
+                    yield format_sse("token", {"content": event["content"]})
+                elif event["type"] == "status":
+                    yield format_sse("status", {k: v for k, v in event.items() if k != "type"})
+                elif event["type"] == "done":
+                    result = event["state"]
+                    if result.success:
+                        save_buffer_memory_to_session(request.session, memory)
+                        save_session_from_stream(request.session, close_connection=is_asgi)
+                    yield format_sse("done", build_answer_payload(result))
+        except Exception as e:
+            print(f"[스트리밍 실패] {str(e)}")
+            yield format_sse("error", {"error": str(e)})
+
+    # ASGI에서는 비동기 이터레이터여야 버퍼링 없이 바로 전송됨
+    stream = event_stream()
+    if is_asgi:
+        stream = _aiter_in_thread(stream)
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # 프록시 버퍼링 방지
+    return response
+
 def download_report(request):
     """생성 파일 다운로드 (uploads/만 접근)"""
     filename = request.GET.get("filename")
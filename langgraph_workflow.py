@@ -5,13 +5,20 @@ FlowMate 워크플로우 - 간소화된 상태 기반 처리
 
 import re
 import os
+import asyncio
+import weakref
 from typing import Dict, Any, Optional, List
 from enum import Enum
 
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_ollama import ChatOllama
-from vectordb_upload_search import data_to_vectorstore, BufferMemory, get_llm, ensure_korean_only
+from vectordb_upload_search import data_to_vectorstore, BufferMemory, get_llm, ensure_korean_only, hybrid_search, iter_all_documents, get_document_key
+from utils.context_packer import pack_context, get_context_budget, get_candidate_count
+from utils.summarizer import summarize_document
+from utils.config import get_setting
+from utils.embedding_utils import aembed_query_cached
+from asgiref.sync import sync_to_async
 from utils.intent_classifier import check_intent, normalize_label
 from utils.docx_writer import markdown_to_styled_docx
 from utils.pptx_writer import save_structured_text_to_pptx
@@ -37,6 +44,7 @@ class WorkflowState(BaseModel):
     intent: str = ""
     task_type: TaskType = TaskType.UNKNOWN
     documents: List[str] = []
+    collection_name: str = ""
     raw_response: str = ""
     
     # 최종 결과
@@ -52,6 +60,8 @@ class WorkflowState(BaseModel):
 class FlowMateWorkflow:
     def __init__(self):
         self.llm = get_llm(tokens=2048)
+        # map 단계 부분 요약용 (짧은 출력)
+        self.map_llm = get_llm(tokens=get_setting("SUMMARY_MAP_TOKENS", 512))
     
     def execute(self, state: WorkflowState) -> WorkflowState:
         """간소화된 순차 실행"""
@@ -100,19 +110,7 @@ class FlowMateWorkflow:
             # Intent classifier 사용
             check_intents = check_intent(state.query)
             result = self.llm.invoke(check_intents.format_messages(query=state.query))
-            state.intent = normalize_label(result.content)
-            
-            # TaskType 매핑
-            if "[보고서]" in state.intent:
-                state.task_type = TaskType.REPORT
-            elif "[발표]" in state.intent:
-                state.task_type = TaskType.PRESENTATION
-            elif "[요약]" in state.intent:
-                state.task_type = TaskType.SUMMARY
-            else:
-                state.task_type = TaskType.QA
-                
-            print(f"[의도 분류] {state.intent} -> {state.task_type}")
+            self._apply_intent(state, result.content)
             
         except Exception as e:
             state.error_message = f"의도 분류 실패: {str(e)}"
@@ -120,16 +118,34 @@ class FlowMateWorkflow:
             
         return state
     
-    def retrieve_documents(self, state: WorkflowState) -> WorkflowState:
+    def _apply_intent(self, state: WorkflowState, content: str):
+        """분류 결과 라벨을 TaskType으로 매핑"""
+        state.intent = normalize_label(content)
+        
+        # TaskType 매핑
+        if "[보고서]" in state.intent:
+            state.task_type = TaskType.REPORT
+        elif "[발표]" in state.intent:
+            state.task_type = TaskType.PRESENTATION
+        elif "[요약]" in state.intent:
+            state.task_type = TaskType.SUMMARY
+        else:
+            state.task_type = TaskType.QA
+            
+        print(f"[의도 분류] {state.intent} -> {state.task_type}")
+    
+    def retrieve_documents(self, state: WorkflowState, query_vector=None) -> WorkflowState:
         """문서 검색 및 벡터 스토어 활용"""
         try:
             vector_store = data_to_vectorstore(state.file_path)
             if vector_store:
-                # 태스크별 검색 문서 수 조정
-                k = 1000 if state.task_type in [TaskType.REPORT, TaskType.PRESENTATION] else 500
-                docs = vector_store.similarity_search(state.query, k=k)
+                # 태스크별 토큰 예산 안에서 점수 높은 청크를 원문 순서로 구성
+                budget = get_context_budget(state.task_type.value)
+                candidates = hybrid_search(vector_store, state.query, k=get_candidate_count(budget), query_vector=query_vector)
+                docs = pack_context(candidates, budget)
                 state.documents = [doc.page_content for doc in docs]
-                print(f"[문서 검색] {len(state.documents)}개 문서 검색됨")
+                state.collection_name = vector_store.collection_name
+                print(f"[문서 검색] 후보 {len(candidates)}개 중 {len(state.documents)}개 선택 (예산 {budget} 토큰)")
             else:
                 # 폴백: 직접 파일 읽기
                 with open(state.file_path, 'r', encoding='utf-8') as f:
@@ -142,15 +158,36 @@ class FlowMateWorkflow:
         return state
     
     
-    def generate_report(self, state: WorkflowState) -> WorkflowState:
-        """보고서 생성"""
-        try:
-            system_prompt = self._get_korean_system_prompt()
-            user_prompt = f"""
+    def _get_whole_document_texts(self, state: WorkflowState) -> List[str]:
+        """
+        요약/보고서용 원문 구성
+        전체 문서가 토큰 예산 안이면 원문 전체를, 넘으면 map-reduce 부분 요약을 사용
+        같은 문서(파일 해시 + 청크 수)면 캐시된 결과를 사용하고 컬렉션을 다시 읽지 않음
+        """
+        if not state.collection_name:
+            return state.documents
+        vector_store = data_to_vectorstore(state.file_path)
+        if vector_store is None:
+            return state.documents
+
+        budget = get_context_budget(state.task_type.value)
+        return summarize_document(
+            self.map_llm,
+            lambda: (doc.page_content for doc in iter_all_documents(vector_store)),
+            state.collection_name,
+            budget,
+            get_document_key(vector_store, state.file_path),
+        )
+    
+    def _report_messages(self, state: WorkflowState) -> list:
+        """보고서 생성 프롬프트"""
+        system_prompt = self._get_korean_system_prompt()
+        source_texts = self._get_whole_document_texts(state)
+        user_prompt = f"""
 아래 문서 내용을 기반으로 전문적인 보고서를 마크다운 형식으로 작성해주세요.
 
 문서 내용:
-{chr(10).join(state.documents)}
+{chr(10).join(source_texts)}
 
 사용자 요청: {state.query}
 
@@ -161,22 +198,12 @@ class FlowMateWorkflow:
 4. 주요 내용 (섹션별)
 5. 결론 및 권고사항
 """
-            
-            messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
-            response = self.llm.invoke(messages)
-            state.raw_response = response.content
-            print("[보고서 생성] 완료")
-            
-        except Exception as e:
-            state.error_message = f"보고서 생성 실패: {str(e)}"
-            
-        return state
+        return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
     
-    def generate_presentation(self, state: WorkflowState) -> WorkflowState:
-        """발표자료 생성"""
-        try:
-            system_prompt = self._get_korean_system_prompt()
-            user_prompt = f"""
+    def _presentation_messages(self, state: WorkflowState) -> list:
+        """발표자료 생성 프롬프트"""
+        system_prompt = self._get_korean_system_prompt()
+        user_prompt = f"""
 아래 문서 내용을 기반으로 PPT 슬라이드 구성을 작성해주세요.
 
 문서 내용:
@@ -197,51 +224,32 @@ class FlowMateWorkflow:
 - 포인트 1
 - 포인트 2
 """
-            
-            messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
-            response = self.llm.invoke(messages)
-            state.raw_response = response.content
-            print("[발표자료 생성] 완료")
-            
-        except Exception as e:
-            state.error_message = f"발표자료 생성 실패: {str(e)}"
-            
-        return state
+        return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
     
-    def generate_summary(self, state: WorkflowState) -> WorkflowState:
-        """요약 생성"""
-        try:
-            system_prompt = self._get_korean_system_prompt()
-            user_prompt = f"""
+    def _summary_messages(self, state: WorkflowState) -> list:
+        """요약 생성 프롬프트"""
+        system_prompt = self._get_korean_system_prompt()
+        source_texts = self._get_whole_document_texts(state)
+        user_prompt = f"""
 아래 문서 내용을 체계적으로 요약해주세요.
 
 문서 내용:
-{chr(10).join(state.documents)}
+{chr(10).join(source_texts)}
 
 사용자 요청: {state.query}
 """
-            
-            messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
-            response = self.llm.invoke(messages)
-            state.raw_response = response.content
-            print("[요약 생성] 완료")
-            
-        except Exception as e:
-            state.error_message = f"요약 생성 실패: {str(e)}"
-            
-        return state
+        return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
     
-    def generate_qa_response(self, state: WorkflowState) -> WorkflowState:
-        """질의응답 생성"""
-        try:
-            system_prompt = self._get_korean_system_prompt()
-            
-            # 메모리 히스토리 포함
-            history = ""
-            if state.memory:
-                history = state.memory.get_formatted_history()
-            
-            user_prompt = f"""
+    def _qa_messages(self, state: WorkflowState) -> list:
+        """질의응답 생성 프롬프트"""
+        system_prompt = self._get_korean_system_prompt()
+        
+        # 메모리 히스토리 포함
+        history = ""
+        if state.memory:
+            history = state.memory.get_formatted_history()
+        
+        user_prompt = f"""
 이전 대화:
 {history}
 
@@ -252,14 +260,152 @@ class FlowMateWorkflow:
 
 위 문서를 참고하여 사용자의 질문에 정확하고 친절하게 답변해주세요.
 """
-            
-            messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
-            response = self.llm.invoke(messages)
+        return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
+    
+    def build_generation_messages(self, state: WorkflowState) -> tuple:
+        """태스크별 (생성 프롬프트, 작업 이름) 반환"""
+        if state.task_type == TaskType.REPORT:
+            return self._report_messages(state), "보고서"
+        elif state.task_type == TaskType.PRESENTATION:
+            return self._presentation_messages(state), "발표자료"
+        elif state.task_type == TaskType.SUMMARY:
+            return self._summary_messages(state), "요약"
+        else:
+            return self._qa_messages(state), "질의응답"
+    
+    def _generate(self, state: WorkflowState, messages_builder, label: str) -> WorkflowState:
+        """프롬프트 생성 → LLM 호출 공통 처리"""
+        try:
+            response = self.llm.invoke(messages_builder(state))
             state.raw_response = response.content
-            print("[질의응답 생성] 완료")
+            print(f"[{label} 생성] 완료")
+            
+        except Exception as e:
+            state.error_message = f"{label} 생성 실패: {str(e)}"
+            
+        return state
+    
+    def generate_report(self, state: WorkflowState) -> WorkflowState:
+        """보고서 생성"""
+        return self._generate(state, self._report_messages, "보고서")
+    
+    def generate_presentation(self, state: WorkflowState) -> WorkflowState:
+        """발표자료 생성"""
+        return self._generate(state, self._presentation_messages, "발표자료")
+    
+    def generate_summary(self, state: WorkflowState) -> WorkflowState:
+        """요약 생성"""
+        return self._generate(state, self._summary_messages, "요약")
+    
+    def generate_qa_response(self, state: WorkflowState) -> WorkflowState:
+        """질의응답 생성"""
+        return self._generate(state, self._qa_messages, "질의응답")
+    
+    def execute_stream(self, state: WorkflowState):
+        """
+        스트리밍 실행: 진행 상태와 LLM 토큰을 이벤트(dict)로 순서대로 반환
+        마지막 이벤트는 {"type": "done", "state": 최종 상태}
+        """
+        try:
+            state = self.classify_intent(state)
+            if state.error_message:
+                yield {"type": "done", "state": self.handle_error(state)}
+                return
+            yield {"type": "status", "stage": "intent", "task_type": state.task_type.value}
+            
+            state = self.retrieve_documents(state)
+            if state.error_message:
+                yield {"type": "done", "state": self.handle_error(state)}
+                return
+            yield {"type": "status", "stage": "retrieve", "documents": len(state.documents)}
+            
+            messages, label = self.build_generation_messages(state)
+            yield {"type": "status", "stage": "generate", "task": label}
+            
+            parts = []
+            for chunk in self.llm.stream(messages):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            state.raw_response = "".join(parts)
+            print(f"[{label} 스트리밍 생성] 완료")
+            
+            state = self.check_quality(state)
+            if state.error_message:
+                yield {"type": "done", "state": self.handle_error(state)}
+                return
+            
+            if state.task_type in [TaskType.REPORT, TaskType.PRESENTATION]:
+                state = self.create_output_file(state)
+                if state.error_message:
+                    state = self.handle_error(state)
+            
+            yield {"type": "done", "state": state}
             
         except Exception as e:
-            state.error_message = f"질의응답 생성 실패: {str(e)}"
+            state.error_message = f"워크플로우 실행 오류: {str(e)}"
+            yield {"type": "done", "state": self.handle_error(state)}
+    
+    async def aexecute(self, state: WorkflowState) -> WorkflowState:
+        """
+        비동기 실행 (ASGI용)
+        Ollama 호출은 비동기 클라이언트로 기다리고, 블로킹 라이브러리(Qdrant 검색, 파일 생성)는
+        스레드에서 실행하여 이벤트 루프를 막지 않음
+        """
+        to_thread = lambda func: sync_to_async(func, thread_sensitive=False)
+        try:
+            # 1. 의도 분류
+            state = await self.aclassify_intent(state)
+            if state.error_message:
+                return self.handle_error(state)
+            
+            # 2. 문서 검색 (질의 임베딩은 비동기, 검색은 스레드)
+            try:
+                query_vector = await aembed_query_cached(state.query)
+            except Exception as e:
+                print(f"[질의 임베딩 실패: {e}] - 검색 단계에서 재시도")
+                query_vector = None
+            state = await to_thread(self.retrieve_documents)(state, query_vector)
+            if state.error_message:
+                return self.handle_error(state)
+            
+            # 3. 태스크별 생성
+            try:
+                messages, label = await to_thread(self.build_generation_messages)(state)
+                async with get_llm_semaphore():
+                    response = await self.llm.ainvoke(messages)
+                state.raw_response = response.content
+                print(f"[{label} 생성] 완료")
+            except Exception as e:
+                state.error_message = f"응답 생성 실패: {str(e)}"
+                return self.handle_error(state)
+            
+            # 4. 품질 검증 (번역 시 LLM 호출 포함)
+            state = await to_thread(self.check_quality)(state)
+            if state.error_message:
+                return self.handle_error(state)
+            
+            # 5. 파일 생성 (필요한 경우)
+            if state.task_type in [TaskType.REPORT, TaskType.PRESENTATION]:
+                state = await to_thread(self.create_output_file)(state)
+            
+            return state
+            
+        except Exception as e:
+            state.error_message = f"워크플로우 실행 오류: {str(e)}"
+            return self.handle_error(state)
+    
+    async def aclassify_intent(self, state: WorkflowState) -> WorkflowState:
+        """의도 분류 (비동기)"""
+        try:
+            check_intents = check_intent(state.query)
+            async with get_llm_semaphore():
+                result = await self.llm.ainvoke(check_intents.format_messages(query=state.query))
+            self._apply_intent(state, result.content)
+            
+        except Exception as e:
+            state.error_message = f"의도 분류 실패: {str(e)}"
+            state.task_type = TaskType.UNKNOWN
             
         return state
     
@@ -328,6 +474,18 @@ ONLY Korean language allowed. Chinese/English/Japanese strictly forbidden.
 # 전역 워크플로우 인스턴스
 _workflow_instance = None
 
+# 이벤트 루프별 LLM 동시 호출 제한 (모델 서버 처리 용량 기준)
+_llm_semaphores = weakref.WeakKeyDictionary()
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """현재 이벤트 루프의 LLM 동시 호출 세마포어"""
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(get_setting("LLM_MAX_CONCURRENCY", 4))
+        _llm_semaphores[loop] = semaphore
+    return semaphore
+
 def get_workflow():
     """워크플로우 싱글톤 인스턴스"""
     global _workflow_instance
@@ -354,4 +512,42 @@ def execute_workflow(query: str, file_path: str, memory: BufferMemory = None) ->
     if result.success and result.task_type == TaskType.QA and memory:
         memory.append(query, result.final_response)
     
-    return result
\ No newline at end of file
+    return result
+
+
+async def aexecute_workflow(query: str, file_path: str, memory: BufferMemory = None) -> WorkflowState:
+    """워크플로우 비동기 실행"""
+    workflow = get_workflow()
+    
+    initial_state = WorkflowState(
+        query=query,
+        file_path=file_path,
+        memory=memory or BufferMemory()
+    )
+    
+    result = await workflow.aexecute(initial_state)
+    
+    # 메모리 업데이트 (QA의 경우)
+    if result.success and result.task_type == TaskType.QA and memory:
+        memory.append(query, result.final_response)
+    
+    return result
+
+
+def execute_workflow_stream(query: str, file_path: str, memory: BufferMemory = None):
+    """워크플로우 스트리밍 실행 (이벤트 제너레이터)"""
+    workflow = get_workflow()
+    
+    initial_state = WorkflowState(
+        query=query,
+        file_path=file_path,
+        memory=memory or BufferMemory()
+    )
+    
+    for event in workflow.execute_stream(initial_state):
+        if event["type"] == "done":
+            result = event["state"]
+            # 메모리 업데이트 (QA의 경우)
+            if result.success and result.task_type == TaskType.QA and memory:
+                memory.append(query, result.final_response)
+        yield event
@@ -1,13 +1,13 @@
-from utils.chunk_utils import get_adaptive_splitter
+from utils.chunk_utils import iter_split_segments, get_chunk_length_report
 from utils.extracting_docx import extract_docx_content
 from utils.extracting_img import analyze_image_with_qwen
-from utils.extracting_pdf import extract_pdf_all_in_order_as_string
+from utils.extracting_pdf import extract_pdf_all_in_order_as_string, iter_pdf_segments
 from utils.extracting_pptx import pptx_to_markdown_string
 from langchain_core.documents import Document
-from utils.extracting_xlsx import extract_xlsx_content
-from utils.extracting_csv import extract_csv_content
-from utils.extracting_txt import extract_txt_content
-from utils.video_processor import transcribe_audio, extract_audio
+from utils.extracting_xlsx import extract_xlsx_content, iter_xlsx_segments
+from utils.extracting_csv import extract_csv_content, iter_csv_segments
+from utils.extracting_txt import extract_txt_content, iter_txt_segments
+from utils.video_processor import transcribe_audio, extracted_audio, iter_transcript_segments
 
 def start_extracting(file_path: str) -> str:
     """
@@ -32,26 +32,54 @@ def start_extracting(file_path: str) -> str:
     elif ext in ["wav","mp3"] :
         return transcribe_audio(file_path)
     elif ext in ["mp4"] :
-        audio = extract_audio(file_path)
-        return transcribe_audio(audio)
+        with extracted_audio(file_path) as audio:
+            return transcribe_audio(audio)
     else:
         raise ValueError(f"지원하지 않는 파일 형식입니다: {ext}")
 
+def iter_extracted_segments(file_path: str):
+    """
+    start_extracting의 스트리밍 버전: 페이지/시트/행 블록 단위 텍스트 조각을 순서대로 반환
+    조각을 이어 붙이면 전체 텍스트가 되며, 조각 단위 추출을 지원하지 않는 형식은 전체를 한 조각으로 반환
+    """
+    ext = file_path.split('.')[-1].lower()
+    if ext == 'pdf':
+        yield from iter_pdf_segments(file_path)
+    elif ext in ['xlsx', 'xls']:
+        yield from iter_xlsx_segments(file_path)
+    elif ext == 'txt':
+        yield from iter_txt_segments(file_path)
+    elif ext == 'csv' :
+        yield from iter_csv_segments(file_path)
+    elif ext in ["wav","mp3"] :
+        yield from iter_transcript_segments(file_path)
+    elif ext in ["mp4"] :
+        with extracted_audio(file_path) as audio:
+            yield from iter_transcript_segments(audio)
+    else:
+        yield start_extracting(file_path)
+
+def iter_chunks(file_path: str):
+    """
+    추출 → 청킹 스트리밍: 앞부분 청크는 뒷페이지를 파싱하는 동안 바로 임베딩 단계로 전달
+    LangChain Document를 하나씩 반환 (order는 0부터 연속)
+    """
+    print("text_추출시작")
+    token_counts = []
+    for idx, (chunk, extra) in enumerate(iter_split_segments(iter_extracted_segments(file_path))):
+        metadata = {"source": file_path, "type": "body", "order": idx }
+        metadata.update(extra)
+        token_counts.append(extra["tokens"])
+        yield Document(page_content=chunk, metadata=metadata)
+    print("chunks split 끝")
+    print(f"[청크 토큰 분포] {get_chunk_length_report(token_counts)}")
+
 def split_chunks(file_path: str) -> list:
     """
     문서에서 추출한 전체 텍스트를 의미 있는 청크 단위로 나눈 결과
     LangChain Document 리스트로 반환
     """
-    print("text_추출시작")
-    whole_text = start_extracting(file_path)
-    text_splitter = get_adaptive_splitter(whole_text)
-    chunks = text_splitter.split_text(whole_text)
-    print("chunks split 끝")
-    result = []
-    print("Document 객체화")
-    for idx, chunk in enumerate(chunks) :
-        result.append(Document(page_content=chunk, metadata={"source": file_path, "type": "body", "order": idx }))
-    return result
+    return list(iter_chunks(file_path))
 
 
 
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import PresentationAnalysisJob
 
-# Register your models here.
+
+@admin.register(PresentationAnalysisJob)
+class PresentationAnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ['video_path', 'user', 'status', 'stage', 'progress', 'worker', 'attempts', 'heartbeat_date', 'created_date', 'completed_date']
+    list_filter = ['status', 'created_date']
+    search_fields = ['video_path', 'video_hash', 'error_message']
+    readonly_fields = ['video_hash', 'stage_timings', 'result', 'created_date', 'started_date', 'completed_date']
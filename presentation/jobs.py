@@ -0,0 +1,104 @@
+import time
+import traceback
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from utils.config import get_setting
+from utils.job_worker import get_active_job_filter, reap_stale_jobs, start_heartbeat
+
+
+def enqueue_analysis(video_path: str, user=None):
+    """
+    발표 영상 분석 작업 등록, (작업, 재사용 여부) 반환
+    같은 사용자가 같은 내용의 영상을 이미 분석했거나 분석 중이면 새로 등록하지 않고 그 작업을 반환
+    (다른 사용자의 작업/결과, 워커가 죽어 하트비트가 끊긴 작업은 재사용하지 않음)
+    """
+    from presentation.models import PresentationAnalysisJob
+    from vectordb_upload_search import get_file_hash
+
+    video_hash = get_file_hash(video_path)
+    if user is not None and not user.is_authenticated:
+        user = None
+    if user is not None:
+        active = get_active_job_filter(get_setting("JOB_STALE_SECONDS", 120))
+        existing = PresentationAnalysisJob.objects.filter(user=user, video_hash=video_hash).filter(
+            Q(status='completed') | active
+        ).order_by('-created_date').first()
+        if existing is not None:
+            return existing, True
+
+    job = PresentationAnalysisJob.objects.create(user=user, video_path=video_path, video_hash=video_hash)
+    return job, False
+
+
+def claim_next_job(worker_name: str):
+    """
+    대기 중인 가장 오래된 작업을 원자적으로 가져오기 (다른 워커와 중복 처리 방지)
+    먼저 하트비트가 끊긴 처리 중 작업을 다시 대기열로 돌리거나 실패 처리
+    """
+    from presentation.models import PresentationAnalysisJob
+
+    reap_stale_jobs(
+        PresentationAnalysisJob, get_setting("JOB_STALE_SECONDS", 120), get_setting("JOB_MAX_ATTEMPTS", 2)
+    )
+    with transaction.atomic():
+        job = PresentationAnalysisJob.objects.filter(status='queued').order_by('created_date').first()
+        if job is None:
+            return None
+        claimed = PresentationAnalysisJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', worker=worker_name, started_date=timezone.now(),
+            heartbeat_date=timezone.now(), attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_analysis_job(job):
+    """작업 하나 처리: 분석 파이프라인 실행, 단계별 진행률/소요 시간은 DB에 기록"""
+    from presentation.models import PresentationAnalysisJob
+    from utils.run_feedback_pipeline import run_feedback_pipeline
+
+    started = {}
+    timings = {}
+
+    def on_progress(stage, status, done, total):
+        if status == "started":
+            started[stage] = time.perf_counter()
+        elif stage in started:
+            timings[stage] = round(time.perf_counter() - started[stage], 2)
+        try:
+            job.update_progress(stage, done / total, stage_timings=dict(timings))
+        except Exception as e:
+            # 진행률 저장 실패(DB 잠금 등)로 분석 자체가 실패하지 않도록 출력만 함
+            print(f"[발표 분석 진행률 저장 실패] #{job.pk} {stage}: {e}")
+
+    print(f"[발표 분석 작업 시작] #{job.pk} {job.video_path}")
+    stop_heartbeat = start_heartbeat(
+        lambda: PresentationAnalysisJob.objects.filter(pk=job.pk).update(heartbeat_date=timezone.now()),
+        get_setting("JOB_HEARTBEAT_SECONDS", 15),
+    )
+    try:
+        result = run_feedback_pipeline(job.video_path, on_progress=on_progress)
+        if result is None:
+            job.mark_failed("영상 파일이 존재하지 않습니다.")
+        else:
+            job.mark_completed(result)
+        print(f"[발표 분석 작업 종료] #{job.pk} {job.status}")
+    except Exception as e:
+        traceback.print_exc()
+        job.mark_failed(str(e))
+    finally:
+        stop_heartbeat()
+
+
+def analysis_worker_main(index: int, poll_interval: float = 2.0):
+    """워커 프로세스 진입점"""
+    from chatbot.jobs import setup_django
+    from utils.job_worker import get_worker_name, poll_jobs
+
+    setup_django()
+    worker_name = get_worker_name("presentation", index)
+    print(f"[발표 분석 워커 시작] {worker_name}")
+    poll_jobs(claim_next_job, run_analysis_job, worker_name, poll_interval=poll_interval)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from presentation.jobs import analysis_worker_main
+from utils.job_worker import run_worker_pool
+
+
+class Command(BaseCommand):
+    help = "발표 영상 분석 작업 큐를 처리하는 워커 프로세스 실행"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="워커 프로세스 수 (프로세스마다 Whisper/MediaPipe 모델 로드)")
+
+    def handle(self, *args, **options):
+        run_worker_pool(analysis_worker_main, options["workers"])
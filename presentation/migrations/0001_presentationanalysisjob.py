@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PresentationAnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_path', models.CharField(max_length=500, verbose_name='영상 경로')),
+                ('video_hash', models.CharField(db_index=True, max_length=64, verbose_name='영상 내용 해시')),
+                ('status', models.CharField(choices=[('queued', '대기 중'), ('running', '분석 중'), ('completed', '완료'), ('failed', '실패')], db_index=True, default='queued', max_length=15)),
+                ('progress', models.FloatField(default=0.0, verbose_name='진행률(0~1)')),
+                ('stage', models.CharField(blank=True, default='', max_length=50, verbose_name='처리 단계')),
+                ('stage_timings', models.JSONField(blank=True, default=dict, verbose_name='단계별 소요 시간(초)')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='분석 결과')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='오류 내용')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='처리 워커')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='등록 시간')),
+                ('started_date', models.DateTimeField(blank=True, null=True, verbose_name='시작 시간')),
+                ('completed_date', models.DateTimeField(blank=True, null=True, verbose_name='완료 시간')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='presentation_jobs', to=settings.AUTH_USER_MODEL, verbose_name='요청 사용자')),
+            ],
+            options={
+                'verbose_name': '발표 분석 작업',
+                'verbose_name_plural': '발표 분석 작업들',
+                'ordering': ['created_date'],
+            },
+        ),
+    ]
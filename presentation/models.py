@@ -1,3 +1,76 @@
 from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+import os
 
-# Create your models here.
+
+class PresentationAnalysisJob(models.Model):
+    """발표 영상 분석 작업 큐 (워커 프로세스가 DB에서 가져가 처리, 결과는 저장하여 재사용)"""
+
+    STATUS_CHOICES = [
+        ('queued', '대기 중'),
+        ('running', '분석 중'),
+        ('completed', '완료'),
+        ('failed', '실패'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='presentation_jobs',
+        verbose_name="요청 사용자"
+    )
+    video_path = models.CharField(max_length=500, verbose_name="영상 경로")
+    video_hash = models.CharField(max_length=64, db_index=True, verbose_name="영상 내용 해시")
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='queued', db_index=True)
+    progress = models.FloatField(default=0.0, verbose_name="진행률(0~1)")
+    stage = models.CharField(max_length=50, blank=True, default="", verbose_name="처리 단계")
+    stage_timings = models.JSONField(default=dict, blank=True, verbose_name="단계별 소요 시간(초)")
+    result = models.JSONField(null=True, blank=True, verbose_name="분석 결과")
+    error_message = models.TextField(blank=True, null=True, verbose_name="오류 내용")
+    worker = models.CharField(max_length=100, blank=True, default="", verbose_name="처리 워커")
+    attempts = models.IntegerField(default=0, verbose_name="처리 시도 횟수")
+    heartbeat_date = models.DateTimeField(null=True, blank=True, verbose_name="마지막 워커 응답")
+    created_date = models.DateTimeField(default=timezone.now, verbose_name="등록 시간")
+    started_date = models.DateTimeField(null=True, blank=True, verbose_name="시작 시간")
+    completed_date = models.DateTimeField(null=True, blank=True, verbose_name="완료 시간")
+
+    class Meta:
+        verbose_name = "발표 분석 작업"
+        verbose_name_plural = "발표 분석 작업들"
+        ordering = ['created_date']
+
+    def __str__(self):
+        return f"{os.path.basename(self.video_path)} - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    def update_progress(self, stage, progress, stage_timings=None):
+        """진행 단계/진행률 갱신"""
+        self.stage = stage
+        self.progress = round(progress, 3)
+        update_fields = ['stage', 'progress']
+        if stage_timings is not None:
+            self.stage_timings = stage_timings
+            update_fields.append('stage_timings')
+        self.save(update_fields=update_fields)
+
+    def mark_completed(self, result):
+        """분석 완료 처리 (결과와 단계별 소요 시간 저장)"""
+        self.status = 'completed'
+        self.progress = 1.0
+        self.result = result
+        self.stage_timings = result.get("timings", {})
+        self.completed_date = timezone.now()
+        self.save(update_fields=['status', 'progress', 'result', 'stage_timings', 'completed_date'])
+
+    def mark_failed(self, error_message):
+        """분석 실패 처리"""
+        self.status = 'failed'
+        self.error_message = error_message
+        self.completed_date = timezone.now()
+        self.save(update_fields=['status', 'error_message', 'completed_date'])
@@ -1,3 +1,195 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from presentation.models import PresentationAnalysisJob
+from utils import video_processor
+from utils.run_feedback_pipeline import run_stage_graph
+
+
+class StageGraphTests(SimpleTestCase):
+    def test_dependencies_receive_results_in_order(self):
+        stages = {
+            "a": ((), lambda: 2),
+            "b": ((), lambda: 3),
+            "sum": (("a", "b"), lambda a, b: a * 10 + b),
+        }
+        results, timings = run_stage_graph(stages)
+
+        self.assertEqual(results, {"a": 2, "b": 3, "sum": 23})
+        self.assertEqual(set(timings), set(stages))
+
+    def test_independent_stages_run_concurrently(self):
+        # 두 단계가 동시에 실행되지 않으면 barrier 대기 시간 초과로 실패
+        barrier = threading.Barrier(2, timeout=5)
+        stages = {
+            "left": ((), lambda: barrier.wait() is not None),
+            "right": ((), lambda: barrier.wait() is not None),
+        }
+        results, _ = run_stage_graph(stages)
+        self.assertEqual(results, {"left": True, "right": True})
+
+    def test_failure_waits_for_running_stages_and_skips_dependents(self):
+        slow_started = threading.Event()
+        slow_finished = threading.Event()
+        calls = []
+        events = []
+
+        def slow():
+            slow_started.set()
+            time.sleep(0.2)
+            slow_finished.set()
+            return "slow"
+
+        def bad():
+            slow_started.wait(5)
+            raise RuntimeError("분석 실패")
+
+        stages = {
+            "slow": ((), slow),
+            "bad": ((), bad),
+            "after_slow": (("slow",), lambda value: calls.append(value)),
+            "after_bad": (("bad",), lambda value: calls.append(value)),
+        }
+        with self.assertRaisesMessage(RuntimeError, "분석 실패"):
+            run_stage_graph(stages, on_stage=lambda name, status, elapsed: events.append((name, status)))
+
+        # 실행 중이던 단계는 끝까지 실행되고, 아직 시작하지 않은 단계는 실행하지 않음
+        self.assertTrue(slow_finished.is_set())
+        self.assertEqual(calls, [])
+        self.assertIn(("bad", "failed"), events)
+        self.assertNotIn(("after_slow", "started"), events)
+        self.assertNotIn(("after_bad", "started"), events)
+
+    def test_progress_callback_errors_do_not_fail_stages(self):
+        def on_stage(name, status, elapsed):
+            raise RuntimeError("진행률 저장 실패")
+
+        results, _ = run_stage_graph({"a": ((), lambda: 1), "b": (("a",), lambda a: a + 1)}, on_stage=on_stage)
+        self.assertEqual(results, {"a": 1, "b": 2})
+
+    def test_unresolvable_dependency_raises(self):
+        with self.assertRaises(ValueError):
+            run_stage_graph({"a": (("missing",), lambda value: value)})
+
+
+class AnalysisApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("presenter", password="pw")
+        self.client = Client(enforce_csrf_checks=True)
+        video = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        video.write(b"fake video")
+        video.close()
+        self.addCleanup(os.remove, video.name)
+        self.video_path = video.name
+
+    def analyze(self, **extra):
+        return self.client.post(
+            "/presentation/analyze/", json.dumps({"video_path": self.video_path}),
+            content_type="application/json", **extra,
+        )
+
+    def test_anonymous_requests_get_401_json(self):
+        anonymous = Client()
+        for response in [
+            anonymous.post("/presentation/analyze/", "{}", content_type="application/json"),
+            anonymous.get("/presentation/jobs/1/"),
+            anonymous.get("/presentation/jobs/1/stream/"),
+        ]:
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()["success"], False)
+
+    def test_analyze_requires_csrf_token(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.analyze().status_code, 403)
+        self.assertFalse(PresentationAnalysisJob.objects.exists())
+
+    def test_analyze_with_token_enqueues_once(self):
+        self.client.force_login(self.user)
+        self.client.get("/presentation/")
+        token = self.client.cookies["csrftoken"].value
+
+        first = self.analyze(HTTP_X_CSRFTOKEN=token).json()
+        second = self.analyze(HTTP_X_CSRFTOKEN=token).json()
+        self.assertEqual((first["success"], first["reused"], first["status"]), (True, False, "queued"))
+        self.assertEqual((second["job_id"], second["reused"]), (first["job_id"], True))
+        self.assertEqual(self.client.get(first["status_url"]).json()["job_id"], first["job_id"])
+
+
+class FakeWhisperModel:
+    """장치별로 생성/인식 동작을 바꿀 수 있는 WhisperModel 대역"""
+    created = []
+    broken_devices = set()
+    fail_after_first_segment = set()
+
+    def __init__(self, model_size, device, compute_type, **kwargs):
+        self.device = device
+        self.compute_type = compute_type
+        FakeWhisperModel.created.append((model_size, device, compute_type))
+
+    def transcribe(self, audio, language=None, **kwargs):
+        if self.device in self.broken_devices:
+            raise RuntimeError("libcudnn not found")
+
+        def segments():
+            yield SimpleNamespace(start=0.0, end=2.0, text=f"{self.device} 첫 문장")
+            # 시험 인식(무음 배열)은 통과하고 실제 파일 인식 도중에만 실패
+            if self.device in self.fail_after_first_segment and isinstance(audio, str):
+                raise RuntimeError("CUDA out of memory")
+            yield SimpleNamespace(start=2.0, end=3.0, text=f"{self.device} 둘째 문장")
+        return segments(), None
+
+
+@override_settings(WHISPER_MODEL_SIZE="tiny", WHISPER_COMPUTE_TYPE="float16")
+class WhisperModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        FakeWhisperModel.created = []
+        FakeWhisperModel.broken_devices = set()
+        FakeWhisperModel.fail_after_first_segment = set()
+        for name, value in [
+            ("WhisperModel", FakeWhisperModel),
+            ("_whisper_registry", {}),
+            ("_cuda_failed", False),
+        ]:
+            patcher = mock.patch.object(video_processor, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(WHISPER_DEVICE="cpu")
+    def test_model_is_loaded_once_per_process(self):
+        first = video_processor.get_whisper_model()
+        self.assertIs(video_processor.get_whisper_model(), first)
+        self.assertEqual(FakeWhisperModel.created, [("tiny", "cpu", "float16")])
+
+    @override_settings(WHISPER_DEVICE="cuda")
+    def test_cuda_failure_at_first_inference_falls_back_to_cpu_int8(self):
+        FakeWhisperModel.broken_devices = {"cuda"}
+        model = video_processor.get_whisper_model()
+
+        self.assertEqual((model.device, model.compute_type), ("cpu", "int8"))
+        self.assertEqual(FakeWhisperModel.created, [("tiny", "cuda", "float16"), ("tiny", "cpu", "int8")])
+        self.assertEqual(video_processor.get_whisper_device(), "cpu")
+        self.assertIs(video_processor.get_whisper_model(), model)
+
+    @override_settings(WHISPER_DEVICE="cuda")
+    def test_cuda_failure_mid_transcription_resumes_on_cpu(self):
+        FakeWhisperModel.fail_after_first_segment = {"cuda"}
+        audio = np.zeros(video_processor.STT_SAMPLE_RATE * 5, dtype=np.float32)
+        with mock.patch.object(video_processor, "decode_audio", return_value=audio) as decode:
+            segments = list(video_processor.iter_transcript_segments("talk.wav"))
+
+        self.assertEqual(
+            [(segment.start, segment.end, segment.text) for segment in segments],
+            [(0.0, 2.0, "cuda 첫 문장"), (2.0, 4.0, "cpu 첫 문장"), (4.0, 5.0, "cpu 둘째 문장")],
+        )
+        decode.assert_called_once()
+        self.assertEqual(video_processor.get_whisper_device(), "cpu")
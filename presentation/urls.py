@@ -4,5 +4,7 @@ from presentation import views
 urlpatterns = [
     path('', views.presentation, name='presentation'),
     path('upload/', views.upload_video, name='upload_video'),  # 업로드 API 추가
-    path('analyze/', views.analyze_video, name='analyze_video'),  # 분석 API 추가
-]
\ No newline at end of file
+    path('analyze/', views.analyze_video, name='analyze_video'),  # 분석 작업 등록 API
+    path('jobs/<int:job_id>/', views.analysis_status, name='analysis_status'),  # 분석 진행 상황/결과 조회
+    path('jobs/<int:job_id>/stream/', views.analysis_stream, name='analysis_stream'),  # 분석 진행 상황 SSE
+]
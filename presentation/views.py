@@ -1,12 +1,46 @@
 from django.shortcuts import render
 from django.conf import settings
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from utils.run_feedback_pipeline import run_feedback_pipeline
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from asgiref.sync import sync_to_async
+from presentation.jobs import enqueue_analysis
+from presentation.models import PresentationAnalysisJob
+from utils.config import get_setting
+from utils.run_feedback_pipeline import STAGE_LABELS
+from functools import wraps
 import traceback
+import asyncio
+import json
 import os
 
+# SSE 스트림에서 작업 상태를 다시 조회하는 간격(초)
+STREAM_POLL_INTERVAL = 1.0
+
+
+def api_login_required(view):
+    """
+    XHR/SSE API용 login_required: 로그인 페이지로 리다이렉트(302)하지 않고 401 JSON 반환
+    (fetch/EventSource는 리다이렉트된 로그인 페이지 HTML을 응답으로 받게 되므로)
+    """
+    def unauthorized():
+        return JsonResponse({"success": False, "error": "로그인이 필요합니다."}, status=401)
+
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            user = await request.auser()
+            if not user.is_authenticated:
+                return unauthorized()
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return unauthorized()
+        return view(request, *args, **kwargs)
+    return wrapper
+
 @login_required
 def presentation(request):
     return render(request, 'presentation/analysis.html')
@@ -48,30 +82,108 @@ def upload_video(request):
             "error": "No video file uploaded"
         }, status=400)
 
-@csrf_exempt  # (개발 단계에서만. 실제 서비스 시 CSRF 처리 필수!)
+def build_job_payload(job) -> dict:
+    """분석 작업 상태 (완료된 작업이면 저장된 분석 결과 포함)"""
+    payload = {
+        "job_id": job.pk,
+        "status": job.status,
+        "stage": job.stage,
+        "stage_label": STAGE_LABELS.get(job.stage, ""),
+        "progress": round(job.progress, 3),
+        "timings": job.stage_timings,
+        "error": job.error_message or None,
+    }
+    if job.status == 'completed' and job.result:
+        payload.update(job.result)
+    return payload
+
+@api_login_required
 def analyze_video(request):
     """
-    업로드된 영상을 분석 파이프라인에 전달하고, 결과를 JSON으로 반환합니다.
+    업로드된 영상의 분석 작업을 등록하고 작업 ID를 바로 반환합니다.
+    분석은 별도 워커 프로세스(run_presentation_workers)에서 진행되며,
+    같은 영상을 이미 분석했으면 저장된 결과를 다시 사용합니다.
     """
-    if request.method == "POST":
-        import json
-        try:
-            body = json.loads(request.body)
-            video_path = body.get('video_path')
-
-            if not video_path or not os.path.exists(video_path):
-                return JsonResponse({"success": False, "error": "Invalid video path."}, status=400)
-            
-            result = run_feedback_pipeline(video_path)
-            return JsonResponse({
-                "success": True,
-                **result
-            })
-        except Exception as e :
-            return JsonResponse({
-                "success": False,
-                "error": str(e),
-                "trace": traceback.format_exc()
-            }, status=500)
-    else:
-        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
\ No newline at end of file
+    if request.method != "POST":
+        return JsonResponse({"success": False, "error": "Invalid request"}, status=400)
+    try:
+        body = json.loads(request.body)
+        video_path = body.get('video_path')
+
+        if not video_path or not os.path.exists(video_path):
+            return JsonResponse({"success": False, "error": "Invalid video path."}, status=400)
+
+        job, reused = enqueue_analysis(video_path, request.user)
+        return JsonResponse({
+            "success": True,
+            "reused": reused,
+            "status_url": f"/presentation/jobs/{job.pk}/",
+            "stream_url": f"/presentation/jobs/{job.pk}/stream/",
+            **build_job_payload(job)
+        })
+    except Exception as e:
+        return JsonResponse({
+            "success": False,
+            "error": str(e),
+            "trace": traceback.format_exc()
+        }, status=500)
+
+@api_login_required
+def analysis_status(request, job_id):
+    """분석 작업 진행 상황/결과 조회 (프론트엔드 폴링용, 본인 작업만)"""
+    try:
+        job = PresentationAnalysisJob.objects.get(pk=job_id, user=request.user)
+    except PresentationAnalysisJob.DoesNotExist:
+        return JsonResponse({"success": False, "error": "Job not found"}, status=404)
+    return JsonResponse({"success": True, **build_job_payload(job)})
+
+def format_sse(event: str, data: dict) -> str:
+    """Server-Sent Events 메시지 형식"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@api_login_required
+async def analysis_stream(request, job_id):
+    """
+    분석 작업 진행 상황을 Server-Sent Events로 전달 (본인 작업만)
+    이벤트 순서: progress*(단계/진행률이 바뀔 때마다) → done(분석 결과) 또는 error
+    ANALYSIS_STREAM_MAX_SECONDS가 지나도 끝나지 않으면 timeout(현재 상태)을 보내고 연결 종료
+    """
+    user = await request.auser()
+    get_job = sync_to_async(
+        PresentationAnalysisJob.objects.filter(pk=job_id, user=user).first, thread_sensitive=False
+    )
+    if await get_job() is None:
+        return JsonResponse({"success": False, "error": "Job not found"}, status=404)
+
+    max_seconds = get_setting("ANALYSIS_STREAM_MAX_SECONDS", 600)
+
+    async def event_stream():
+        last = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_seconds
+        while True:
+            job = await get_job()
+            if job is None:
+                yield format_sse("error", {"error": "Job not found"})
+                return
+            payload = build_job_payload(job)
+            if job.status == 'completed':
+                yield format_sse("done", payload)
+                return
+            if job.status == 'failed':
+                yield format_sse("error", payload)
+                return
+            current = (job.status, job.stage, payload["progress"])
+            if current != last:
+                yield format_sse("progress", payload)
+                last = current
+            if loop.time() >= deadline:
+                # 연결이 무한히 열려 있지 않도록 종료 (작업은 계속 진행, 이후 상태는 폴링으로 조회)
+                yield format_sse("timeout", payload)
+                return
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # 프록시 버퍼링 방지
+    return response
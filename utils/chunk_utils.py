@@ -1,30 +1,366 @@
+import os
+import re
+import threading
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-def get_adaptive_splitter(text: str) -> RecursiveCharacterTextSplitter:
+from utils.config import get_setting
+from utils.table_block import TableBlock
+from utils.transcript_segment import TranscriptSegment, format_timestamp
+
+_HANGUL_PATTERN = re.compile(r"[가-힣]")
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff\u3040-\u30ff]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 토큰 수를 근사
+    한글/한자는 글자당 약 1토큰, 그 외 문자는 약 4자당 1토큰으로 계산
+    """
+    if not text:
+        return 0
+    wide = len(_HANGUL_PATTERN.findall(text)) + len(_CJK_PATTERN.findall(text))
+    narrow = len(text) - wide
+    return wide + narrow // 4 + 1
+
+# 청킹 토크나이저 (임베딩 모델 bge-m3와 같은 토크나이저의 로컬 tokenizer.json 경로)
+# 허브 이름("BAAI/bge-m3")은 CHUNK_TOKENIZER_DOWNLOAD=True일 때만 다운로드
+DEFAULT_CHUNK_TOKENIZER = os.path.join("models", "bge-m3", "tokenizer.json")
+
+# 문단 → 줄 → 한국어 종결어미/문장부호 뒤 → 어절 순으로 나눌 위치를 찾음
+# (lookbehind라 문장부호는 앞 문장에 남고 공백만 구분자로 사용)
+KOREAN_SEPARATORS = [
+    r"\n\n",
+    r"\n",
+    r"(?<=[다요죠까니라][.?!])\s+",
+    r"(?<=[.?!。])\s+",
+    r"(?<=[,;:])\s+",
+    r"\s+",
+    "",
+]
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def _can_download_tokenizer() -> bool:
+    """CHUNK_TOKENIZER_DOWNLOAD=True이고 오프라인 모드(HF_HUB_OFFLINE / TRANSFORMERS_OFFLINE)가 아닐 때만 허브에서 받음"""
+    if not get_setting("CHUNK_TOKENIZER_DOWNLOAD", False):
+        return False
+    for env in ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE"):
+        if os.environ.get(env, "").strip().lower() in ("1", "true", "yes", "on"):
+            return False
+    return True
+
+
+def _load_tokenizer():
+    """HuggingFace tokenizers로 임베딩 모델 토크나이저 로드 (패키지/파일이 없거나 다운로드가 막혀 있으면 None)"""
+    global _tokenizer, _tokenizer_loaded
+    with _tokenizer_lock:
+        if _tokenizer_loaded:
+            return _tokenizer
+        _tokenizer_loaded = True
+        name = get_setting("CHUNK_TOKENIZER", DEFAULT_CHUNK_TOKENIZER)
+        if not os.path.exists(name) and not _can_download_tokenizer():
+            # 청킹 중 네트워크 다운로드로 멈추지 않도록 로컬 파일이 없으면 근사치 사용
+            print(f"[청크 토크나이저 파일 없음: {name}] - 근사 토큰 수 사용")
+            return None
+        try:
+            from tokenizers import Tokenizer
+            if os.path.exists(name):
+                _tokenizer = Tokenizer.from_file(name)
+            else:
+                _tokenizer = Tokenizer.from_pretrained(name)
+            print(f"[청크 토크나이저 로드: {name}]")
+        except Exception as e:
+            print(f"[청크 토크나이저 로드 실패: {e}] - 근사 토큰 수 사용")
+            _tokenizer = None
+        return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """임베딩 모델 기준 토큰 수 (토크나이저가 없으면 estimate_tokens)"""
+    tokenizer = _load_tokenizer()
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def get_chunk_token_budget() -> tuple:
+    """(청크 토큰 수, 겹침 토큰 수) - 임베딩 모델 최대 입력 길이를 넘지 않도록 제한"""
+    max_tokens = get_setting("EMBEDDING_MAX_TOKENS", 8192)
+    chunk_tokens = min(get_setting("CHUNK_TOKENS", 512), max_tokens)
+    overlap_tokens = min(get_setting("CHUNK_OVERLAP_TOKENS", 64), chunk_tokens // 4)
+    return chunk_tokens, overlap_tokens
+
+
+def get_token_splitter() -> RecursiveCharacterTextSplitter:
+    """
+    토큰 예산 기준 splitter
+    한국어는 글자 수와 토큰 수의 비율이 영어와 크게 달라 글자 수 기준보다 청크 크기가 일정함
     """
-    전체 문서 길이에 따라 적절한 chunk_size와 overlap을 동적으로 설정
-    """
-    length = len(text)
-    # 청크 크기 결정 (기준: 문자 수 기준)
-    if length < 2000:
-        chunk_size = 1000
-    elif length < 5000:
-        chunk_size = 1200
-    elif length < 10000:
-        chunk_size = 1500
-    else:
-        chunk_size = 2000  # 너무 크면 분산처리에 불리하므로 제한
-    # overlap은 chunk_size의 10~20% 정도로 설정
-    chunk_overlap = int(chunk_size * 0.15)
-    print(f"[청크 설정] 전체 길이: {length}자 → chunk_size={chunk_size}, overlap={chunk_overlap}")
+    chunk_tokens, overlap_tokens = get_chunk_token_budget()
     return RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ".", "!", "?"]
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=count_tokens,
+        separators=KOREAN_SEPARATORS,
+        is_separator_regex=True,
+    )
+
+
+def get_adaptive_splitter(text: str) -> RecursiveCharacterTextSplitter:
+    """
+    문서용 splitter (토큰 예산 기준이므로 문서 길이와 무관)
+    """
+    chunk_tokens, overlap_tokens = get_chunk_token_budget()
+    print(f"[청크 설정] 전체 길이: {len(text)}자 → chunk_tokens={chunk_tokens}, overlap={overlap_tokens}")
+    return get_token_splitter()
+
+
+def get_chunk_length_report(token_counts: list) -> dict:
+    """청크 토큰 수 분포 (개수, 최소/중앙/p90/최대, 평균, 예산 초과 수)"""
+    if not token_counts:
+        return {"count": 0}
+    ordered = sorted(token_counts)
+    chunk_tokens, _ = get_chunk_token_budget()
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "p50": ordered[len(ordered) // 2],
+        "p90": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        "max": ordered[-1],
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "over_budget": sum(1 for count in ordered if count > chunk_tokens),
+    }
+
+# 스트리밍 청킹: 버퍼가 청크 토큰 수 × 이 값(글자)을 넘으면 나눔
+_STREAM_BUFFER_FACTOR = 8
+# 표 바로 앞의 짧은 텍스트(제목 등)는 별도 청크 대신 첫 표 청크에 붙임
+TABLE_CAPTION_CHARS = 300
+# 본문 속 표로 인식할 최소 연속 행 수 ("a | b" 형태, 헤더 포함)
+MIN_TABLE_LINES = 3
+
+_TABLE_LINE = re.compile(r"^.*\S.* \| .*$|^\|.*\|$")
+_TABLE_SEPARATOR = re.compile(r"^[\s|:\-]+$")
+
+
+def _is_table_line(line: str) -> bool:
+    return bool(_TABLE_LINE.match(line))
+
+
+def find_table_parts(text: str) -> list:
+    """
+    본문을 ("text", 문자열) / ("table", 헤더, 행 목록) 구간으로 나누기
+    " | "로 구분된 줄이 MIN_TABLE_LINES 이상 이어지면 표로 보고 첫 줄을 헤더로 사용 (구분선 제외)
+    """
+    lines = text.split("\n")
+    parts = []
+    prose = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j < len(lines) and _is_table_line(lines[j]):
+            j += 1
+        if j - i >= MIN_TABLE_LINES:
+            if prose:
+                parts.append(("text", "\n".join(prose)))
+                prose = []
+            rows = [line for line in lines[i + 1:j] if not _TABLE_SEPARATOR.match(line)]
+            parts.append(("table", lines[i], rows))
+            i = j
+        else:
+            prose.append(lines[i])
+            i += 1
+    if prose:
+        parts.append(("text", "\n".join(prose)))
+    return parts
+
+
+def pack_table_rows(header: str, rows: list, budget: int = None) -> list:
+    """헤더를 붙였을 때 토큰 예산을 넘지 않도록 행을 (시작, 끝) 구간으로 묶기 (한 행이 넘치면 단독 구간)"""
+    budget = budget or get_chunk_token_budget()[0]
+    header_tokens = count_tokens(header) + 16  # 시트/행 범위 표시 여유분
+    groups = []
+    start = 0
+    size = header_tokens
+    for idx, row in enumerate(rows):
+        row_tokens = count_tokens(row) + 1
+        if idx > start and size + row_tokens > budget:
+            groups.append((start, idx))
+            start = idx
+            size = header_tokens
+        size += row_tokens
+    if start < len(rows):
+        groups.append((start, len(rows)))
+    return groups
+
+
+def format_table_chunk(header: str, rows: list, sheet: str = None, row_start: int = None, caption: str = "") -> str:
+    """표 청크 텍스트: [캡션] + [시트/행 범위] + 헤더 + 행"""
+    lines = []
+    if caption:
+        lines.append(caption)
+    if row_start is not None:
+        location = f"{sheet} 시트 " if sheet else ""
+        lines.append(f"[{location}{row_start + 1}~{row_start + len(rows)}행]")
+    lines.append(header)
+    lines.extend(rows)
+    return "\n".join(lines)
+
+
+def format_transcript_chunk(segments: list) -> str:
+    """음성 인식 청크 텍스트: [시작~끝 시각] + 발화 텍스트"""
+    location = f"[{format_timestamp(segments[0].start)}~{format_timestamp(segments[-1].end)}]"
+    return location + "\n" + " ".join(segment.text.strip() for segment in segments)
+
+
+def _clean_caption(text: str, header: str) -> str:
+    """캡션에서 헤더/구분선 줄은 제외 (표 청크에 이미 들어감)"""
+    lines = [line.strip() for line in text.strip().split("\n")]
+    return "\n".join(
+        line for line in lines
+        if line and line != header.strip() and not _TABLE_SEPARATOR.match(line)
     )
-    
+
+
+def _split_prose(buffer: str, splitter, final: bool) -> tuple:
+    """
+    버퍼를 본문/표 구간별로 청킹
+    final이 아니면 마지막 구간의 끝부분(본문은 마지막 청크, 표는 헤더 + 남은 행)을 다음 버퍼로 넘김
+    반환: ([(청크, 메타데이터)], 넘길 텍스트)
+    """
+    records = []
+    carry = ""
+    parts = find_table_parts(buffer)
+    for idx, part in enumerate(parts):
+        keep_tail = not final and idx == len(parts) - 1
+        if part[0] == "text":
+            chunks = splitter.split_text(part[1])
+            if keep_tail and chunks:
+                carry = chunks.pop()
+            records.extend((chunk, {}) for chunk in chunks)
+        else:
+            _, header, rows = part
+            groups = pack_table_rows(header, rows)
+            if keep_tail and groups:
+                tail_start, _ = groups.pop()
+                carry = "\n".join([header] + rows[tail_start:])
+            records.extend(
+                (format_table_chunk(header, rows[lo:hi]), {"type": "table"}) for lo, hi in groups
+            )
+    return records, carry
+
+
+def iter_split_segments(segments):
+    """
+    텍스트 조각 스트림을 (청크, 메타데이터) 스트림으로 변환 (제너레이터)
+    - 본문: 토큰 예산 기준으로 한국어 문장 경계에서 나눔
+      버퍼가 일정 길이를 넘으면 나누고, 마지막 청크는 다음 조각과 이어 붙이기 위해 남김
+    - 본문 속 "a | b" 표: 행 구간 단위로 나누고 구간마다 헤더를 반복
+    - TableBlock(CSV/엑셀): 행 구간마다 헤더와 시트/행 범위를 붙이고 메타데이터(sheet, row_start, row_end)로 남김
+    - TranscriptSegment(음성): 발화 구간을 토큰 예산만큼 묶고 시간 범위를 메타데이터(start_time, end_time, 초)로 남김
+    메타데이터의 tokens는 청크 토큰 수 (분포 보고용)
+    메모리에는 버퍼 하나 분량만 유지
+    """
+    for text, metadata in _iter_split_records(segments):
+        metadata["tokens"] = count_tokens(text)
+        yield text, metadata
+
+
+def _iter_split_records(segments):
+    splitter = get_token_splitter()
+    buffer_limit = get_chunk_token_budget()[0] * _STREAM_BUFFER_FACTOR
+    buffer = ""
+    table = None  # 아직 청크로 내보내지 않은 표 행 (다음 TableBlock과 이어 붙임)
+
+    def emit_table(groups):
+        for lo, hi in groups:
+            rows = table["rows"][lo:hi]
+            row_start = table["start_row"] + lo
+            caption = table.pop("caption", "")
+            text = format_table_chunk(table["header"], rows, table["sheet"], row_start, caption)
+            metadata = {"type": "table", "row_start": row_start + 1, "row_end": row_start + len(rows)}
+            if table["sheet"]:
+                metadata["sheet"] = table["sheet"]
+            yield text, metadata
+
+    def flush_table():
+        nonlocal table
+        if table and table["rows"]:
+            yield from emit_table(pack_table_rows(table["header"], table["rows"]))
+        table = None
+
+    transcript = []  # 아직 청크로 내보내지 않은 발화 구간
+
+    def emit_transcript(groups):
+        for lo, hi in groups:
+            spoken = transcript[lo:hi]
+            metadata = {"type": "transcript", "start_time": round(spoken[0].start, 2), "end_time": round(spoken[-1].end, 2)}
+            yield format_transcript_chunk(spoken), metadata
+
+    def flush_transcript():
+        if transcript:
+            yield from emit_transcript(pack_table_rows("", [segment.text for segment in transcript]))
+            transcript.clear()
+
+    for segment in segments:
+        if isinstance(segment, TranscriptSegment):
+            if not segment.text.strip():
+                continue
+            if not transcript:
+                yield from flush_table()
+                if buffer.strip():
+                    yield from _split_prose(buffer, splitter, final=True)[0]
+                buffer = ""
+            transcript.append(segment)
+            # 가득 찬 구간만 내보내고 마지막 구간은 다음 발화와 합치기 위해 남김
+            groups = pack_table_rows("", [spoken.text for spoken in transcript])
+            if len(groups) > 1:
+                tail_start = groups[-1][0]
+                yield from emit_transcript(groups[:-1])
+                del transcript[:tail_start]
+            continue
+
+        yield from flush_transcript()
+        if isinstance(segment, TableBlock):
+            if table and table["sheet"] == segment.sheet and table["header"] == segment.header \
+                    and table["start_row"] + len(table["rows"]) == segment.start_row:
+                table["rows"].extend(segment.rows)
+            else:
+                yield from flush_table()
+                caption = ""
+                if buffer.strip():
+                    if len(buffer.strip()) <= TABLE_CAPTION_CHARS:
+                        caption = _clean_caption(buffer, segment.header)
+                    else:
+                        yield from _split_prose(buffer, splitter, final=True)[0]
+                    buffer = ""
+                table = {"header": segment.header, "sheet": segment.sheet, "start_row": segment.start_row,
+                         "rows": list(segment.rows), "caption": caption}
+            # 가득 찬 구간만 내보내고 마지막 구간은 다음 블록과 합치기 위해 남김
+            groups = pack_table_rows(table["header"], table["rows"])
+            if len(groups) > 1:
+                tail_start = groups[-1][0]
+                yield from emit_table(groups[:-1])
+                table["rows"] = table["rows"][tail_start:]
+                table["start_row"] += tail_start
+            continue
+
+        yield from flush_table()
+        segment = str(segment)
+        if not segment:
+            continue
+        buffer += segment
+        if len(buffer) >= buffer_limit:
+            records, buffer = _split_prose(buffer, splitter, final=False)
+            yield from records
+
+    yield from flush_table()
+    yield from flush_transcript()
+    if buffer.strip():
+        yield from _split_prose(buffer, splitter, final=True)[0]
+
 if __name__ == "__main__" :
-    text = "가나다라마바사아자차카타파하"
-    print(get_adaptive_splitter(text))
-    print(get_adaptive_splitter(text*2))
-    print(get_adaptive_splitter(text*100))
-    print(get_adaptive_splitter(text*1000))
\ No newline at end of file
+    text = "오늘 회의에서는 2024년 매출 목표를 논의했습니다. 다음 분기 계획은 무엇인가요? 담당자는 김 팀장입니다. "
+    print(count_tokens(text), estimate_tokens(text))
+    chunks = get_adaptive_splitter(text * 200).split_text(text * 200)
+    print(get_chunk_length_report([count_tokens(chunk) for chunk in chunks]))
\ No newline at end of file
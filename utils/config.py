@@ -0,0 +1,26 @@
+import os
+
+
+def get_setting(name: str, default=None):
+    """
+    Django settings 값을 우선 사용하고, 없으면 환경 변수 → 기본값 순으로 반환
+    (Django 없이 단독 실행되는 모듈에서도 사용 가능)
+    """
+    try:
+        from django.conf import settings
+        if settings.configured and hasattr(settings, name):
+            return getattr(settings, name)
+    except ImportError:
+        pass
+
+    value = os.getenv(name)
+    if value is None:
+        return default
+    # 환경 변수는 문자열이므로 기본값 타입에 맞춰 변환
+    if isinstance(default, bool):
+        return value.lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
@@ -0,0 +1,94 @@
+from langchain_core.documents import Document
+from utils.chunk_utils import estimate_tokens
+from utils.config import get_setting
+
+# 작업 유형별 프롬프트에 넣을 문서 토큰 예산 (TaskType.value 기준)
+DEFAULT_CONTEXT_TOKEN_BUDGETS = {
+    "보고서": 5000,
+    "발표자료": 5000,
+    "요약": 3500,
+    "질의응답": 2500,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 2500
+
+# 겹침 판단에 사용할 최소 글자 수
+MIN_OVERLAP_CHARS = 20
+
+
+def get_context_budget(task_name: str) -> int:
+    """작업 유형별 토큰 예산 (settings.CONTEXT_TOKEN_BUDGETS로 재정의 가능)"""
+    budgets = get_setting("CONTEXT_TOKEN_BUDGETS", DEFAULT_CONTEXT_TOKEN_BUDGETS)
+    return budgets.get(task_name, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
+def get_candidate_count(token_budget: int) -> int:
+    """예산을 채우기에 충분한 후보 청크 수 (청크당 약 150토큰 이상 가정)"""
+    return max(10, min(200, token_budget // 150))
+
+
+def _strip_overlap(previous: str, current: str) -> str:
+    """이전 청크의 끝부분과 겹치는 현재 청크의 앞부분을 제거"""
+    head = current[:MIN_OVERLAP_CHARS]
+    if len(head) < MIN_OVERLAP_CHARS:
+        return current
+    idx = previous.find(head, max(0, len(previous) - len(current)))
+    while idx != -1:
+        tail = previous[idx:]
+        if current.startswith(tail):
+            return current[len(tail):].lstrip()
+        idx = previous.find(head, idx + 1)
+    return current
+
+
+def pack_context(scored_docs: list, token_budget: int) -> list:
+    """
+    (Document, score) 후보에서 중복을 제거하고 점수 높은 순으로 예산까지 채운 뒤
+    원문 순서(order)대로 정렬하여 반환. 인접 청크의 겹치는 부분은 한 번만 남김
+    """
+    # 1. 중복 제거 (같은 청크 / 같은 내용이면 점수가 높은 쪽만 유지)
+    best = {}
+    for doc, score in scored_docs:
+        key = doc.metadata.get("order", doc.metadata.get("content_hash", doc.page_content))
+        if key not in best or score > best[key][1]:
+            best[key] = (doc, score)
+    seen_contents = set()
+    candidates = []
+    for doc, score in sorted(best.values(), key=lambda item: item[1], reverse=True):
+        content_key = doc.metadata.get("content_hash") or hash(doc.page_content)
+        if content_key in seen_contents:
+            continue
+        seen_contents.add(content_key)
+        candidates.append(doc)
+
+    # 2. 점수 순으로 예산 안에 들어가는 청크 선택
+    selected = []
+    used = 0
+    for doc in candidates:
+        cost = estimate_tokens(doc.page_content)
+        if used + cost > token_budget:
+            continue
+        selected.append(doc)
+        used += cost
+
+    # 3. 원문 순서로 정렬하고 인접 청크의 겹침 제거
+    selected.sort(key=lambda doc: doc.metadata.get("order", 0))
+    packed = []
+    for doc in selected:
+        content = doc.page_content
+        if packed and doc.metadata.get("order") is not None \
+                and packed[-1].metadata.get("order") == doc.metadata["order"] - 1:
+            content = _strip_overlap(packed[-1].page_content, content)
+        if content:
+            packed.append(Document(page_content=content, metadata=doc.metadata))
+    return packed
+
+
+if __name__ == "__main__":
+    base = " ".join(f"{i}번째 문장입니다." for i in range(20))
+    docs = [
+        (Document(page_content=base[:80], metadata={"order": 0}), 0.9),
+        (Document(page_content=base[60:140], metadata={"order": 1}), 0.8),
+        (Document(page_content=base[60:140], metadata={"order": 1}), 0.7),
+    ]
+    for doc in pack_context(docs, token_budget=500):
+        print(doc.metadata["order"], repr(doc.page_content))
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+# db.sqlite3 옆에 두는 청크 임베딩 캐시 (문서 간 공유)
+CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "embedding_cache.sqlite3"
+)
+
+# SQLite 한 번에 바인딩 가능한 변수 수 제한 대응
+_QUERY_BATCH = 500
+
+_local = threading.local()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """스레드별 SQLite 연결 (임베딩 워커 스레드에서 동시에 사용)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+        )
+        _local.conn = conn
+    return conn
+
+
+def make_cache_key(text: str, model: str) -> str:
+    """청크 텍스트 + 임베딩 모델명 기반 캐시 키"""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _encode(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode(blob: bytes) -> list:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+def get_cached_embeddings(texts: list, model: str) -> list:
+    """
+    텍스트 목록의 캐시된 벡터를 같은 순서로 반환
+    캐시에 없는 항목은 None
+    """
+    keys = [make_cache_key(text, model) for text in texts]
+    found = {}
+    conn = _get_connection()
+    unique_keys = list(set(keys))
+    for start in range(0, len(unique_keys), _QUERY_BATCH):
+        part = unique_keys[start:start + _QUERY_BATCH]
+        placeholders = ",".join("?" * len(part))
+        rows = conn.execute(
+            f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+        ).fetchall()
+        for key, blob in rows:
+            found[key] = _decode(blob)
+    return [found.get(key) for key in keys]
+
+
+def put_cached_embeddings(texts: list, vectors: list, model: str):
+    """새로 계산한 벡터를 캐시에 저장"""
+    rows = [
+        (make_cache_key(text, model), model, len(vector), _encode(vector))
+        for text, vector in zip(texts, vectors)
+    ]
+    conn = _get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)", rows
+        )
+
+
+def get_embedding_cache_stats() -> dict:
+    """캐시 항목 수 (모델별)"""
+    rows = _get_connection().execute(
+        "SELECT model, COUNT(*) FROM embeddings GROUP BY model"
+    ).fetchall()
+    return {model: count for model, count in rows}
+
+
+if __name__ == "__main__":
+    put_cached_embeddings(["테스트 문장"], [[0.1, 0.2, 0.3]], "test-model")
+    print(get_cached_embeddings(["테스트 문장", "없는 문장"], "test-model"))
+    print(get_embedding_cache_stats())
@@ -0,0 +1,124 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+import httpx
+from langchain_ollama import OllamaEmbeddings
+from utils.config import get_setting
+
+# 문서/질의 벡터가 항상 같은 모델에서 나오도록 기본 모델을 한 곳에서 관리
+EMBEDDING_MODEL = "bona/bge-m3-korean:latest"
+
+# 모델별 임베딩 클라이언트 (프로세스 전체에서 공유)
+_embeddings_registry = {}
+_registry_lock = threading.Lock()
+
+# 정규화된 질의 텍스트 → 벡터 LRU (같은/비슷한 후속 질문 재임베딩 방지)
+_query_vector_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def get_embedding_model_name() -> str:
+    return get_setting("EMBEDDING_MODEL", EMBEDDING_MODEL)
+
+
+def get_embeddings(model: str = None) -> OllamaEmbeddings:
+    """
+    모델별로 하나만 생성되는 OllamaEmbeddings 반환
+    내부 httpx 클라이언트의 keep-alive 연결 풀을 모든 요청이 재사용
+    """
+    model = model or get_embedding_model_name()
+    embeddings = _embeddings_registry.get(model)
+    if embeddings is not None:
+        return embeddings
+
+    with _registry_lock:
+        if model not in _embeddings_registry:
+            pool_size = get_setting("EMBED_MAX_WORKERS", 4)
+            limits = httpx.Limits(
+                max_connections=pool_size * 2,
+                max_keepalive_connections=pool_size * 2,
+                keepalive_expiry=get_setting("EMBEDDING_HTTP_KEEPALIVE", 60.0),
+            )
+            _embeddings_registry[model] = OllamaEmbeddings(
+                model=model,
+                # Ollama 서버에 모델을 올려둔 채 유지할 시간(초)
+                keep_alive=get_setting("EMBEDDING_MODEL_KEEP_ALIVE", 1800),
+                client_kwargs={"limits": limits},
+            )
+            print(f"[임베딩 클라이언트 생성: {model}]")
+        return _embeddings_registry[model]
+
+
+def embed_query(text: str, model: str = None) -> list:
+    """질의 하나를 임베딩"""
+    return get_embeddings(model).embed_query(text)
+
+
+def embed_documents(texts: list, model: str = None) -> list:
+    """문서 목록을 임베딩"""
+    return get_embeddings(model).embed_documents(texts)
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 질의 정규화 (유니코드 NFC, 공백 정리, 끝 문장부호 제거)"""
+    text = unicodedata.normalize("NFC", text or "")
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.。 ").lower()
+
+
+def _lookup_query_vector(key):
+    with _query_cache_lock:
+        vector = _query_vector_cache.get(key)
+        if vector is not None:
+            _query_vector_cache.move_to_end(key)
+        return vector
+
+
+def _store_query_vector(key, vector):
+    with _query_cache_lock:
+        _query_vector_cache[key] = vector
+        _query_vector_cache.move_to_end(key)
+        while len(_query_vector_cache) > get_setting("QUERY_EMBEDDING_CACHE_SIZE", 512):
+            _query_vector_cache.popitem(last=False)
+
+
+def embed_query_cached(text: str, model: str = None):
+    """
+    질의 벡터를 LRU 캐시에서 찾고, 없을 때만 임베딩
+    정규화 결과가 빈 문자열이면 임베딩하지 않고 None 반환
+    """
+    normalized = normalize_query(text)
+    if not normalized:
+        return None
+
+    model = model or get_embedding_model_name()
+    key = (model, normalized)
+    vector = _lookup_query_vector(key)
+    if vector is None:
+        vector = embed_query(text, model)
+        _store_query_vector(key, vector)
+    return vector
+
+
+async def aembed_query_cached(text: str, model: str = None):
+    """embed_query_cached의 비동기 버전 (Ollama 비동기 클라이언트 사용)"""
+    normalized = normalize_query(text)
+    if not normalized:
+        return None
+
+    model = model or get_embedding_model_name()
+    key = (model, normalized)
+    vector = _lookup_query_vector(key)
+    if vector is None:
+        vector = await get_embeddings(model).aembed_query(text)
+        _store_query_vector(key, vector)
+    return vector
+
+
+def clear_embeddings_registry():
+    """임베딩 클라이언트 및 질의 벡터 캐시 초기화"""
+    with _registry_lock:
+        _embeddings_registry.clear()
+    with _query_cache_lock:
+        _query_vector_cache.clear()
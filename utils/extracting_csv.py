@@ -1,31 +1,56 @@
 import os
 import pandas as pd
+from utils.table_block import TableBlock
 
-def extract_csv_content(csv_path: str, encoding: str = "utf-8") -> str:
+# 스트리밍 변환 시 한 번에 읽을 행 수
+CSV_ROWS_PER_SEGMENT = 5000
+
+
+def _rows_to_lines(df: pd.DataFrame) -> list:
+    """열 단위 문자열 연산으로 각 행을 "a | b | c" 형태로 변환 (행 반복 없음)"""
+    if df.shape[1] == 0:
+        return []
+    first = df.iloc[:, 0]
+    if df.shape[1] == 1:
+        return first.tolist()
+    return first.str.cat(df.iloc[:, 1:], sep=" | ").tolist()
+
+
+def iter_csv_segments(csv_path: str, encoding: str = "utf-8", rows_per_segment: int = CSV_ROWS_PER_SEGMENT):
     """
-    CSV 파일에서 데이터를 읽고 마크다운 형식의 텍스트로 변환
+    CSV 파일을 행 구간 단위로 읽어 마크다운 조각으로 반환 (제너레이터)
+    첫 조각은 제목과 헤더 텍스트, 이후는 헤더 정보를 가진 TableBlock
+    조각을 str()로 이어 붙이면 extract_csv_content 결과와 같음
     """
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"파일이 존재하지 않습니다: {csv_path}")
 
-    # pandas로 CSV 로드 (쉼표 구분 기준)
-    df = pd.read_csv(csv_path, encoding=encoding)
+    # 모든 값을 원문 문자열로 읽음 (숫자 변환/NaN 처리 비용 없음, 빈 칸은 "")
+    reader = pd.read_csv(csv_path, encoding=encoding, dtype=str, keep_default_na=False, chunksize=rows_per_segment)
+    header = None
+    start_row = 0
+    for df in reader:
+        if header is None:
+            # 헤더
+            headers = [str(column) for column in df.columns]
+            header = " | ".join(headers)
+            yield "\n".join([
+                "# CSV 파일",
+                "[표 형식 데이터]",
+                header,
+                " | ".join(["---"] * len(headers)),
+            ])
+        rows = _rows_to_lines(df)
+        if rows:
+            yield TableBlock(header, rows, start_row=start_row, prefix="\n")
+            start_row += len(rows)
 
-    # 마크다운 표 생성
-    output = []
-    output.append("# CSV 파일")
-    output.append("[표 형식 데이터]")
 
-    # 헤더
-    headers = list(df.columns)
-    output.append(" | ".join(headers))
-    output.append(" | ".join(["---"] * len(headers)))
-
-    # 각 행
-    for _, row in df.iterrows():
-        output.append(" | ".join(str(item) if pd.notna(item) else "" for item in row))
-
-    return "\n".join(output)
+def extract_csv_content(csv_path: str, encoding: str = "utf-8") -> str:
+    """
+    CSV 파일에서 데이터를 읽고 마크다운 형식의 텍스트로 변환
+    """
+    return "".join(map(str, iter_csv_segments(csv_path, encoding=encoding)))
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 import os
+import asyncio
 from typing import Union
 from docx import Document as DocumentLoader
 from docx.document import Document
@@ -6,9 +7,8 @@ from docx.text.paragraph import Paragraph
 from docx.table import _Cell, Table
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
-from multiprocessing import Process, Queue
 
-from utils.image_utils import analyze_image_with_qwen  # 멀티모달 분석기
+from utils.image_utils import analyze_images_bounded, image_output_dir  # 멀티모달 분석기
 
 def iter_block_items(parent: Union[Document, _Cell]):
     """docx 문서 내 텍스트(paragraph)와 표(table)를 순서대로 순회"""
@@ -19,40 +19,23 @@ def iter_block_items(parent: Union[Document, _Cell]):
         elif isinstance(child, CT_Tbl): # table
             yield Table(child, parent)
 
-def analyze_worker(image_path, queue, mode : str = "simple"):
-    """서브 프로세스에서 이미지 분석 실행"""
-    print("scv 준비완료")
-    try:
-        result = analyze_image_with_qwen(image_path,mode=mode)
-        queue.put((image_path, result.strip()))
-    except Exception as e:
-        queue.put((image_path, f"[에러] {e}"))
-
-def parallel_image_analysis(image_paths: list) -> dict:
-    """여러 이미지를 병렬로 분석"""
-    queue = Queue()
-    processes = []
-    for path in image_paths:
-        p = Process(target=analyze_worker, args=(path, queue))
-        print("scv 업무 분장!")
-        processes.append(p)
-        p.start()
-
+def parallel_image_analysis(image_paths: list, mode: str = "auto") -> dict:
+    """
+    여러 이미지를 병렬로 분석
+    공용 비동기 풀에서 동시 요청 수(IMAGE_ANALYSIS_CONCURRENCY)와 이미지별 시간 제한(IMAGE_ANALYSIS_TIMEOUT)을 두고 실행
+    """
     results = {}
-    for _ in processes:
-        img_path, summary = queue.get()
-        results[img_path] = summary
-
-    for p in processes:
-        p.join()
-
+    for path, result in zip(image_paths, analyze_images_bounded(image_paths, mode=mode)):
+        if isinstance(result, asyncio.TimeoutError):
+            results[path] = "[에러] 이미지 분석 시간 초과"
+        elif isinstance(result, Exception):
+            results[path] = f"[에러] {result}"
+        else:
+            results[path] = result.strip()
     return results
 
-def extract_docx_content(docx_path: str, mode: str = "simple") -> str:
+def extract_docx_content(docx_path: str, mode: str = "auto") -> str:
     """docx에서 텍스트, 표, 이미지(병렬 분석 포함)를 추출"""
-    image_output_dir = "temp_imgs"
-    os.makedirs(image_output_dir, exist_ok=True)
-
     doc = DocumentLoader(docx_path)
     content_list = []
 
@@ -73,22 +56,25 @@ def extract_docx_content(docx_path: str, mode: str = "simple") -> str:
 
     # 이미지 추출
     rels = doc.part._rels
-    img_paths = []
-    for idx, rel in enumerate(rels.values(), 1):
-        if "image" in rel.reltype:
-            img_data = rel.target_part.blob
-            img_path = os.path.join(image_output_dir, f"image_{idx}.png")
-            print("img 추출 중")
-            with open(img_path, "wb") as f:
-                f.write(img_data)
-            img_paths.append(img_path)
-
-    # 병렬로 이미지 분석
-    img_summaries = parallel_image_analysis(img_paths)
-
-    for idx, path in enumerate(img_paths, 1):
+    with image_output_dir("docx_") as output_dir:
+        img_paths = []
+        for idx, rel in enumerate(rels.values(), 1):
+            if "image" in rel.reltype:
+                img_data = rel.target_part.blob
+                img_path = os.path.join(output_dir, f"image_{idx}.png")
+                print("img 추출 중")
+                with open(img_path, "wb") as f:
+                    f.write(img_data)
+                img_paths.append(img_path)
+
+        # 병렬로 이미지 분석
+        img_summaries = parallel_image_analysis(img_paths, mode=mode)
+
+    # 장식용으로 분류되어 결과가 비어 있는 이미지는 건너뜀
+    summaries = [img_summaries[path] for path in img_paths if img_summaries[path]]
+    for idx, summary in enumerate(summaries, 1):
         print("qwen 작동")
-        content_list.append(f"[이미지{idx}] 분석 결과:\n{img_summaries[path]}")
+        content_list.append(f"[이미지{idx}] 분석 결과:\n{summary}")
 
     return "\n\n".join(content_list)
 
@@ -3,6 +3,7 @@ import base64
 from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage
 import os
+from utils.image_cache import get_image_hashes, make_prompt_key, get_cached_analysis, put_cached_analysis
 
 def image_to_base64(image_path: str) -> str:
     """이미지를 base64 문자열로 인코딩"""
@@ -23,6 +24,13 @@ def analyze_image_with_qwen(image_path: str) -> str:
     "만약 1, 2, 3, 4번 중 해당하는 내용이 없는 항목이 있다면 그 부분은 제외하고 확인한 내용만 가감 없이 정보만 전달해줘"
     )
     
+    # 같은 이미지의 이전 분석 결과 재사용 (공용 이미지 분석 캐시, 내용 해시 일치만)
+    hashes = get_image_hashes(image_path)
+    prompt_key = make_prompt_key("qwen2.5vl:7b", str(prompt))
+    cached = get_cached_analysis(hashes, prompt_key, allow_near_match=False)
+    if cached is not None:
+        return cached
+
     # Ollama multimodal 모델 호출
     llm = ChatOllama(
         model="qwen2.5vl:7b",
@@ -37,6 +45,7 @@ def analyze_image_with_qwen(image_path: str) -> str:
     )
 
     response = llm.invoke([message])
+    put_cached_analysis(hashes, prompt_key, response.content)
     return response.content
 
 
@@ -1,70 +1,234 @@
 import os
+import queue
+import asyncio
+import threading
+import multiprocessing
 import fitz  # PyMuPDF
 import pdfplumber
 from io import StringIO
-from utils.image_utils import analyze_image_with_qwen
-
-def extract_pdf_all_in_order_as_string(pdf_path: str, mode: str = "simple") -> str:
+from concurrent.futures import ProcessPoolExecutor
+from utils.config import get_setting
+from utils.image_utils import analyze_image_bounded, get_image_analysis_semaphore, image_output_dir
+
+# 소비자(청킹/임베딩)보다 앞서 완성해 둘 수 있는 페이지 수 (메모리 상한)
+SEGMENT_QUEUE_SIZE = 8
+# 순서를 맞추기 위해 앞 페이지를 기다리며 먼저 추출/분석해 둘 수 있는 페이지 수 (settings.PDF_REORDER_WINDOW)
+REORDER_WINDOW = 64
+# 중단 여부를 확인하는 간격(초)
+STOP_CHECK_INTERVAL = 0.5
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int, image_output_dir: str) -> list:
+    """
+    페이지 구간 [start, end)의 텍스트/표/이미지 추출 (프로세스 풀 작업 단위)
+    이미지는 파일로 저장하고 경로만 반환 (분석은 메인 프로세스에서 비동기로 진행)
+    """
+    prefix = os.path.splitext(os.path.basename(pdf_path))[0]
+    pages = []
+    with fitz.open(pdf_path) as pdf_fitz, pdfplumber.open(pdf_path) as pdf_plumber:
+        for page_num in range(start, end):
+            plumber_page = pdf_plumber.pages[page_num]
+            text = plumber_page.extract_text()
+            tables = plumber_page.extract_tables()
+
+            image_paths = []
+            for img_index, img in enumerate(pdf_fitz[page_num].get_images(full=True)):
+                base_image = pdf_fitz.extract_image(img[0])
+                image_path = os.path.join(
+                    image_output_dir, f"{prefix}_page_{page_num + 1}_img_{img_index + 1}.{base_image['ext']}"
+                )
+                with open(image_path, "wb") as f:
+                    f.write(base_image["image"])
+                image_paths.append(image_path)
+
+            pages.append({"page_num": page_num, "text": text, "tables": tables, "images": image_paths})
+    return pages
+
+
+def _page_ranges(page_count: int, pages_per_shard: int) -> list:
+    return [(start, min(start + pages_per_shard, page_count)) for start in range(0, page_count, pages_per_shard)]
+
+
+async def _extract_pages(pdf_path: str, page_count: int, mode: str, on_page, image_dir: str, stop=None):
+    """
+    페이지 구간을 프로세스 풀로 병렬 추출하고, 구간이 끝나는 대로 해당 이미지 분석을 시작
+    이미지 분석이 끝난 페이지는 페이지 순서대로 await on_page(page, 이미지 결과 목록) 호출
+    아직 전달하지 않은 첫 페이지보다 PDF_REORDER_WINDOW 이상 앞선 페이지는 추출/분석을 시작하지 않고 대기
+    (앞 페이지 하나가 느려도 뒤 페이지 결과가 끝없이 쌓이지 않음)
+    stop(threading.Event)이 설정되면 남은 구간/이미지 분석을 시작하지 않고 종료
+    """
+    def stopped():
+        return stop is not None and stop.is_set()
+
+    pages_per_shard = get_setting("PDF_PAGES_PER_SHARD", 16)
+    max_workers = min(get_setting("PDF_EXTRACT_WORKERS", 4), os.cpu_count() or 1)
+    ranges = _page_ranges(page_count, pages_per_shard)
+    # 구간 하나는 항상 창 안에 들어가야 다음 페이지를 추출할 수 있음
+    window = max(get_setting("PDF_REORDER_WINDOW", REORDER_WINDOW), pages_per_shard)
+
+    loop = asyncio.get_running_loop()
+    semaphore = get_image_analysis_semaphore()
+    page_tasks = []
+    finished_pages = {}  # 분석이 끝났지만 앞 페이지를 기다리는 페이지
+    next_page = 0
+    progress = asyncio.Condition()
+
+    async def wait_window(page_num):
+        # stop은 다른 스레드에서 설정되므로 주기적으로 확인
+        async with progress:
+            while not stopped() and page_num >= next_page + window:
+                try:
+                    await asyncio.wait_for(progress.wait(), STOP_CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def finish_page(page):
+        nonlocal next_page
+        await wait_window(page["page_num"])
+        if stopped():
+            return
+        results = await asyncio.gather(
+            *(analyze_image_bounded(image_path, semaphore, mode=mode) for image_path in page["images"]),
+            return_exceptions=True,
+        )
+        finished_pages[page["page_num"]] = (page, results)
+        async with progress:
+            while next_page in finished_pages:
+                await on_page(*finished_pages.pop(next_page))
+                next_page += 1
+            progress.notify_all()
+
+    def schedule_pages(shard):
+        for page in shard:
+            page_tasks.append(asyncio.ensure_future(finish_page(page)))
+
+    async def extract_shard(executor, start, end):
+        await wait_window(start)
+        if stopped():
+            return
+        schedule_pages(await loop.run_in_executor(executor, _extract_page_range, pdf_path, start, end, image_dir))
+
+    if len(ranges) == 1 or max_workers <= 1:
+        # 작은 문서는 프로세스 생성 비용이 더 크므로 현재 프로세스에서 추출
+        for start, end in ranges:
+            await extract_shard(None, start, end)
+    else:
+        # 추출 스레드/하트비트 스레드가 살아 있는 상태에서 fork하면 자식 프로세스가 멈출 수 있으므로 spawn 사용
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            await asyncio.gather(*(extract_shard(pool, start, end) for start, end in ranges))
+        finally:
+            # 중단/실패 시 아직 시작하지 않은 구간은 취소 (실행 중인 구간만 기다림)
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    await asyncio.gather(*page_tasks)
+
+
+def _format_page(page: dict, image_results: list, img_idx: int) -> tuple:
+    """페이지 하나를 마크다운으로 변환, (텍스트, 다음 이미지 번호) 반환"""
     output = StringIO()
-    image_output_dir = "temp_imgs"
-    os.makedirs(image_output_dir, exist_ok=True)
-
-    output.write("# PDF 자동 변환\n\n")
-
-    pdf_fitz = fitz.open(pdf_path)
-    pdf_plumber = pdfplumber.open(pdf_path)
-
-    img_idx = 1
-
-    for page_num in range(len(pdf_fitz)):
-        output.write(f"## 페이지 {page_num + 1}\n\n")
-
-        # 텍스트 추출
-        text = pdf_plumber.pages[page_num].extract_text()
-        if text:
-            output.write("**본문 텍스트:**\n")
-            output.write(text.strip() + "\n\n")
-
-        # 표 추출
-        tables = pdf_plumber.pages[page_num].extract_tables()
-        for t_idx, table in enumerate(tables):
-            output.write(f"**[표 {t_idx + 1}]**\n")
-            if table:
-                for row in table:
-                    row_text = " | ".join(cell if cell else "" for cell in row)
-                    output.write(row_text + "\n")
-                output.write("\n")
-
-        # 이미지 추출 및 분석
-        page = pdf_fitz[page_num]
-        images = page.get_images(full=True)
-        for img_index, img in enumerate(images):
-            xref = img[0]
-            base_image = pdf_fitz.extract_image(xref)
-            image_bytes = base_image["image"]
-            ext = base_image["ext"]
-            image_path = os.path.join(image_output_dir, f"page_{page_num+1}_img_{img_idx}.{ext}")
-
-            with open(image_path, "wb") as f:
-                f.write(image_bytes)
-
+    output.write(f"## 페이지 {page['page_num'] + 1}\n\n")
+
+    # 텍스트 추출
+    text = page["text"]
+    if text:
+        output.write("**본문 텍스트:**\n")
+        output.write(text.strip() + "\n\n")
+
+    # 표 추출
+    for t_idx, table in enumerate(page["tables"]):
+        output.write(f"**[표 {t_idx + 1}]**\n")
+        if table:
+            for row in table:
+                row_text = " | ".join(cell if cell else "" for cell in row)
+                output.write(row_text + "\n")
+            output.write("\n")
+
+    # 이미지 분석 결과
+    for result in image_results:
+        if isinstance(result, Exception):
+            output.write(f"[이미지 분석 실패: {result}]\n\n")
+        elif result.strip():
+            output.write(f"**[이미지 {img_idx} 분석 결과]**\n{result.strip()}\n\n")
+        else:
+            # 장식용으로 분류되어 분석하지 않은 이미지
+            continue
+
+        img_idx += 1
+
+    output.write("---\n\n")
+    return output.getvalue(), img_idx
+
+
+def iter_pdf_segments(pdf_path: str, mode: str = "auto"):
+    """
+    PDF를 페이지 단위 마크다운 조각으로 반환 (제너레이터)
+    추출/이미지 분석은 백그라운드 스레드에서 진행되고, 앞 페이지부터 순서대로 완성되는 즉시 전달
+    완성된 페이지 대기열은 SEGMENT_QUEUE_SIZE, 순서를 기다리는 페이지는 PDF_REORDER_WINDOW로 제한
+    (소비가 느리거나 앞 페이지가 늦으면 추출도 대기)
+    소비자가 중간에 제너레이터를 닫으면 백그라운드 추출도 중단
+    이미지는 호출마다 만드는 임시 폴더에 저장하고 끝나면 삭제
+    """
+    with image_output_dir("pdf_") as image_dir:
+        yield from _iter_pdf_pages(pdf_path, mode, image_dir)
+
+
+def _iter_pdf_pages(pdf_path: str, mode: str, image_dir: str):
+    with fitz.open(pdf_path) as pdf_fitz:
+        page_count = len(pdf_fitz)
+
+    yield "# PDF 자동 변환\n\n"
+
+    ready = queue.Queue(maxsize=SEGMENT_QUEUE_SIZE)
+    stop = threading.Event()
+    finished = object()
+
+    def put(item):
+        while not stop.is_set():
             try:
-                result = analyze_image_with_qwen(image_path, mode=mode)
-                output.write(f"**[이미지 {img_idx} 분석 결과]**\n{result.strip()}\n\n")
-            except Exception as e:
-                output.write(f"[이미지 분석 실패: {e}]\n\n")
-
-            img_idx += 1
+                ready.put(item, timeout=STOP_CHECK_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    async def hand_off(page, results):
+        # 대기열이 가득 차도 이벤트 루프(진행 중인 이미지 분석)는 멈추지 않도록 스레드에서 대기
+        await asyncio.get_running_loop().run_in_executor(None, put, (page, results))
+
+    def produce():
+        try:
+            asyncio.run(_extract_pages(pdf_path, page_count, mode, hand_off, image_dir, stop))
+            put(finished)
+        except Exception as e:
+            put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    # 페이지는 순서대로 들어옴
+    img_idx = 1
+    try:
+        while True:
+            item = ready.get()
+            if item is finished:
+                break
+            if isinstance(item, Exception):
+                raise item
+            text, img_idx = _format_page(*item, img_idx)
+            yield text
+    finally:
+        # 정상 종료/예외/소비 중단 모두 백그라운드 추출 중단
+        stop.set()
 
-        output.write("---\n\n")
+    producer.join()
+    print(f"[PDF 추출 완료] {page_count}페이지, 이미지 {img_idx - 1}개")
 
-    pdf_plumber.close()
-    pdf_fitz.close()
 
-    return output.getvalue()
+def extract_pdf_all_in_order_as_string(pdf_path: str, mode: str = "auto") -> str:
+    return "".join(iter_pdf_segments(pdf_path, mode=mode))
 
 
 if __name__ == "__main__":
     FILE_PATH = "sample_inputs/sample.pdf"  # 변환할 PDF 파일 경로
-    result = extract_pdf_all_in_order_as_string(FILE_PATH, mode="simple")
+    result = extract_pdf_all_in_order_as_string(FILE_PATH)
     print(result)
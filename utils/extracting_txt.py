@@ -1,25 +1,48 @@
 import os
 
-def extract_txt_content(txt_path: str) -> str:
+# 스트리밍 변환 시 한 조각의 대략적인 글자 수
+TXT_SEGMENT_CHARS = 64 * 1024
+
+
+def iter_txt_segments(txt_path: str, segment_chars: int = TXT_SEGMENT_CHARS):
     """
-    텍스트(.txt) 파일에서 전체 줄글을 추출하고 마크다운 포맷으로 정리하여 반환
+    텍스트 파일을 줄 단위로 읽어 segment_chars 크기의 조각으로 반환 (제너레이터)
+    큰 파일도 전체를 메모리에 올리지 않음
     """
     if not os.path.exists(txt_path):
         raise FileNotFoundError(f"파일이 존재하지 않습니다: {txt_path}")
 
+    yield "# 텍스트 파일\n\n[본문 내용]\n\n"
+    buffer = []
+    size = 0
+    started = False
     with open(txt_path, "r", encoding="utf-8") as f:
-        text = f.read()
+        for line in f:
+            if not started:
+                # 앞쪽 공백 줄 제거
+                line = line.lstrip()
+                if not line:
+                    continue
+                started = True
+            buffer.append(line)
+            size += len(line)
+            if size >= segment_chars:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+    tail = "".join(buffer).rstrip()
+    if tail:
+        yield tail
 
-    # 마크다운 형식으로 감싸기
-    output = []
-    output.append("# 텍스트 파일")
-    output.append("[본문 내용]")
-    output.append(text.strip())
 
-    return "\n\n".join(output)
+def extract_txt_content(txt_path: str) -> str:
+    """
+    텍스트(.txt) 파일에서 전체 줄글을 추출하고 마크다운 포맷으로 정리하여 반환
+    """
+    return "".join(iter_txt_segments(txt_path)).rstrip()
 
 
 if __name__ == "__main__":
     FILE_PATH = "sample_inputs/sample.txt"
     result = extract_txt_content(FILE_PATH)
-    print("전체 추출 결과:\n", result)
\ No newline at end of file
+    print("전체 추출 결과:\n", result)
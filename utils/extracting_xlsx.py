@@ -1,91 +1,161 @@
 import os
 import time
-import hashlib
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
 import openpyxl
 import xlrd
-from openpyxl.drawing.image import Image as XLImage
-from utils.image_utils import analyze_image_with_qwen
-from concurrent.futures import ThreadPoolExecutor
-
-def get_image_hash(image_path):
-    with open(image_path, "rb") as f:
-        return hashlib.md5(f.read()).hexdigest()
-
-def extract_xlsx_content(file_path: str, enable_image_analysis: bool = True) -> str:
+from utils.image_utils import analyze_image_with_qwen, image_output_dir
+from utils.table_block import TableBlock
+
+# 스트리밍 변환 시 한 조각에 담을 행 수
+XLSX_ROWS_PER_SEGMENT = 1000
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+def _read_rels(zf: zipfile.ZipFile, part: str) -> list:
+    """part의 관계 목록 [(Id, Type, 절대 경로)] (관계 파일이 없으면 빈 목록)"""
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    if rels_path not in zf.namelist():
+        return []
+    rels = []
+    for rel in ET.fromstring(zf.read(rels_path)).iter(f"{_NS_PKG_REL}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+        rels.append((rel.get("Id"), rel.get("Type", ""), target))
+    return rels
+
+def get_sheet_media(file_path: str) -> dict:
+    """
+    xlsx 압축 파일에서 시트별 이미지 경로를 조회 (시트 이름 → xl/media/... 목록)
+    이미지가 없는 통합 문서는 xl/media가 없으므로 바로 빈 dict 반환
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        if not any(name.startswith("xl/media/") for name in zf.namelist()):
+            return {}
+        workbook_targets = {rel_id: target for rel_id, _, target in _read_rels(zf, "xl/workbook.xml")}
+        media = {}
+        for sheet in ET.fromstring(zf.read("xl/workbook.xml")).iter(f"{_NS_MAIN}sheet"):
+            sheet_part = workbook_targets.get(sheet.get(f"{_NS_REL}id"))
+            if not sheet_part:
+                continue
+            images = []
+            for _, rel_type, drawing_part in _read_rels(zf, sheet_part):
+                if rel_type.endswith("/drawing"):
+                    images.extend(
+                        target for _, image_type, target in _read_rels(zf, drawing_part)
+                        if image_type.endswith("/image")
+                    )
+            if images:
+                media[sheet.get("name")] = images
+        return media
+
+def _row_to_text(row) -> str:
+    return " | ".join("" if cell is None else str(cell) for cell in row)
+
+def _iter_table_blocks(rows, sheet_name: str, rows_per_segment: int, prefix: str):
+    """
+    시트 행 텍스트를 헤더 정보를 가진 TableBlock으로 묶기
+    첫 행을 헤더로 보고, 첫 블록 앞에 prefix와 헤더를 붙여 원문 순서를 유지
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    block = []
+    start_row = 0
+    for row_text in rows:
+        block.append(row_text)
+        if len(block) >= rows_per_segment:
+            yield TableBlock(header, block, sheet=sheet_name, start_row=start_row,
+                             prefix=prefix + header + "\n" if start_row == 0 else "\n")
+            start_row += len(block)
+            block = []
+    if block:
+        yield TableBlock(header, block, sheet=sheet_name, start_row=start_row,
+                         prefix=prefix + header + "\n" if start_row == 0 else "\n")
+    elif start_row == 0:
+        # 헤더만 있는 시트
+        yield prefix + header
+
+def iter_xlsx_segments(file_path: str, enable_image_analysis: bool = True, rows_per_segment: int = XLSX_ROWS_PER_SEGMENT):
+    """
+    엑셀 파일을 시트/행 블록 단위 조각으로 반환 (제너레이터)
+    - xlsx는 읽기 전용(스트리밍) 모드로 열어 시트 크기와 무관하게 메모리 사용량 일정
+    - 이미지는 통합 문서에 xl/media가 있을 때만 압축 파일에서 직접 읽음
+    - 행 블록은 헤더/시트/행 번호를 가진 TableBlock
+    조각을 str()로 이어 붙이면 extract_xlsx_content 결과가 됨
+    """
     ext = file_path.split('.')[-1].lower()
-    content_list = []
-    image_output_dir = "temp_imgs"
-    os.makedirs(image_output_dir, exist_ok=True)
 
-    image_cache = {}
-    image_futures = {}
     img_idx = 1
+    first = True
 
-    if ext == "xlsx":
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-
-        for sheet in wb.worksheets:
-            content_list.append(f"# 시트: {sheet.title}")
-            table_text = []
-
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join(str(cell) if cell is not None else "" for cell in row)
-                table_text.append(row_text)
+    def piece(text):
+        nonlocal first
+        if first:
+            first = False
+            return text
+        return "\n\n" + text
 
-            if table_text:
-                content_list.append("[표 또는 셀 텍스트]")
-                content_list.append("\n".join(table_text))
+    def iter_sheet(sheet_name, rows):
+        yield piece(f"# 시트: {sheet_name}")
+        # 빈 행도 " | " 형태로 유지 (표 구분/행 번호가 원본 시트와 일치)
+        rows = (_row_to_text(row) for row in rows)
+        yield from _iter_table_blocks(rows, sheet_name, rows_per_segment, piece("[표 또는 셀 텍스트]") + "\n\n")
 
-            if enable_image_analysis:
-                for img in sheet._images:
-                    if isinstance(img, XLImage):
+    if ext == "xlsx":
+        sheet_media = get_sheet_media(file_path) if enable_image_analysis else {}
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            with zipfile.ZipFile(file_path) as zf, image_output_dir("xlsx_") as output_dir:
+                for sheet in wb.worksheets:
+                    yield from iter_sheet(sheet.title, sheet.iter_rows(values_only=True))
+
+                    for media_path in sheet_media.get(sheet.title, []):
                         print(f"\n[이미지 {img_idx}] 처리 시작")
 
                         # 이미지 저장 시간 측정
                         t1 = time.time()
-                        img_data = img._data()
-                        img_path = os.path.join(image_output_dir, f"image_{img_idx}.png")
+                        img_ext = posixpath.splitext(media_path)[1] or ".png"
+                        img_path = os.path.join(output_dir, f"image_{img_idx}{img_ext}")
                         with open(img_path, "wb") as f:
-                            f.write(img_data)
+                            f.write(zf.read(media_path))
                         t2 = time.time()
                         print(f"[이미지 {img_idx}] 저장 완료 (소요 시간: {t2 - t1:.2f}초)")
 
-                        img_hash = get_image_hash(img_path)
-
-                        if img_hash not in image_cache:
-                            # 분석 시간 측정
-                            t3 = time.time()
-                            summary = analyze_image_with_qwen(img_path)
-                            t4 = time.time()
-                            print(f"[이미지 {img_idx}] Qwen 분석 완료 (소요 시간: {t4 - t3:.2f}초)")
-                            image_cache[img_hash] = summary
-                        else:
-                            summary = image_cache[img_hash]
-                            print(f"[이미지 {img_idx}] 캐시된 결과 사용")
+                        # 분석 시간 측정 (같은 이미지는 공용 캐시에서 바로 반환)
+                        t3 = time.time()
+                        summary = analyze_image_with_qwen(img_path, mode="auto")
+                        t4 = time.time()
+                        print(f"[이미지 {img_idx}] Qwen 분석 완료 (소요 시간: {t4 - t3:.2f}초)")
 
-                        content_list.append(f"[이미지{img_idx}] Qwen 분석 결과:\n{summary.strip()}")
-                        img_idx += 1
+                        # 장식용으로 분류된 이미지는 건너뜀
+                        if summary.strip():
+                            yield piece(f"[이미지{img_idx}] Qwen 분석 결과:\n{summary.strip()}")
+                            img_idx += 1
+        finally:
+            wb.close()
 
     elif ext == "xls":
-        wb = xlrd.open_workbook(file_path)
-
-        for sheet in wb.sheets():
-            content_list.append(f"# 시트: {sheet.name}")
-            table_text = []
-
-            for row_idx in range(sheet.nrows):
-                row = sheet.row_values(row_idx)
-                row_text = " | ".join(str(cell) if cell != "" else "" for cell in row)
-                table_text.append(row_text)
-
-            if table_text:
-                content_list.append("[표 또는 셀 텍스트]")
-                content_list.append("\n".join(table_text))
+        wb = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            for sheet in wb.sheets():
+                yield from iter_sheet(sheet.name, (sheet.row_values(row_idx) for row_idx in range(sheet.nrows)))
+        finally:
+            # on_demand 모드는 파일을 열어 둔 채 시트를 읽으므로 직접 해제
+            wb.release_resources()
 
     else:
         raise ValueError("지원하지 않는 엑셀 형식입니다. xlsx 또는 xls 파일만 가능합니다.")
 
-    return "\n\n".join(content_list)
+def extract_xlsx_content(file_path: str, enable_image_analysis: bool = True) -> str:
+    return "".join(map(str, iter_xlsx_segments(file_path, enable_image_analysis=enable_image_analysis)))
 
 
 if __name__ == "__main__":
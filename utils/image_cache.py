@@ -0,0 +1,217 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+from utils.config import get_setting
+
+# 문서 간 공유하는 비전 모델 이미지 분석 결과 캐시
+CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "image_analysis_cache.sqlite3"
+)
+
+# 분석 결과 형식이 바뀌면 올려서 기존 캐시 무효화 (프롬프트 문구 변경은 자동 반영)
+IMAGE_PROMPT_VERSION = "v1"
+
+# dHash 격자 크기 (16 → 256비트)
+DHASH_SIZE = 16
+DHASH_BITS = DHASH_SIZE * DHASH_SIZE
+# 지각 해시로 비교할 최소 구조량 (256비트 중 1인 비트 수)
+MIN_DHASH_BITS = 16
+
+_local = threading.local()
+
+# 프롬프트 키별 지각 해시 색인 (프로세스 메모리, 조회 때마다 DB에 새로 추가된 행만 반영)
+_perceptual_indexes = {}
+_entries_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """스레드별 SQLite 연결"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_analysis ("
+            "content_hash TEXT NOT NULL, perceptual_hash TEXT, prompt_key TEXT NOT NULL, "
+            "result TEXT NOT NULL, PRIMARY KEY (content_hash, prompt_key))"
+        )
+        _local.conn = conn
+    return conn
+
+
+def make_prompt_key(model: str, prompt: str) -> str:
+    """모델 + 프롬프트 + 버전 기반 키 (프롬프트를 고치면 이전 결과는 쓰지 않음)"""
+    return hashlib.sha256(f"{IMAGE_PROMPT_VERSION}\0{model}\0{prompt}".encode("utf-8")).hexdigest()[:32]
+
+
+def get_dhash(image: Image.Image, size: int = DHASH_SIZE) -> str:
+    """
+    difference hash: 흑백 축소 이미지에서 가로로 인접한 픽셀 밝기 비교
+    해상도/포맷/압축만 다른 같은 이미지는 같은 값
+    """
+    gray = image.convert("L").resize((size + 1, size), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+
+def get_perceptual_hash(image: Image.Image):
+    """
+    dHash + 평균 색상(16단계) 조합
+    구조 정보가 거의 없는 단색/여백 이미지는 서로 다른 이미지끼리 같은 값이 나오므로 None
+    """
+    dhash = get_dhash(image)
+    if bin(int(dhash, 16)).count("1") < MIN_DHASH_BITS:
+        return None
+    mean_color = image.convert("RGB").resize((1, 1), Image.BOX).getpixel((0, 0))
+    return dhash + "-" + "".join(f"{channel >> 4:x}" for channel in mean_color)
+
+
+def get_image_hashes(image_path: str) -> tuple:
+    """(내용 해시, 지각 해시) 반환, 이미지로 열 수 없으면 지각 해시는 None"""
+    with open(image_path, "rb") as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    perceptual_hash = None
+    if get_setting("IMAGE_CACHE_PERCEPTUAL", True):
+        try:
+            with Image.open(image_path) as image:
+                perceptual_hash = get_perceptual_hash(image)
+        except Exception:
+            pass
+    return content_hash, perceptual_hash
+
+
+def _split_perceptual_hash(perceptual_hash: str) -> tuple:
+    dhash, color = perceptual_hash.split("-")
+    return int(dhash, 16), [int(c, 16) for c in color]
+
+
+def _is_near(a: tuple, b: tuple, max_distance: int) -> bool:
+    """dHash 해밍 거리와 평균 색상(채널당 1단계 이내)으로 같은 이미지인지 판단"""
+    if any(abs(x - y) > 1 for x, y in zip(a[1], b[1])):
+        return False
+    return bin(a[0] ^ b[0]).count("1") <= max_distance
+
+
+class _PerceptualIndex:
+    """
+    프롬프트 키 하나의 지각 해시 목록 (최근 max_entries개)
+    dHash를 max_distance + 1개 구간으로 나눠 구간 값별로 색인
+    해밍 거리가 max_distance 이하면 적어도 한 구간은 완전히 같으므로 (비둘기집 원리)
+    같은 구간 값을 가진 항목만 비교해도 놓치는 근접 일치가 없음
+    """
+
+    def __init__(self, max_distance: int, max_entries: int):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.max_rowid = 0
+        band_count = min(max_distance + 1, DHASH_BITS)
+        bounds = [DHASH_BITS * i // band_count for i in range(band_count + 1)]
+        self.bands = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        self.entries = OrderedDict()  # 내용 해시 → (지각 해시, 결과), 오래된 항목부터
+        self.buckets = [{} for _ in self.bands]
+
+    def _band_values(self, dhash: int):
+        return [(dhash >> start) & mask for start, mask in self.bands]
+
+    def _remove(self, content_hash: str):
+        (dhash, _), _ = self.entries.pop(content_hash)
+        for bucket, value in zip(self.buckets, self._band_values(dhash)):
+            members = bucket[value]
+            members.discard(content_hash)
+            if not members:
+                del bucket[value]
+
+    def add(self, content_hash: str, perceptual_hash: tuple, result: str):
+        if content_hash in self.entries:
+            self._remove(content_hash)
+        self.entries[content_hash] = (perceptual_hash, result)
+        for bucket, value in zip(self.buckets, self._band_values(perceptual_hash[0])):
+            bucket.setdefault(value, set()).add(content_hash)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def find(self, target: tuple):
+        candidates = set()
+        for bucket, value in zip(self.buckets, self._band_values(target[0])):
+            candidates.update(bucket.get(value, ()))
+        for content_hash in candidates:
+            entry, result = self.entries[content_hash]
+            if _is_near(target, entry, self.max_distance):
+                return result
+        return None
+
+
+def _find_near_match(prompt_key: str, target: tuple):
+    """
+    지각 해시 근접 일치 조회
+    다른 프로세스가 추가한 결과도 쓰도록 DB의 최대 rowid가 늘었으면 그 뒤의 행만 읽어 색인에 반영
+    """
+    max_distance = get_setting("IMAGE_CACHE_MAX_DISTANCE", 16)
+    max_entries = get_setting("IMAGE_CACHE_MAX_PERCEPTUAL_ENTRIES", 5000)
+    conn = _get_connection()
+    with _entries_lock:
+        current = conn.execute("SELECT MAX(rowid) FROM image_analysis").fetchone()[0] or 0
+        index = _perceptual_indexes.get(prompt_key)
+        # 설정이 바뀌었거나 캐시 파일이 새로 만들어졌으면 처음부터 다시 읽음
+        if (index is None or index.max_distance != max_distance or index.max_entries != max_entries
+                or current < index.max_rowid):
+            index = _PerceptualIndex(max_distance, max_entries)
+            _perceptual_indexes[prompt_key] = index
+        if current > index.max_rowid:
+            rows = conn.execute(
+                "SELECT content_hash, perceptual_hash, result FROM image_analysis "
+                "WHERE rowid > ? AND prompt_key = ? AND perceptual_hash IS NOT NULL "
+                "ORDER BY rowid DESC LIMIT ?",
+                (index.max_rowid, prompt_key, max_entries),
+            ).fetchall()
+            for content_hash, perceptual_hash, result in reversed(rows):
+                index.add(content_hash, _split_perceptual_hash(perceptual_hash), result)
+            index.max_rowid = current
+        return index.find(target)
+
+
+def get_cached_analysis(hashes: tuple, prompt_key: str, allow_near_match: bool = True):
+    """
+    같은 이미지의 분석 결과 조회, 없으면 None
+    1. 내용 해시 일치 (같은 파일 바이트)
+    2. allow_near_match면 지각 해시 근접 일치 (크기/압축만 다른 로고, 헤더 등)
+    """
+    content_hash, perceptual_hash = hashes
+    row = _get_connection().execute(
+        "SELECT result FROM image_analysis WHERE content_hash = ? AND prompt_key = ?",
+        (content_hash, prompt_key),
+    ).fetchone()
+    if row is not None:
+        return row[0]
+    if not (allow_near_match and perceptual_hash):
+        return None
+    return _find_near_match(prompt_key, _split_perceptual_hash(perceptual_hash))
+
+
+def put_cached_analysis(hashes: tuple, prompt_key: str, result: str):
+    content_hash, perceptual_hash = hashes
+    conn = _get_connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO image_analysis (content_hash, perceptual_hash, prompt_key, result) "
+            "VALUES (?, ?, ?, ?)",
+            (content_hash, perceptual_hash, prompt_key, result),
+        )
+
+
+def get_image_cache_stats() -> dict:
+    count = _get_connection().execute("SELECT COUNT(*) FROM image_analysis").fetchone()[0]
+    return {"entries": count}
+
+
+if __name__ == "__main__":
+    image = Image.new("RGB", (64, 64), "white")
+    print(get_dhash(image))
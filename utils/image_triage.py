@@ -0,0 +1,125 @@
+import numpy as np
+from PIL import Image
+from utils.config import get_setting
+
+# 이미지 분류 결과
+DECORATIVE = "decorative"  # 아이콘, 글머리 기호, 선, 배경 → 분석 생략
+PHOTO = "photo"            # 사진
+SHAPE = "shape"            # 글자 없는 단순 도형 (화살표, 상자, 원)
+CHART = "chart"            # 그래프, 표, 도식
+TEXT = "text"              # 글자 위주 캡처
+
+# 분류별 비전 모델 분석 모드 (None이면 분석하지 않음, 없는 분류는 호출한 쪽의 기본 모드)
+# 사진/단순 도형은 수치를 추출할 내용이 적으므로 짧은 설명만 요청하는 brief 모드 (출력 토큰 제한)
+# 차트/글자 이미지는 기본 모드, 상세 프롬프트를 쓰려면 settings.IMAGE_TRIAGE_MODES로 지정 (호출 비용 증가)
+TRIAGE_MODES = {
+    DECORATIVE: None,
+    PHOTO: "brief",
+    SHAPE: "brief",
+}
+
+# 특징 계산용 축소 크기
+THUMBNAIL_SIZE = 256
+# 장식용 판정 기본값 (settings의 IMAGE_TRIAGE_MIN_SIDE / MIN_ENTROPY / MIN_EDGE_DENSITY로 조정)
+# 이 크기보다 작은 변이 있으면 아이콘/선으로 간주
+MIN_SIDE = 48
+# 흑백 엔트로피가 이보다 낮으면 단색/여백
+MIN_ENTROPY = 0.1
+# 색 수가 적은 그래픽에서 경계 비율이 이보다 낮으면 배경/구분선 (사진에는 적용하지 않음)
+MIN_EDGE_DENSITY = 0.005
+# 인접 픽셀 밝기 차이가 이 값 이상이면 경계로 간주
+EDGE_THRESHOLD = 32
+# 단순 도형 판정: 색 수가 적은 그래픽 중 경계 비율과 흑백 엔트로피가 모두 이보다 낮으면 글자/수치가 없는 도형
+# (글자 라벨이 붙은 원그래프는 엔트로피가 2 이상, 막대그래프는 경계 비율이 0.05 안팎)
+SHAPE_MAX_EDGE_DENSITY = 0.02
+SHAPE_MAX_ENTROPY = 1.5
+
+
+def get_image_features(image: Image.Image) -> dict:
+    """
+    분류용 특징 (CPU만 사용, 이미지당 수 ms)
+    - entropy: 흑백 히스토그램 엔트로피 (단색 배경은 0에 가까움)
+    - colors: 채널당 5비트로 양자화한 고유 색상 수
+    - palette_coverage: 가장 많은 32개 색상이 차지하는 픽셀 비율
+      (그래픽은 JPEG 잡음으로 색 수가 늘어나도 소수 색상이 대부분을 차지, 사진은 낮음)
+    - edge_density: 경계 픽셀 비율 (글자/표 선이 많을수록 높음)
+    """
+    width, height = image.size
+    thumbnail = image.convert("RGB")
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    rgb = np.asarray(thumbnail, dtype=np.uint8)
+    gray = np.asarray(thumbnail.convert("L"), dtype=np.int16)
+
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    probabilities = histogram[histogram > 0] / gray.size
+    entropy = max(0.0, float(-(probabilities * np.log2(probabilities)).sum()))
+
+    quantized = (rgb >> 3).astype(np.int32)
+    packed = (quantized[..., 0] << 10) | (quantized[..., 1] << 5) | quantized[..., 2]
+    counts = np.unique(packed, return_counts=True)[1]
+    colors = int(counts.size)
+    palette_coverage = float(np.sort(counts)[-32:].sum() / packed.size)
+
+    edges = np.zeros(gray.shape, dtype=bool)
+    if gray.shape[1] > 1:
+        edges[:, 1:] |= np.abs(np.diff(gray, axis=1)) >= EDGE_THRESHOLD
+    if gray.shape[0] > 1:
+        edges[1:, :] |= np.abs(np.diff(gray, axis=0)) >= EDGE_THRESHOLD
+    edge_density = float(edges.mean())
+
+    return {
+        "width": width, "height": height, "entropy": entropy, "colors": colors,
+        "palette_coverage": palette_coverage, "edge_density": edge_density,
+    }
+
+
+def classify_features(features: dict) -> str:
+    if min(features["width"], features["height"]) < get_setting("IMAGE_TRIAGE_MIN_SIDE", MIN_SIDE):
+        return DECORATIVE
+    # 단색 배경/여백
+    if features["entropy"] < get_setting("IMAGE_TRIAGE_MIN_ENTROPY", MIN_ENTROPY):
+        return DECORATIVE
+    graphic = features["colors"] <= 512 or features["palette_coverage"] >= 0.8
+    if not graphic:
+        # 색이 다양하면 초점이 흐린 사진처럼 경계가 거의 없어도 사진으로 분석
+        return PHOTO
+    # 그라데이션 배경, 구분선 (흰 바탕의 얇은 선 도식은 엔트로피가 낮아도 경계가 있으므로 유지)
+    if features["edge_density"] < get_setting("IMAGE_TRIAGE_MIN_EDGE_DENSITY", MIN_EDGE_DENSITY):
+        return DECORATIVE
+    if features["edge_density"] < SHAPE_MAX_EDGE_DENSITY and features["entropy"] < SHAPE_MAX_ENTROPY:
+        return SHAPE
+    # 색 수가 적은 그래픽: 경계가 아주 많으면 글자 위주, 아니면 차트/표
+    return TEXT if features["edge_density"] >= 0.12 else CHART
+
+
+def classify_image(image_path: str) -> str:
+    """이미지 파일을 decorative / photo / shape / chart / text 중 하나로 분류 (열 수 없으면 chart)"""
+    try:
+        with Image.open(image_path) as image:
+            return classify_features(get_image_features(image))
+    except Exception:
+        # 판단할 수 없으면 정보를 잃지 않도록 생략하지 않음
+        return CHART
+
+
+def get_triage_mode(image_path: str, default_mode: str = "simple"):
+    """
+    이미지에 맞는 분석 모드 반환 (None이면 비전 모델 호출 생략)
+    분류별 모드는 TRIAGE_MODES 기본값에 IMAGE_TRIAGE_MODES를 덮어써서 결정, 둘 다 없는 분류는 default_mode
+    IMAGE_TRIAGE_ENABLED=False면 항상 default_mode
+    """
+    if not get_setting("IMAGE_TRIAGE_ENABLED", True):
+        return default_mode
+    category = classify_image(image_path)
+    modes = {**TRIAGE_MODES, **get_setting("IMAGE_TRIAGE_MODES", {})}
+    mode = modes.get(category, default_mode)
+    print(f"[이미지 분류] {image_path}: {category} → {mode or '생략'}")
+    return mode
+
+
+if __name__ == "__main__":
+    import sys
+    for path in sys.argv[1:]:
+        with Image.open(path) as image:
+            features = get_image_features(image)
+        print(path, classify_features(features), features)
@@ -1,6 +1,35 @@
+import os
 import base64
+import shutil
+import asyncio
+import tempfile
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
 from langchain_core.messages import HumanMessage
 from langchain_ollama import ChatOllama
+from utils.config import get_setting
+from utils.image_triage import get_triage_mode
+from utils.image_cache import get_image_hashes, make_prompt_key, get_cached_analysis, put_cached_analysis
+
+
+# 추출한 이미지 임시 저장 위치 (작업마다 하위 폴더를 따로 만들어 사용)
+IMAGE_OUTPUT_ROOT = "temp_imgs"
+
+
+@contextmanager
+def image_output_dir(prefix: str = "extract_"):
+    """
+    추출 작업 하나가 쓸 이미지 임시 폴더 (동시에 실행되는 워커끼리 파일명이 겹치지 않음)
+    작업이 끝나면 폴더째 삭제 (분석 결과는 이미지 캐시에 남음)
+    """
+    os.makedirs(IMAGE_OUTPUT_ROOT, exist_ok=True)
+    path = tempfile.mkdtemp(prefix=prefix, dir=IMAGE_OUTPUT_ROOT)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
 
 
 def image_to_base64(image_path: str) -> str:
@@ -11,14 +40,15 @@ def image_to_base64(image_path: str) -> str:
         return base64.b64encode(f.read()).decode("utf-8")
 
 
-def analyze_image_with_qwen(image_path: str, model: str = "qwen2.5vl:3b", mode: str = "simple") -> str:
+def get_image_analysis_prompt(mode: str = "simple") -> str:
     """
-    Qwen2.5-VL 모델을 통해 이미지 분석 결과를 반환
+    분석 모드별 이미지 분석 프롬프트
     """
     if mode == "simple" :
-        IMAGE_ANALYSIS_PROMPT = "이미지를 복원해주세요. 어떤 이미지인지 분석한 결과를 반환하세요."
-    else :
-        IMAGE_ANALYSIS_PROMPT = (
+        return "이미지를 복원해주세요. 어떤 이미지인지 분석한 결과를 반환하세요."
+    if mode == "brief":
+        return "이미지에 무엇이 있는지 한두 문장으로 간단히 설명하세요. 이미지 안에 글자가 있으면 그대로 적어주세요."
+    return (
     "이미지가 특정 사물만 나오면 사물이 무엇인 지 간단하게 반환해주세요.\n"
     "분석하기 복잡한 이미지라면 빈 문자열로 대체합니다.\n"
     "\n"
@@ -33,16 +63,223 @@ def analyze_image_with_qwen(image_path: str, model: str = "qwen2.5vl:3b", mode:
     "숫자, 수치, 배열 등은 생략 없이 모두 보여주세요.\n"
     "같은 말을 반복하지 마세요."
     )
+
+
+def _build_image_message(image_path: str, mode: str) -> HumanMessage:
     base64_img = image_to_base64(image_path)
-    llm = ChatOllama(model=model)
-    message = HumanMessage(
+    return HumanMessage(
         content=[
             {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64_img}"}},
-            {"type": "text", "text": IMAGE_ANALYSIS_PROMPT}
+            {"type": "text", "text": get_image_analysis_prompt(mode)}
         ]
     )
-    response = llm.invoke([message])
+
+
+def _build_image_llm(model: str, mode: str) -> ChatOllama:
+    """brief 모드는 짧은 설명만 필요하므로 출력 토큰 수 제한 (IMAGE_BRIEF_MAX_TOKENS)"""
+    if mode == "brief":
+        return ChatOllama(model=model, num_predict=get_setting("IMAGE_BRIEF_MAX_TOKENS", 128))
+    return ChatOllama(model=model)
+
+
+def _allow_near_match(mode: str) -> bool:
+    """
+    지각 해시 근접 일치는 simple/brief 모드만 허용
+    상세 모드는 숫자/표 값을 추출하므로 수치만 다른 비슷한 이미지의 결과를 재사용하면 안 됨
+    """
+    return mode in ("simple", "brief")
+
+
+class ImageAnalysisLimiter:
+    """
+    프로세스 전체의 비전 모델 동시 요청 수 제한 (IMAGE_ANALYSIS_CONCURRENCY)
+    문서마다 별도 스레드/이벤트 루프(asyncio.run)에서 분석하더라도 같은 슬롯을 나눠 씀
+    슬롯이 나면 대기 순서대로 넘겨주며, 비동기 대기는 이벤트 루프를 막지 않음
+    """
+
+    def __init__(self, limit: int):
+        self._lock = threading.Lock()
+        self._available = limit
+        self._waiters = deque()  # (이벤트 루프, future) 또는 (None, threading.Event)
+
+    def acquire(self):
+        """동기 대기 (스레드에서 호출)"""
+        with self._lock:
+            if self._available > 0:
+                self._available -= 1
+                return
+            event = threading.Event()
+            self._waiters.append((None, event))
+        event.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._available > 0:
+                self._available -= 1
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            # 취소 직전에 슬롯을 넘겨받았으면 반납 (넘겨받기 전이면 _grant에서 반납)
+            if not queued and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def _grant(self, future):
+        if future.cancelled():
+            self.release()
+        elif not future.done():
+            future.set_result(None)
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if loop is None:
+                    waiter.set()
+                    return
+                try:
+                    loop.call_soon_threadsafe(self._grant, waiter)
+                    return
+                except RuntimeError:
+                    # 이벤트 루프가 이미 닫힘 → 다음 대기자에게
+                    continue
+            self._available += 1
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_image_analysis_limiter() -> ImageAnalysisLimiter:
+    """프로세스 공용 비전 모델 요청 제한 (처음 사용할 때 IMAGE_ANALYSIS_CONCURRENCY로 생성)"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ImageAnalysisLimiter(get_setting("IMAGE_ANALYSIS_CONCURRENCY", 3))
+        return _limiter
+
+
+def analyze_image_with_qwen(image_path: str, model: str = "qwen2.5vl:3b", mode: str = "simple") -> str:
+    """
+    Qwen2.5-VL 모델을 통해 이미지 분석 결과를 반환
+    같은 이미지(내용/지각 해시)와 프롬프트의 이전 분석 결과가 있으면 재사용
+    mode="auto"면 이미지 분류 결과로 모드 결정 (장식용 이미지는 빈 문자열)
+    """
+    if mode == "auto":
+        mode = get_triage_mode(image_path)
+        if mode is None:
+            return ""
+    hashes = get_image_hashes(image_path)
+    prompt_key = make_prompt_key(model, get_image_analysis_prompt(mode))
+    cached = get_cached_analysis(hashes, prompt_key, allow_near_match=_allow_near_match(mode))
+    if cached is not None:
+        return cached
+
+    llm = _build_image_llm(model, mode)
+    with get_image_analysis_limiter().slot():
+        response = llm.invoke([_build_image_message(image_path, mode)])
+    put_cached_analysis(hashes, prompt_key, response.content)
     return response.content
 
+
+# 이벤트 루프별 진행 중인 분석 (같은 이미지가 동시에 여러 번 요청되면 한 번만 호출)
+_inflight = weakref.WeakKeyDictionary()
+
+
+async def aanalyze_image_with_qwen(image_path: str, model: str = "qwen2.5vl:3b", mode: str = "simple", timeout: float = None) -> str:
+    """
+    analyze_image_with_qwen 비동기 버전 (Ollama 응답을 기다리는 동안 다른 이미지 요청 진행)
+    timeout(초)을 넘기면 요청을 취소하고 asyncio.TimeoutError (기본값 IMAGE_ANALYSIS_TIMEOUT)
+    """
+    timeout = timeout or get_setting("IMAGE_ANALYSIS_TIMEOUT", 180)
+    if mode == "auto":
+        mode = get_triage_mode(image_path)
+        if mode is None:
+            return ""
+    hashes = get_image_hashes(image_path)
+    prompt_key = make_prompt_key(model, get_image_analysis_prompt(mode))
+    cached = get_cached_analysis(hashes, prompt_key, allow_near_match=_allow_near_match(mode))
+    if cached is not None:
+        return cached
+
+    inflight = _inflight.setdefault(asyncio.get_running_loop(), {})
+    # 근접 일치를 허용하지 않는 모드(상세 분석)는 같은 파일 내용끼리만 결과 공유
+    near = _allow_near_match(mode) and hashes[1]
+    key = (hashes[1] if near else hashes[0], prompt_key)
+    if key in inflight:
+        return await asyncio.shield(inflight[key])
+
+    async def run():
+        llm = _build_image_llm(model, mode)
+        # 제한 시간은 슬롯을 얻은 뒤 실제 요청에만 적용
+        async with get_image_analysis_limiter():
+            response = await asyncio.wait_for(llm.ainvoke([_build_image_message(image_path, mode)]), timeout)
+        put_cached_analysis(hashes, prompt_key, response.content)
+        return response.content
+
+    task = asyncio.ensure_future(run())
+    inflight[key] = task
+    task.add_done_callback(lambda _: inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def get_image_analysis_semaphore(max_concurrency: int = None) -> asyncio.Semaphore:
+    """
+    한 번의 분석 호출(문서 하나) 안에서 동시에 진행할 이미지 수 제한용 세마포어 (현재 이벤트 루프에서 생성)
+    여러 문서에 걸친 실제 모델 요청 수는 get_image_analysis_limiter가 제한
+    """
+    return asyncio.Semaphore(max_concurrency or get_setting("IMAGE_ANALYSIS_CONCURRENCY", 3))
+
+
+async def analyze_image_bounded(image_path: str, semaphore: asyncio.Semaphore, mode: str = "simple",
+                                model: str = "qwen2.5vl:3b", timeout: float = None) -> str:
+    async with semaphore:
+        return await aanalyze_image_with_qwen(image_path, model=model, mode=mode, timeout=timeout)
+
+
+async def analyze_images_async(image_paths: list, mode: str = "simple", max_concurrency: int = None,
+                               timeout: float = None) -> list:
+    """
+    여러 이미지를 동시 요청 수를 제한하여 분석
+    입력 순서대로 결과 반환 (실패/시간 초과한 이미지는 예외 객체)
+    """
+    semaphore = get_image_analysis_semaphore(max_concurrency)
+    tasks = [analyze_image_bounded(path, semaphore, mode=mode, timeout=timeout) for path in image_paths]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def analyze_images_bounded(image_paths: list, mode: str = "simple", max_concurrency: int = None,
+                           timeout: float = None) -> list:
+    """
+    analyze_images_async 동기 진입점 (추출기에서 사용)
+    """
+    if not image_paths:
+        return []
+    return asyncio.run(analyze_images_async(image_paths, mode=mode, max_concurrency=max_concurrency, timeout=timeout))
+
 if __name__ == "__main__" :
     print(analyze_image_with_qwen("sample_inputs/sample.png"))
@@ -0,0 +1,130 @@
+import os
+import time
+import socket
+import threading
+import multiprocessing
+from datetime import timedelta
+
+
+def get_worker_name(prefix: str, index: int) -> str:
+    """워커 식별 이름 (호스트:pid:번호)"""
+    return f"{prefix}@{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def poll_jobs(claim_job, run_job, worker_name: str, poll_interval: float = 2.0, max_jobs: int = None):
+    """
+    DB 작업 큐 폴링 루프
+    claim_job(worker_name) → 작업 또는 None, run_job(job) → 작업 처리
+    """
+    handled = 0
+    while max_jobs is None or handled < max_jobs:
+        job = claim_job(worker_name)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        handled += 1
+
+
+def close_db_connection():
+    """현재 스레드의 Django DB 연결 닫기 (작업 스레드 종료 시 연결이 남지 않도록)"""
+    try:
+        from django.db import connection
+        from django.core.exceptions import ImproperlyConfigured
+    except ImportError:
+        return
+    try:
+        connection.close()
+    except ImproperlyConfigured:
+        # Django 설정 없이 단독 실행한 경우 (스크립트 실행 등)
+        pass
+
+
+def start_heartbeat(beat, interval: float):
+    """
+    작업 처리 중 interval초마다 beat()를 호출하는 스레드 시작 (워커가 살아 있음을 DB에 기록)
+    반환된 함수를 호출하면 중지
+    """
+    stop = threading.Event()
+
+    def run():
+        try:
+            while not stop.wait(interval):
+                try:
+                    beat()
+                except Exception as e:
+                    print(f"[하트비트 기록 실패: {e}]")
+        finally:
+            close_db_connection()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    def cancel():
+        stop.set()
+        thread.join()
+    return cancel
+
+
+def get_stale_cutoff(stale_seconds: float):
+    """이 시각 이전에 마지막 하트비트가 기록된 처리 중 작업은 워커가 죽은 것으로 간주"""
+    from django.utils import timezone
+    return timezone.now() - timedelta(seconds=stale_seconds)
+
+
+def get_active_job_filter(stale_seconds: float):
+    """대기 중이거나 하트비트가 살아 있는 처리 중 작업 조건 (중복 등록 방지/처리 중 안내용)"""
+    from django.db.models import Q
+    return Q(status='queued') | Q(status='running', heartbeat_date__gte=get_stale_cutoff(stale_seconds))
+
+
+def reap_stale_jobs(model, stale_seconds: float, max_attempts: int) -> tuple:
+    """
+    하트비트가 stale_seconds 넘게 끊긴 처리 중 작업 정리 (워커 비정상 종료, 메모리 부족 등)
+    시도 횟수가 max_attempts 미만이면 다시 대기열로, 아니면 실패 처리
+    반환: (재등록 수, 실패 처리 수)
+    """
+    from django.db.models import Q
+    from django.utils import timezone
+
+    cutoff = get_stale_cutoff(stale_seconds)
+    stale = model.objects.filter(status='running').filter(
+        Q(heartbeat_date__lt=cutoff) | Q(heartbeat_date__isnull=True, started_date__lt=cutoff)
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(status='queued', worker='', started_date=None)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='failed', error_message="작업 처리 중 워커가 응답하지 않습니다.", completed_date=timezone.now()
+    )
+    if requeued or failed:
+        print(f"[중단된 작업 정리] {model.__name__}: 재등록 {requeued}개, 실패 {failed}개")
+    return requeued, failed
+
+
+def run_worker_pool(target, workers: int):
+    """
+    target(index)를 실행하는 워커 프로세스 workers개를 띄우고 종료까지 대기
+    Ctrl+C 시 모든 워커 종료
+    """
+    # 포크 전에 부모의 DB 연결을 닫아 자식 프로세스와 공유되지 않도록 함
+    try:
+        from django.db import connections
+        connections.close_all()
+    except ImportError:
+        pass
+
+    processes = []
+    for index in range(workers):
+        process = multiprocessing.Process(target=target, args=(index,), daemon=False)
+        process.start()
+        processes.append(process)
+    print(f"[워커 {workers}개 시작]")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("[워커 종료 중]")
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
@@ -1,58 +1,158 @@
 # run_feedback_pipeline.py
 
 import os
-from utils.video_processor import extract_audio, transcribe_audio, summarize_transcript
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.video_processor import AUDIO_OUTPUT_DIR, extract_audio, transcribe_audio, summarize_transcript
 from utils.audio_analysis import analyze_audio_features
 from utils.pose_analysis import analyze_visual_features
 from utils.feedback_generator import generate_feedback
+from utils.job_worker import close_db_connection
 
 # from video_processor import extract_audio, transcribe_audio, summarize_transcript
 # from audio_analysis import analyze_audio_features
 # from pose_analysis import analyze_visual_features
 # from feedback_generator import generate_feedback
 
-def run_feedback_pipeline(video_path: str):
+# 진행 상황 표시용 단계 이름
+STAGE_LABELS = {
+    "extract_audio": "오디오 추출",
+    "transcribe": "음성 인식",
+    "summarize": "원고 요약",
+    "audio_features": "음성 분석",
+    "visual_features": "영상 자세 분석",
+    "feedback": "종합 피드백 생성",
+}
+
+
+def run_stage_graph(stages: dict, on_stage=None) -> tuple:
+    """
+    의존 관계가 있는 단계들을 스레드 풀에서 실행 (DAG)
+    stages: 이름 → (선행 단계 이름 튜플, 함수), 함수는 선행 단계 결과를 순서대로 인자로 받음
+    선행 단계가 모두 끝난 단계는 바로 시작하므로 서로 무관한 단계는 동시에 실행됨
+    on_stage(이름, "started" | "done" | "failed", 경과 초) 콜백으로 단계별 진행 상황 전달 (콜백 예외는 출력만 함)
+    한 단계가 실패하면 아직 시작하지 않은 단계는 실행하지 않고 예외를 다시 발생시킴
+    반환: (단계별 결과, 단계별 소요 시간(초))
+    """
+    results = {}
+    timings = {}
+    started_at = {}
+    pending = dict(stages)
+    running = {}
+
+    def notify(name, status):
+        if not on_stage:
+            return
+        # 진행 상황 기록(DB 저장 등)이 실패해도 단계 실행에는 영향을 주지 않음
+        try:
+            on_stage(name, status, timings.get(name, 0.0))
+        except Exception as e:
+            print(f"[단계 진행 상황 전달 실패] {name} {status}: {e}")
+
+    def run_stage(name, func, args):
+        started_at[name] = time.perf_counter()
+        notify(name, "started")
+        try:
+            return func(*args)
+        finally:
+            timings[name] = round(time.perf_counter() - started_at[name], 2)
+            # 단계 스레드에서 연 DB 연결이 남지 않도록 정리
+            close_db_connection()
+
+    with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+        while pending or running:
+            for name, (deps, func) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    args = [results[dep] for dep in deps]
+                    running[pool.submit(run_stage, name, func, args)] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"실행할 수 없는 단계가 있습니다: {list(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    notify(name, "failed")
+                    # 실행 중인 단계는 끝날 때까지 기다린 뒤 예외 전달 (with 블록 종료 시 대기)
+                    pending.clear()
+                    raise error
+                results[name] = future.result()
+                notify(name, "done")
+    return results, timings
+
+
+def run_feedback_pipeline(video_path: str, on_progress=None):
+    """
+    발표 영상 분석: 음성 분기(오디오 추출 → 음성 인식 → 요약, 음성 특성 분석)와 영상 자세 분석을 동시에 실행
+    on_progress(단계 이름, 상태, 완료 단계 수, 전체 단계 수)로 진행 상황 전달
+    결과의 timings에 단계별 소요 시간(초)과 전체 소요 시간(total) 포함
+    """
     if not os.path.exists(video_path):
         print(f"❌ 영상 파일이 존재하지 않습니다: {video_path}")
         return
 
     print(f"📽️ 영상 분석을 시작합니다: {video_path}")
 
-    # 1. 오디오 추출
-    audio_path = extract_audio(video_path)
-    print(f"🔊 오디오 추출 완료: {audio_path}")
+    # 여러 워커가 동시에 분석해도 겹치지 않도록 실행마다 별도의 오디오 파일 사용
+    os.makedirs(AUDIO_OUTPUT_DIR, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    audio_output = os.path.join(AUDIO_OUTPUT_DIR, f"{stem}_{uuid.uuid4().hex[:8]}.wav")
 
-    # 2. STT → 전체 텍스트 변환
-    transcript = transcribe_audio(audio_path)
-    print("📝 변환된 발표 원고 일부:\n", transcript[:300], "...\n")
+    stages = {
+        # 1. 오디오 추출
+        "extract_audio": ((), lambda: extract_audio(video_path, audio_output)),
+        # 2. STT → 전체 텍스트 변환
+        "transcribe": (("extract_audio",), transcribe_audio),
+        # 3. 텍스트 요약
+        "summarize": (("transcribe",), summarize_transcript),
+        # 4. 오디오 특성 분석 (음성 인식과 동시에)
+        "audio_features": (("extract_audio",), analyze_audio_features),
+        # 5. 영상 기반 시각 피드백 분석 (오디오와 무관하므로 처음부터 동시에)
+        "visual_features": ((), lambda: analyze_visual_features(video_path)),
+        # 6. 종합 피드백 생성
+        "feedback": (("summarize", "audio_features", "visual_features"), generate_feedback),
+    }
+    completed = []
 
-    # 3. 텍스트 요약
-    summary = summarize_transcript(transcript)
-    print("📌 요약 결과:\n", summary, "\n")
+    def on_stage(name, status, elapsed):
+        if status == "done":
+            completed.append(name)
+            print(f"⏱️ {STAGE_LABELS[name]} 완료 ({elapsed:.1f}초)")
+        if on_progress:
+            on_progress(name, status, len(completed), len(stages))
 
-    # 4. 오디오 특성 분석
-    audio_features = analyze_audio_features(audio_path)
+    started = time.perf_counter()
+    try:
+        results, timings = run_stage_graph(stages, on_stage=on_stage)
+    finally:
+        if os.path.exists(audio_output):
+            os.remove(audio_output)
+    timings["total"] = round(time.perf_counter() - started, 2)
+
+    print(f"🔊 오디오 추출 완료: {results['extract_audio']}")
+    print("📝 변환된 발표 원고 일부:\n", results["transcribe"][:300], "...\n")
+    print("📌 요약 결과:\n", results["summarize"], "\n")
     print("🎧 음성 분석 결과:")
-    for k, v in audio_features.items():
+    for k, v in results["audio_features"].items():
         print(f"- {k}: {v}")
-
-    # 5. 영상 기반 시각 피드백 분석
-    visual_features = analyze_visual_features(video_path)
     print("🧍 시각 분석 결과:")
-    for k, v in visual_features.items():
+    for k, v in results["visual_features"].items():
         print(f"- {k}: {v}")
 
-    # 6. 종합 피드백 생성
-    feedback = generate_feedback(summary, audio_features, visual_features)
     result = {
-        "transcript": transcript,
-        "summary": summary,
-        "audio_features": audio_features,
-        "visual_features": visual_features,
-        "feedback": feedback,
+        "transcript": results["transcribe"],
+        "summary": results["summarize"],
+        "audio_features": results["audio_features"],
+        "visual_features": results["visual_features"],
+        "feedback": results["feedback"],
+        "timings": timings,
     }
     print("\n✅ 종합 피드백 결과:\n")
-    print(feedback)
+    print(results["feedback"])
+    print(f"⏱️ 단계별 소요 시간: {timings}")
     return result
 
 
@@ -0,0 +1,212 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+
+# 컬렉션별 희소(BM25) 인덱스 저장 위치
+SPARSE_INDEX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sparse_index"
+)
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 영문/숫자 식별자(제품코드 AB-1234, 2024.08 등)와 한글 어절
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*|[가-힣]+")
+_IDENTIFIER_SPLIT = re.compile(r"[-_./]")
+
+# 어절 끝에서 떼어낼 조사/어미 (긴 것부터 검사)
+_JOSA = sorted([
+    "에서부터", "으로부터", "에게서", "까지는", "에서는", "으로는", "이라는", "이라고",
+    "에서", "에게", "으로", "까지", "부터", "보다", "처럼", "라는", "이나", "이며", "하고",
+    "은", "는", "이", "가", "을", "를", "에", "의", "로", "와", "과", "도", "만", "나",
+], key=len, reverse=True)
+_JOSA_SET = set(_JOSA)
+
+# 컬렉션 이름 → (파일 버전, 인덱스), 다른 프로세스(벡터화 워커)가 파일을 바꾸면 다시 로드
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _strip_josa(word: str) -> str:
+    for josa in _JOSA:
+        if len(word) > len(josa) + 1 and word.endswith(josa):
+            return word[:-len(josa)]
+    return word
+
+
+def tokenize(text: str) -> list:
+    """
+    한국어 문서용 토크나이저
+    - 한글 어절: 조사 제거한 어간 + 글자 바이그램 (복합명사 부분 일치)
+    - 영문/숫자 식별자: 원형 + 구분자로 나눈 조각
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer((text or "").lower()):
+        word = match.group()
+        if "가" <= word[0] <= "힣":
+            if word in _JOSA_SET:
+                continue
+            stem = _strip_josa(word)
+            tokens.append(stem)
+            if len(stem) > 2:
+                tokens.extend(stem[i:i + 2] for i in range(len(stem) - 1))
+        else:
+            tokens.append(word)
+            parts = _IDENTIFIER_SPLIT.split(word)
+            if len(parts) > 1:
+                tokens.extend(part for part in parts if part)
+    return tokens
+
+
+class SparseIndex:
+    """청크 id(Qdrant 포인트 id) 기준 BM25 역색인"""
+    def __init__(self):
+        self.doc_terms = {}   # doc_id -> {term: tf}
+        self.postings = {}    # term -> {doc_id: tf}
+        self.doc_lengths = {}  # doc_id -> 토큰 수
+        self.total_length = 0
+
+    def add(self, doc_id, text: str):
+        self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        self._insert(doc_id, dict(terms))
+
+    def _insert(self, doc_id, terms: dict):
+        self.doc_terms[doc_id] = terms
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.doc_lengths[doc_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc_id]
+
+    def remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if not terms:
+            return
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id, 0)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """(doc_id, bm25 점수) 목록을 점수 내림차순으로 반환"""
+        n_docs = len(self.doc_terms)
+        if n_docs == 0:
+            return []
+        avg_length = self.total_length / n_docs or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def to_dict(self) -> dict:
+        return {"doc_terms": {str(doc_id): terms for doc_id, terms in self.doc_terms.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SparseIndex":
+        index = cls()
+        for doc_id, terms in data.get("doc_terms", {}).items():
+            doc_id = int(doc_id) if doc_id.isdigit() else doc_id
+            index._insert(doc_id, terms)
+        return index
+
+
+def _index_path(collection_name: str) -> str:
+    return os.path.join(SPARSE_INDEX_DIR, f"{collection_name}.json")
+
+
+def _save(collection_name: str, index: SparseIndex):
+    os.makedirs(SPARSE_INDEX_DIR, exist_ok=True)
+    path = _index_path(collection_name)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def _file_version(collection_name: str):
+    """인덱스 파일의 (수정 시각, 크기), 파일이 없으면 None"""
+    try:
+        stat = os.stat(_index_path(collection_name))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_sparse_index(collection_name: str):
+    """
+    컬렉션의 희소 인덱스 로드 (메모리 캐시, 없으면 None)
+    파일 수정 시각/크기가 캐시와 다르면 다른 프로세스가 다시 만든 것이므로 새로 로드
+    """
+    version = _file_version(collection_name)
+    with _indexes_lock:
+        if version is None:
+            _indexes.pop(collection_name, None)
+            return None
+        cached = _indexes.get(collection_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            with open(_index_path(collection_name), "r", encoding="utf-8") as f:
+                index = SparseIndex.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return None
+        _indexes[collection_name] = (version, index)
+        return index
+
+
+def save_sparse_index(collection_name: str, index: SparseIndex) -> SparseIndex:
+    """완성된 인덱스를 저장하고 메모리 캐시 교체 (스트리밍 적재 중 직접 만든 인덱스용)"""
+    _save(collection_name, index)
+    with _indexes_lock:
+        _indexes[collection_name] = (_file_version(collection_name), index)
+    print(f"[희소 인덱스 생성: {collection_name}, {len(index.doc_terms)}개 청크]")
+    return index
+
+
+def build_sparse_index(collection_name: str, documents: list) -> SparseIndex:
+    """청크 Document 목록으로 컬렉션의 희소 인덱스를 새로 생성하여 저장"""
+    index = SparseIndex()
+    for doc in documents:
+        index.add(doc.metadata["order"], doc.page_content)
+    return save_sparse_index(collection_name, index)
+
+
+def delete_sparse_index(collection_name: str):
+    with _indexes_lock:
+        _indexes.pop(collection_name, None)
+    try:
+        os.remove(_index_path(collection_name))
+    except OSError:
+        pass
+
+
+def reciprocal_rank_fusion(rankings: list, k: int, rrf_k: int = 60) -> list:
+    """
+    여러 검색 결과(id 목록, 순위 순)를 RRF(Reciprocal Rank Fusion)로 합쳐 (id, 융합 점수) 상위 k개 반환
+    각 목록에서 순위 r(0부터)인 id는 1 / (rrf_k + r + 1)점을 받고, 여러 목록에 나오면 점수를 더함
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+if __name__ == "__main__":
+    print(tokenize("2024년 매출보고서에서 제품코드 AB-1234의 판매량은?"))
+    index = SparseIndex()
+    index.add(0, "제품코드 AB-1234 판매량은 320개입니다.")
+    index.add(1, "2024년 매출보고서 요약")
+    print(index.search("AB-1234 판매량"))
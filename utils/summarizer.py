@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from langchain_core.messages import HumanMessage, SystemMessage
+from utils.chunk_utils import estimate_tokens
+from utils.config import get_setting
+
+# 부분 요약 캐시 위치 (컬렉션별 JSON)
+SUMMARY_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "summary_cache"
+)
+
+# 부분 요약 프롬프트를 바꾸면 올려서 기존 캐시 무효화
+MAP_PROMPT_VERSION = "v1"
+
+MAP_SYSTEM_PROMPT = (
+    "당신은 문서 요약 도우미입니다. 반드시 한국어로만 작성하세요. "
+    "중국어, 영어 등 다른 언어는 사용하지 마세요."
+)
+
+MAP_USER_PROMPT = """아래는 긴 문서의 일부입니다. 이후 전체 요약과 보고서 작성에 사용할 수 있도록
+핵심 내용을 한국어로 정리해주세요.
+- 주요 주제, 주장, 결론을 빠짐없이 포함하세요
+- 숫자, 날짜, 고유명사, 표의 핵심 수치는 그대로 남기세요
+- 문서에 없는 내용은 추가하지 마세요
+
+문서 일부:
+{text}
+
+한국어 핵심 정리:"""
+
+_cache_lock = threading.Lock()
+
+
+def _cache_path(cache_name: str) -> str:
+    return os.path.join(SUMMARY_CACHE_DIR, f"{cache_name}.json")
+
+
+def _load_cache(cache_name: str) -> dict:
+    try:
+        with open(_cache_path(cache_name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_name: str, new_items: dict):
+    """다른 요청이 쓴 항목과 합쳐서 저장"""
+    with _cache_lock:
+        cache = _load_cache(cache_name)
+        cache.update(new_items)
+        os.makedirs(SUMMARY_CACHE_DIR, exist_ok=True)
+        path = _cache_path(cache_name)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+
+def _cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{MAP_PROMPT_VERSION}\0{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def iter_groups(texts, token_budget: int):
+    """순서를 유지하며 인접 텍스트를 토큰 예산 단위 그룹으로 묶기 (텍스트를 받는 대로 그룹 반환)"""
+    current = []
+    used = 0
+    for text in texts:
+        cost = estimate_tokens(text)
+        if current and used + cost > token_budget:
+            yield "\n\n".join(current)
+            current = []
+            used = 0
+        current.append(text)
+        used += cost
+    if current:
+        yield "\n\n".join(current)
+
+
+def group_texts(texts: list, token_budget: int) -> list:
+    """순서를 유지하며 인접 텍스트를 토큰 예산 단위 그룹으로 묶기"""
+    return list(iter_groups(texts, token_budget))
+
+
+def _summarize_group(llm, text: str) -> str:
+    messages = [
+        SystemMessage(content=MAP_SYSTEM_PROMPT),
+        HumanMessage(content=MAP_USER_PROMPT.format(text=text)),
+    ]
+    return llm.invoke(messages).content.strip()
+
+
+def _map_groups(llm, groups, cache: dict, cache_name: str, max_workers: int) -> list:
+    """
+    그룹을 받는 대로 부분 요약 요청 (캐시에 있는 그룹은 건너뜀)
+    원문이 한꺼번에 메모리에 쌓이지 않도록 동시에 진행 중인 그룹은 워커 수의 두 배까지만 유지
+    반환: (캐시 키 목록, 캐시된 그룹 수)
+    """
+    model = getattr(llm, "model", "")
+    keys = []
+    new_items = {}
+    pending = {}
+
+    def collect(done):
+        for future in done:
+            new_items[pending.pop(future)] = future.result()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for group in groups:
+            key = _cache_key(model, group)
+            keys.append(key)
+            if key in cache or key in new_items or key in pending.values():
+                continue
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[executor.submit(_summarize_group, llm, group)] = key
+        collect(wait(pending).done)
+
+    if new_items:
+        cache.update(new_items)
+        _save_cache(cache_name, new_items)
+    return keys, len(keys) - len(new_items)
+
+
+def map_reduce_summaries(llm, texts, cache_name: str, final_budget: int) -> list:
+    """
+    긴 문서를 계층적으로 요약
+    1. map: 청크를 그룹으로 묶어 병렬(동시 요청 수 제한)로 부분 요약 (texts는 이터러블이어도 되며 받는 대로 요약 시작)
+    2. reduce: 부분 요약 전체가 final_budget을 넘으면 다시 묶어서 요약 반복
+    부분 요약은 컬렉션별로 캐시되어 같은 파일의 후속 요청에서 재사용
+    """
+    group_budget = get_setting("SUMMARY_GROUP_TOKENS", 3000)
+    max_workers = get_setting("SUMMARY_MAX_WORKERS", 3)
+    cache = _load_cache(cache_name)
+
+    level = 1
+    partials = texts
+    while True:
+        input_count = 0
+
+        def counted(items):
+            nonlocal input_count
+            for item in items:
+                input_count += 1
+                yield item
+
+        keys, cached = _map_groups(llm, iter_groups(counted(partials), group_budget), cache, cache_name, max_workers)
+        print(f"[map-reduce {level}단계] {len(keys)}개 그룹 중 {cached}개 캐시 사용")
+
+        summaries = [cache[key] for key in keys]
+        total = sum(estimate_tokens(summary) for summary in summaries)
+        # 예산 안에 들어오거나 더 이상 묶이지 않으면 종료
+        if total <= final_budget or len(summaries) >= input_count or len(summaries) == 1:
+            return summaries
+        partials = summaries
+        level += 1
+
+
+def _sources_key(model: str, document_key: str, final_budget: int) -> str:
+    return "sources:" + hashlib.sha256(f"{MAP_PROMPT_VERSION}\0{model}\0{document_key}\0{final_budget}".encode("utf-8")).hexdigest()
+
+
+def summarize_document(llm, load_texts, cache_name: str, final_budget: int, document_key: str) -> list:
+    """
+    요약/보고서용 원문 구성: 문서 전체가 final_budget 안이면 원문 그대로, 넘으면 map-reduce 부분 요약
+    결과는 document_key(문서 내용 식별자)로 캐시되어 같은 문서면 원문을 다시 읽지 않음
+    load_texts: 캐시에 없을 때만 호출되는 함수, 청크 원문을 순서대로 내는 이터러블 반환
+    예산을 넘는 순간부터 읽은 원문을 바로 map 단계로 넘기므로 전체 원문을 모아 두지 않음
+    """
+    key = _sources_key(getattr(llm, "model", ""), document_key, final_budget)
+    cached = _load_cache(cache_name).get(key)
+    if cached is not None:
+        print(f"[요약 캐시 사용] {len(cached)}개 항목")
+        return cached
+
+    texts = iter(load_texts())
+    head = []
+    used = 0
+    for text in texts:
+        head.append(text)
+        used += estimate_tokens(text)
+        if used > final_budget:
+            print(f"[긴 문서 감지] 예산 {final_budget} 토큰 초과 → map-reduce 요약")
+            sources = map_reduce_summaries(llm, itertools.chain(head, texts), cache_name, final_budget)
+            break
+    else:
+        sources = head
+
+    _save_cache(cache_name, {key: sources})
+    return sources
+
+
+if __name__ == "__main__":
+    sample = ["가" * 1200, "나" * 1200, "다" * 1200]
+    print([len(group) for group in group_texts(sample, 2500)])
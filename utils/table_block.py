@@ -0,0 +1,22 @@
+class TableBlock:
+    """
+    표의 행 구간 하나 (CSV/엑셀 추출기가 스트리밍으로 반환하는 조각)
+    헤더와 시트/행 위치를 함께 보관하여 청킹 단계에서 헤더를 붙이고 메타데이터로 남길 수 있음
+    str()은 전체 추출 텍스트에 들어가는 원문 조각 (prefix + 행들)
+    """
+    def __init__(self, header: str, rows: list, sheet: str = None, start_row: int = 0, prefix: str = ""):
+        self.header = header
+        self.rows = rows
+        self.sheet = sheet
+        self.start_row = start_row  # 데이터 행 기준 0부터
+        self.prefix = prefix
+
+    @property
+    def end_row(self) -> int:
+        return self.start_row + len(self.rows)
+
+    def __str__(self) -> str:
+        return self.prefix + "\n".join(self.rows)
+
+    def __repr__(self) -> str:
+        return f"TableBlock(sheet={self.sheet!r}, rows={self.start_row}-{self.end_row})"
@@ -0,0 +1,22 @@
+class TranscriptSegment:
+    """
+    음성 인식 결과 구간 하나 (STT가 스트리밍으로 반환하는 조각)
+    시작/끝 시각(초)을 함께 보관하여 청킹 단계에서 시간 범위를 청크 메타데이터로 남길 수 있음
+    str()은 전체 추출 텍스트에 들어가는 원문 조각
+    """
+    def __init__(self, start: float, end: float, text: str):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"TranscriptSegment({self.start:.2f}-{self.end:.2f}, {self.text[:20]!r})"
+
+
+def format_timestamp(seconds: float) -> str:
+    """초 → HH:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
@@ -1,30 +1,254 @@
+import os
+import uuid
+import threading
+import multiprocessing
+import numpy as np
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 from moviepy import VideoFileClip
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
+from utils.config import get_setting
+from utils.transcript_segment import TranscriptSegment
+
+# Whisper 기본 모델 크기
+WHISPER_MODEL_SIZE = "large-v2"
+
+# (모델 크기, 장치, 연산 타입)별 Whisper 모델 (프로세스 전체에서 한 번만 로드)
+_whisper_registry = {}
+_whisper_lock = threading.RLock()
+
+# Whisper 입력 샘플링 레이트
+STT_SAMPLE_RATE = 16000
+
+# 병렬 STT에서 워커 하나당 미리 제출해 두는 구간 수
+STT_PENDING_PER_WORKER = 2
+
+# 병렬 STT 워커 프로세스의 모델 (프로세스당 하나)
+_worker_model = None
+
+# cuda 로드/인식에 실패하면 이후에는 cpu 사용 (드라이버/cuDNN 문제는 첫 추론에서야 드러남)
+_cuda_failed = False
+
+# 영상에서 추출한 오디오 임시 폴더
+AUDIO_OUTPUT_DIR = "temp_wav"
 
 def extract_audio(video_path: str, output_path="temp_wav/temp_audio.wav"):
     """
     영상에서 오디오만 추출하여 WAV 파일로 저장하는 함수입니다.
     """
     clip = VideoFileClip(video_path)
-    clip.audio.write_audiofile(output_path)  # verbose=False, logger=None 제거
+    try:
+        clip.audio.write_audiofile(output_path)  # verbose=False, logger=None 제거
+    finally:
+        clip.close()
     return output_path
 
-def transcribe_audio(audio_path: str) -> str:
+
+@contextmanager
+def extracted_audio(video_path: str):
     """
-    faster-whisper 모델을 사용하여 음성 파일을 텍스트로 변환합니다.
+    영상의 오디오를 작업마다 다른 이름의 WAV 파일로 추출 (동시에 실행되는 워커끼리 겹치지 않음)
+    with 블록이 끝나면 파일 삭제
+    """
+    os.makedirs(AUDIO_OUTPUT_DIR, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    output_path = os.path.join(AUDIO_OUTPUT_DIR, f"{stem}_{uuid.uuid4().hex[:8]}.wav")
+    try:
+        yield extract_audio(video_path, output_path)
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+def get_whisper_device() -> str:
+    """
+    WHISPER_DEVICE 설정값 반환, "auto"면 CUDA 장치가 있을 때만 cuda
+    """
+    device = get_setting("WHISPER_DEVICE", "auto")
+    if _cuda_failed and device != "cpu":
+        return "cpu"
+    if device != "auto":
+        return device
+    try:
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def get_whisper_compute_type() -> str:
+    """WHISPER_COMPUTE_TYPE 설정값, cuda 실패로 cpu로 바뀐 뒤에는 int8"""
+    if _cuda_failed:
+        return "int8"
+    return get_setting("WHISPER_COMPUTE_TYPE", "int8")
+
+
+def _probe_whisper_model(model: WhisperModel):
+    """1초 무음으로 시험 인식 (cuda 라이브러리 오류는 모델 생성이 아니라 첫 인식에서 발생)"""
+    segments, info = model.transcribe(np.zeros(STT_SAMPLE_RATE, dtype=np.float32), language="ko")
+    list(segments)
+
+
+def _disable_cuda():
+    """이후 Whisper는 cpu로 로드/인식 (이미 로드한 cuda 모델은 해제)"""
+    global _cuda_failed
+    _cuda_failed = True
+    with _whisper_lock:
+        for key in [key for key in _whisper_registry if key[1] != "cpu"]:
+            del _whisper_registry[key]
+
+
+def get_whisper_model(model_size: str = None) -> WhisperModel:
+    """
+    모델 크기별로 한 번만 로드되는 WhisperModel 반환
+    GPU가 없거나 cuda 로드/시험 인식에 실패하면 cpu(int8)로 로드
+    """
+    model_size = model_size or get_setting("WHISPER_MODEL_SIZE", WHISPER_MODEL_SIZE)
+    device = get_whisper_device()
+    compute_type = get_whisper_compute_type()
+    key = (model_size, device, compute_type)
+    model = _whisper_registry.get(key)
+    if model is not None:
+        return model
+
+    with _whisper_lock:
+        if key not in _whisper_registry:
+            try:
+                model = WhisperModel(model_size, device=device, compute_type=compute_type)
+                if device != "cpu":
+                    _probe_whisper_model(model)
+            except Exception as e:
+                if device == "cpu":
+                    raise
+                print(f"[Whisper {device} 로드 실패: {e}] - cpu(int8)로 로드")
+                _disable_cuda()
+                return get_whisper_model(model_size)
+            print(f"[Whisper 모델 로드: {model_size}, {device}, {compute_type}]")
+            _whisper_registry[key] = model
+        return _whisper_registry[key]
+
+
+def get_speech_windows(audio, window_seconds: float) -> list:
     """
-    model = WhisperModel("large-v2",
-                        device="cuda",
-                        compute_type="int8"
-                        )  # 또는 "cpu", "int8"
+    VAD로 찾은 발화 구간을 window_seconds 이하의 구간으로 묶어 (시작, 끝) 샘플 위치 목록 반환
+    구간 경계는 항상 무음 위치이므로 문장이 중간에 잘리지 않음
+    """
+    window_samples = int(window_seconds * STT_SAMPLE_RATE)
+    speeches = get_speech_timestamps(
+        audio,
+        VadOptions(min_silence_duration_ms=500, max_speech_duration_s=window_seconds),
+        sampling_rate=STT_SAMPLE_RATE,
+    )
+    windows = []
+    for speech in speeches:
+        if windows and speech["end"] - windows[-1][0] <= window_samples:
+            windows[-1][1] = speech["end"]
+        else:
+            windows.append([speech["start"], speech["end"]])
+    return [tuple(window) for window in windows]
+
 
+def _init_stt_worker(model_size: str, compute_type: str, cpu_threads: int):
+    """병렬 STT 워커 프로세스 초기화: 모델을 한 번만 로드"""
+    global _worker_model
+    _worker_model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_window(audio, offset: float) -> list:
+    """구간 하나를 인식하여 (시작, 끝, 텍스트) 목록 반환 (시각은 파일 기준으로 보정)"""
+    segments, info = _worker_model.transcribe(audio, language="ko", vad_filter=True)
+    return [(offset + seg.start, offset + seg.end, seg.text) for seg in segments]
+
+
+def _iter_sequential_segments(audio_path: str):
+    device = get_whisper_device()
+    model = get_whisper_model()
     segments, info = model.transcribe(audio_path, language="ko")
+    # segment는 generator이므로 인식되는 대로 전달
+    last_end = 0.0
+    try:
+        for seg in segments:
+            last_end = seg.end
+            yield TranscriptSegment(seg.start, seg.end, seg.text)
+    except RuntimeError as e:
+        if device == "cpu":
+            raise
+        # 인식 도중 cuda 오류(메모리 부족, 라이브러리 누락 등)면 cpu로 남은 구간부터 다시 인식
+        print(f"[Whisper {device} 인식 실패: {e}] - {last_end:.1f}초부터 cpu로 인식")
+        _disable_cuda()
+        audio = decode_audio(audio_path, sampling_rate=STT_SAMPLE_RATE)
+        rest = audio[int(last_end * STT_SAMPLE_RATE):]
+        segments, info = get_whisper_model().transcribe(rest, language="ko")
+        for seg in segments:
+            yield TranscriptSegment(last_end + seg.start, last_end + seg.end, seg.text)
+
+
+def iter_transcript_segments(audio_path: str):
+    """
+    음성 파일을 시각 정보가 있는 TranscriptSegment로 변환 (제너레이터)
+    - cpu: VAD로 무음 위치에서 STT_WINDOW_SECONDS 이하 구간으로 나누고 STT_WORKERS개 프로세스에서 병렬 인식
+      앞 구간부터 순서대로 끝나는 즉시 전달
+    - cuda 또는 워커 1개: 한 모델로 처음부터 순서대로 인식하며 전달
+    """
+    workers = get_setting("STT_WORKERS", 2)
+    if get_whisper_device() != "cpu" or workers <= 1:
+        yield from _iter_sequential_segments(audio_path)
+        return
+
+    audio = decode_audio(audio_path, sampling_rate=STT_SAMPLE_RATE)
+    windows = get_speech_windows(audio, get_setting("STT_WINDOW_SECONDS", 120))
+    if len(windows) <= 1:
+        yield from _iter_sequential_segments(audio_path)
+        return
+
+    workers = min(workers, len(windows))
+    initargs = (
+        get_setting("WHISPER_MODEL_SIZE", WHISPER_MODEL_SIZE),
+        get_whisper_compute_type(),
+        max(1, (os.cpu_count() or 1) // workers),
+    )
+    print(f"[STT 병렬 인식] {len(audio) / STT_SAMPLE_RATE:.0f}초, 구간 {len(windows)}개, 프로세스 {workers}개")
+
+    # 분석 단계 스레드(자세 분석 등)/하트비트 스레드가 살아 있는 상태에서 fork하면 자식 프로세스가 멈출 수 있으므로 spawn 사용
+    pool = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_stt_worker, initargs=initargs,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    try:
+        # 구간 오디오 복사본이 한꺼번에 쌓이지 않도록 워커 수의 두 배까지만 미리 제출
+        max_pending = workers * STT_PENDING_PER_WORKER
+        futures = {}
+        waiting = {}
+        next_submit = 0
+        next_window = 0
+        while next_window < len(windows):
+            while next_submit < len(windows) and len(futures) + len(waiting) < max_pending:
+                start, end = windows[next_submit]
+                futures[pool.submit(_transcribe_window, audio[start:end], start / STT_SAMPLE_RATE)] = next_submit
+                next_submit += 1
+            # 완료 순서로 들어온 구간을 시간 순서대로 정렬하여 전달
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                waiting[futures.pop(future)] = future.result()
+            while next_window in waiting:
+                for start, end, text in waiting.pop(next_window):
+                    yield TranscriptSegment(start, end, text)
+                next_window += 1
+                print(f"[STT 진행] {next_window}/{len(windows)}")
+    finally:
+        # 소비자가 중간에 멈추거나 오류가 나면 아직 시작하지 않은 구간은 취소
+        pool.shutdown(wait=True, cancel_futures=True)
+
 
+def transcribe_audio(audio_path: str) -> str:
+    """
+    faster-whisper 모델을 사용하여 음성 파일을 텍스트로 변환합니다.
+    """
     # segment는 generator이므로 반복문으로 텍스트 추출
-    result = " ".join([seg.text for seg in segments])
-    return result
+    return " ".join(seg.text for seg in iter_transcript_segments(audio_path))
 
 def summarize_transcript(transcript: str) -> str:
     """
@@ -1,7 +1,15 @@
 import os
+import json
+import time
 import hashlib
 import re
-from parsing_utils import split_chunks
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from parsing_utils import iter_chunks
+from utils.config import get_setting
+from utils.embedding_cache import get_cached_embeddings, put_cached_embeddings
+from utils.embedding_utils import get_embeddings, clear_embeddings_registry, embed_query_cached
+from utils.sparse_index import SparseIndex, get_sparse_index, build_sparse_index, save_sparse_index, delete_sparse_index, reciprocal_rank_fusion
 
 # Qdrant import 시도
 try:
@@ -14,15 +22,96 @@ except ImportError:
     except ImportError:
         QDRANT_AVAILABLE = False
 
-from langchain_ollama import OllamaEmbeddings, ChatOllama
+from langchain_ollama import ChatOllama
+from langchain_core.documents import Document
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
-from collections import deque
+from qdrant_client.http.models import Distance, VectorParams, PointStruct, PointIdsList
+from collections import deque, OrderedDict
+
+class VectorStoreCache:
+    """LRU + 유휴 TTL 기반 벡터스토어 캐시 (워커 메모리 상한 유지)"""
+    def __init__(self, max_size=32, ttl_seconds=3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()  # key -> (vector_store, last_access)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _evict_expired(self, now):
+        if not self.ttl_seconds:
+            return
+        # OrderedDict는 오래 쓰지 않은 순서이므로 앞에서부터 만료 확인
+        while self._items:
+            key, (_, last_access) = next(iter(self._items.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._items[key]
+            self.evictions += 1
+    
+    def get(self, key):
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired(now)
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items[key] = (item[0], now)
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+    
+    def put(self, key, vector_store):
+        with self._lock:
+            now = time.monotonic()
+            self._items[key] = (vector_store, now)
+            self._items.move_to_end(key)
+            self._evict_expired(now)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+    
+    def pop(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+            return item[0] if item else None
+    
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def stats(self):
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
 
 # 전역 캐시
-_vector_store_cache = {}
+_vector_store_cache = VectorStoreCache(
+    max_size=get_setting("VECTOR_STORE_CACHE_SIZE", 32),
+    ttl_seconds=get_setting("VECTOR_STORE_CACHE_TTL", 3600),
+)
 _client_cache = None
 
+# 파일 해시 계산 설정 (스트리밍 읽기 단위)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 콘텐츠 해시 → 컬렉션 매니페스트 (프로세스/사용자 간 공유)
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vectordb_manifest.json")
+_manifest_lock = threading.Lock()
+
+# (경로, 크기, 수정시간) → 콘텐츠 해시 메모 (같은 파일 반복 해싱 방지)
+_file_hash_memo = {}
+
 class BufferMemory:
     """대화 히스토리 관리"""
     def __init__(self, max_turns=5):
@@ -38,14 +127,80 @@ class BufferMemory:
         return "\n".join([f"User: {h['user']}\nAssistant: {h['assistant']}" for h in self.history])
 
 def get_file_hash(file_path: str) -> str:
-    """파일 해시 생성 (크기+수정시간 기반)"""
+    """파일 해시 생성 (파일 내용 기반, 청크 단위 스트리밍 읽기)"""
     try:
         stat = os.stat(file_path)
-        quick_hash = f"{stat.st_size}_{int(stat.st_mtime)}"
-        return hashlib.md5(quick_hash.encode()).hexdigest()
-    except:
+    except OSError:
         return hashlib.md5(file_path.encode()).hexdigest()
 
+    # 질문마다 호출되므로 파일이 그대로면 이전 해시 재사용
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _file_hash_memo:
+        return _file_hash_memo[memo_key]
+
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(block)
+    file_hash = hasher.hexdigest()
+
+    _file_hash_memo[memo_key] = file_hash
+    return file_hash
+
+def load_manifest() -> dict:
+    """디스크에 저장된 콘텐츠 해시 매니페스트 로드"""
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(manifest: dict):
+    """매니페스트를 임시 파일에 쓴 뒤 교체 (부분 기록 방지)"""
+    tmp_path = f"{MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def record_manifest(file_hash: str, file_path: str, collection_name: str, chunk_count: int = None):
+    """콘텐츠 해시에 컬렉션과 원본 파일명을 기록"""
+    with _manifest_lock:
+        manifest = load_manifest()
+        entry = manifest.setdefault(file_hash, {
+            "collection": collection_name,
+            "sources": [],
+            "created_at": time.time(),
+        })
+        entry["collection"] = collection_name
+        if chunk_count is not None:
+            entry["chunks"] = chunk_count
+        source = os.path.basename(file_path)
+        if source not in entry["sources"]:
+            entry["sources"].append(source)
+        entry["last_used_at"] = time.time()
+        _save_manifest(manifest)
+
+def find_previous_manifest_entry(file_path: str, file_hash: str):
+    """
+    같은 파일명으로 올라왔던 이전 버전의 (해시, 항목) 반환
+    다른 파일명과 공유되는 컬렉션은 제자리 갱신하면 안 되므로 제외
+    """
+    source = os.path.basename(file_path)
+    candidates = [
+        (h, entry) for h, entry in load_manifest().items()
+        if h != file_hash and entry.get("sources") == [source]
+    ]
+    if not candidates:
+        return None, None
+    return max(candidates, key=lambda item: item[1].get("last_used_at", 0))
+
+def forget_manifest(file_hash: str):
+    """컬렉션이 사라진 해시를 매니페스트에서 제거"""
+    with _manifest_lock:
+        manifest = load_manifest()
+        if manifest.pop(file_hash, None) is not None:
+            _save_manifest(manifest)
+
 def get_qdrant_client():
     """Qdrant 클라이언트 캐싱"""
     global _client_cache
@@ -69,16 +224,212 @@ def get_llm(tokens=256):
         except TypeError:
             return ChatOllama(model=model_name, temperature=0.2)
 
-def data_to_vectorstore(file_path: str):
-    """벡터스토어 - 캐싱 및 빠른 체크"""
-    
-    # 캐시 확인 (가장 빠른 경로)
+def _iter_batches(documents, batch_size: int):
+    """문서 이터러블을 batch_size 단위 리스트로 묶어서 반환"""
+    batch = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _embed_batch(vector_store, batch: list) -> list:
+    """배치 하나를 임베딩하여 포인트 목록으로 반환 (캐시에 없는 청크만 임베딩)"""
+    texts = [doc.page_content for doc in batch]
+    model = vector_store.embeddings.model
+    vectors = get_cached_embeddings(texts, model)
+    misses = [i for i, vector in enumerate(vectors) if vector is None]
+    if misses:
+        miss_texts = [texts[i] for i in misses]
+        new_vectors = vector_store.embeddings.embed_documents(miss_texts)
+        put_cached_embeddings(miss_texts, new_vectors, model)
+        for i, vector in zip(misses, new_vectors):
+            vectors[i] = vector
+    if len(misses) < len(texts):
+        print(f"[임베딩 캐시 재사용] {len(texts) - len(misses)}/{len(texts)}개 청크")
+
+    return [
+        PointStruct(
+            id=doc.metadata['order'],
+            vector=vector,
+            payload={
+                vector_store.content_payload_key: doc.page_content,
+                vector_store.metadata_payload_key: doc.metadata,
+            },
+        )
+        for doc, vector in zip(batch, vectors)
+    ]
+
+def _embed_and_upsert_batch(vector_store, batch: list, staged=None) -> int:
+    """
+    배치 하나를 임베딩하고 Qdrant에 바로 업서트
+    staged(list)가 있으면 업서트하지 않고 포인트를 모아 둠 (증분 갱신은 추출이 끝난 뒤 한꺼번에 반영)
+    """
+    points = _embed_batch(vector_store, batch)
+    if staged is not None:
+        staged.extend(points)
+    else:
+        vector_store.client.upsert(collection_name=vector_store.collection_name, points=points, wait=True)
+    return len(points)
+
+def embed_documents_in_batches(vector_store, documents, batch_size: int = None, max_workers: int = None,
+                               progress_callback=None, staged=None) -> int:
+    """
+    임베딩 단계: 배치 단위로 임베더에 동시 요청하고, 완료된 배치부터 Qdrant에 업서트
+    대기 중인 배치 수를 워커 수의 2배로 제한해 Ollama 서버에 과부하를 주지 않음
+    progress_callback(stage, done, total)으로 진행 상황 전달 (total을 모르면 None)
+    staged(list)가 있으면 업서트 대신 포인트를 모아 둠 (_embed_and_upsert_batch)
+    """
+    batch_size = batch_size or get_setting("EMBED_BATCH_SIZE", 32)
+    max_workers = max_workers or get_setting("EMBED_MAX_WORKERS", 4)
+    max_pending = max_workers * 2
+    expected = len(documents) if hasattr(documents, "__len__") else None
+
+    total = 0
+    def collect(futures):
+        nonlocal total
+        for future in futures:
+            total += future.result()
+        if progress_callback:
+            progress_callback("embed", total, expected)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for batch in _iter_batches(documents, batch_size):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                print(f"[임베딩 진행] {total}개 청크 저장")
+            pending.add(executor.submit(_embed_and_upsert_batch, vector_store, batch, staged))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    return total
+
+def get_content_hash(text: str) -> str:
+    """청크 내용 해시 (증분 갱신 시 변경 여부 비교용)"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def stream_documents_into_collection(vector_store, documents, stored=None, progress_callback=None) -> tuple:
+    """
+    청크 스트림을 받아 content_hash를 붙이고 희소 인덱스를 함께 만들면서 바로 임베딩/업서트
+    청크 본문은 배치가 업서트되면 버려지므로 문서 크기와 무관하게 메모리 사용량 일정
+    stored(포인트 id → content_hash)가 있으면 증분 갱신: order + content_hash가 같은 청크는 건너뛰고
+    바뀐 청크만 임베딩하되 업서트하지 않고 포인트 목록으로 반환 (추출이 모두 끝난 뒤 호출한 쪽에서 반영)
+    반환: (희소 인덱스, 새 청크 id 집합, 바뀐 청크 포인트 목록 또는 None)
+    """
+    index = SparseIndex()
+    seen = set()
+    staged = [] if stored is not None else None
+
+    def tap():
+        for doc in documents:
+            order = doc.metadata['order']
+            doc.metadata["content_hash"] = get_content_hash(doc.page_content)
+            index.add(order, doc.page_content)
+            seen.add(order)
+            if stored is None or stored.get(order) != doc.metadata["content_hash"]:
+                yield doc
+
+    embed_documents_in_batches(vector_store, tap(), progress_callback=progress_callback, staged=staged)
+    return index, seen, staged
+
+def _get_stored_hashes(vector_store) -> dict:
+    """컬렉션에 저장된 포인트별 content_hash 조회 (본문 제외, 메타데이터만)"""
+    stored = {}
+    offset = None
+    while True:
+        points, offset = vector_store.client.scroll(
+            collection_name=vector_store.collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=[vector_store.metadata_payload_key],
+            with_vectors=False,
+        )
+        for point in points:
+            metadata = (point.payload or {}).get(vector_store.metadata_payload_key) or {}
+            stored[point.id] = metadata.get("content_hash")
+        if offset is None:
+            return stored
+
+def _create_collection(client, collection_name: str):
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=1024, distance=Distance.COSINE)
+    )
+
+def _discard_collection(client, file_hash: str, collection_name: str):
+    """일부만 반영되어 어느 버전과도 맞지 않는 컬렉션 삭제 (다음 요청에서 새로 생성)"""
+    forget_manifest(file_hash)
+    _vector_store_cache.pop(file_hash)
+    try:
+        client.delete_collection(collection_name)
+        delete_sparse_index(collection_name)
+    except Exception as e:
+        print(f"[컬렉션 삭제 실패: {e}]")
+
+def update_previous_collection(client, file_path: str, file_hash: str, progress_callback=None):
+    """
+    증분 갱신 모드: 같은 파일의 이전 컬렉션을 제자리에서 갱신
+    order + content_hash 기준으로 바뀐 청크만 임베딩하여 업서트하고 사라진 청크만 삭제
+    (바뀌지 않은 청크는 읽지도 다시 쓰지도 않음)
+    바뀐 청크는 추출이 모두 끝난 뒤에 반영하므로 추출/임베딩 중에 실패하면 이전 컬렉션은 그대로 유지
+    """
+    old_hash, old_entry = find_previous_manifest_entry(file_path, file_hash)
+    if old_entry is None:
+        return None
+
+    collection_name = old_entry["collection"]
+    if not client.collection_exists(collection_name):
+        forget_manifest(old_hash)
+        return None
+
+    print(f"[증분 갱신: {collection_name}]")
+    vector_store = Qdrant(client=client, collection_name=collection_name, embeddings=get_embeddings())
+    stored = _get_stored_hashes(vector_store)
+
+    if progress_callback:
+        progress_callback("extract", 0, None)
+    index, new_ids, staged = stream_documents_into_collection(
+        vector_store, iter_chunks(file_path), stored=stored, progress_callback=progress_callback
+    )
+    if not new_ids:
+        return None
+
+    removed = [point_id for point_id in stored if point_id not in new_ids]
+    try:
+        for batch in _iter_batches(staged, get_setting("EMBED_BATCH_SIZE", 32)):
+            client.upsert(collection_name=collection_name, points=batch, wait=True)
+        if removed:
+            client.delete(collection_name=collection_name, points_selector=PointIdsList(points=removed), wait=True)
+    except Exception:
+        _discard_collection(client, old_hash, collection_name)
+        raise
+    save_sparse_index(collection_name, index)
+    print(f"[증분 갱신 완료] 변경 {len(staged)}개, 삭제 {len(removed)}개, 유지 {len(new_ids) - len(staged)}개")
+
+    # 이전 버전 해시는 더 이상 이 컬렉션을 가리키지 않음
+    forget_manifest(old_hash)
+    _vector_store_cache.pop(old_hash)
+    record_manifest(file_hash, file_path, collection_name, chunk_count=len(new_ids))
+    return vector_store
+
+def data_to_vectorstore(file_path: str, incremental: bool = None, progress_callback=None):
+    """
+    벡터스토어 - 콘텐츠 해시 기반 캐싱 및 빠른 체크
+    progress_callback(stage, done, total): 백그라운드 작업 진행률 표시용
+    """
+    
+    # 캐시 확인 (가장 빠른 경로) - 같은 내용이면 파일명이 달라도 재사용
     file_hash = get_file_hash(file_path)
-    cache_key = f"{file_path}_{file_hash}"
+    cache_key = file_hash
     
-    if cache_key in _vector_store_cache:
+    vector_store = _vector_store_cache.get(cache_key)
+    if vector_store is not None:
         print(f"[캐시에서 벡터스토어 로드: {file_path}]")
-        return _vector_store_cache[cache_key]
+        return vector_store
     
     if not QDRANT_AVAILABLE:
         print("[Qdrant 사용 불가 - None 반환]")
@@ -88,70 +439,92 @@ def data_to_vectorstore(file_path: str):
     if client is None:
         return None
     
-    collection_name = f"doc_{file_hash}"
+    manifest_entry = load_manifest().get(file_hash)
+    collection_name = manifest_entry["collection"] if manifest_entry else f"doc_{file_hash}"
     
     # 기존 컬렉션 빠른 확인
     try:
-        existing_collections = [col.name for col in client.get_collections().collections]
-        
-        if collection_name in existing_collections:
+        if client.collection_exists(collection_name):
             print(f"[기존 컬렉션 사용: {collection_name}]")
             
             # 벡터 수 빠른 체크
             try:
                 collection_info = client.get_collection(collection_name)
-                print(collection_info)
                 if collection_info.points_count  > 0:
                     vector_store = Qdrant(
                         client=client,
                         collection_name=collection_name,
-                        embeddings=OllamaEmbeddings(model="bona/bge-m3-korean:latest")
+                        embeddings=get_embeddings()
                     )
                     
-                    # 캐시에 저장
-                    _vector_store_cache[cache_key] = vector_store
+                    # 캐시 및 매니페스트에 저장
+                    _vector_store_cache.put(cache_key, vector_store)
+                    record_manifest(file_hash, file_path, collection_name)
                     return vector_store
                 else:
                     print("[빈 컬렉션 감지 - 삭제]")
                     client.delete_collection(collection_name)
+                    delete_sparse_index(collection_name)
             except:
                 print("[컬렉션 상태 확인 실패 - 삭제 후 재생성]")
                 try:
                     client.delete_collection(collection_name)
                 except:
                     pass
+        elif manifest_entry:
+            print(f"[매니페스트의 컬렉션이 없음 - 항목 제거: {collection_name}]")
+            forget_manifest(file_hash)
+            collection_name = f"doc_{file_hash}"
     except:
         print("[컬렉션 목록 조회 실패]")
     
+    # 수정된 파일이면 이전 컬렉션을 증분 갱신
+    if incremental is None:
+        incremental = get_setting("VECTORDB_INCREMENTAL_UPDATE", True)
+    if incremental:
+        try:
+            vector_store = update_previous_collection(client, file_path, file_hash, progress_callback)
+            if vector_store is not None:
+                _vector_store_cache.put(cache_key, vector_store)
+                return vector_store
+        except Exception as e:
+            print(f"[증분 갱신 실패: {e}] - 새 컬렉션 생성")
+    
     # 새 컬렉션 생성 (필요한 경우만)
     print(f"[새 컬렉션 생성: {collection_name}]")
     
     try:
-        # 문서 청킹 - 기존과 동일
-        documents = split_chunks(file_path)
-        if not documents:
-            return None
-        
         # 컬렉션 생성
-        client.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(size=1024, distance=Distance.COSINE)
-        )
+        _create_collection(client, collection_name)
         
         # 벡터스토어 생성 및 문서 추가
         vector_store = Qdrant(
             client=client,
             collection_name=collection_name,
-            embeddings=OllamaEmbeddings(model="bona/bge-m3-korean")
+            embeddings=get_embeddings()
         )
         
+        # 추출 → 청킹 → 임베딩 스트리밍 (앞 페이지 청크부터 바로 저장)
         print("임베딩 및 저장 중...")
-        ids = [doc.metadata['order'] for doc in documents]
-        vector_store.add_documents(documents, ids=ids)
+        if progress_callback:
+            progress_callback("extract", 0, None)
+        try:
+            index, new_ids, _ = stream_documents_into_collection(
+                vector_store, iter_chunks(file_path), progress_callback=progress_callback
+            )
+        except Exception:
+            # 일부만 저장된 컬렉션이 다음 요청에서 재사용되지 않도록 삭제
+            client.delete_collection(collection_name)
+            raise
+        if not new_ids:
+            client.delete_collection(collection_name)
+            return None
+        save_sparse_index(collection_name, index)
         
-        # 캐시에 저장
-        _vector_store_cache[cache_key] = vector_store
-        print(f"[벡터스토어 캐싱 완료: {len(documents)}개 문서]")
+        # 캐시 및 매니페스트에 저장
+        _vector_store_cache.put(cache_key, vector_store)
+        record_manifest(file_hash, file_path, collection_name, chunk_count=len(new_ids))
+        print(f"[벡터스토어 캐싱 완료: {len(new_ids)}개 문서]")
         
         return vector_store
         
@@ -159,6 +532,95 @@ def data_to_vectorstore(file_path: str):
         print(f"[벡터스토어 생성 실패: {e}]")
         return None
 
+def fetch_leading_documents(vector_store, limit: int = 5) -> list:
+    """임베딩 없이 문서 앞부분 청크를 순서대로 가져오기 (포인트 id = 청크 order)"""
+    points, _ = vector_store.client.scroll(
+        collection_name=vector_store.collection_name,
+        limit=limit,
+        with_payload=True,
+        with_vectors=False,
+    )
+    return [
+        Document(
+            page_content=point.payload.get(vector_store.content_payload_key, ""),
+            metadata=point.payload.get(vector_store.metadata_payload_key) or {},
+        )
+        for point in points
+    ]
+
+def search_with_scores(vector_store, query: str, k: int, query_vector=None) -> list:
+    """캐시된(또는 미리 계산된) 질의 벡터로 (Document, score) 후보 검색"""
+    if query_vector is None:
+        query_vector = embed_query_cached(query)
+    if query_vector is None:
+        return [(doc, 0.0) for doc in fetch_leading_documents(vector_store, limit=k)]
+    return vector_store.similarity_search_with_score_by_vector(query_vector, k=k)
+
+def iter_all_documents(vector_store, page_size: int = 256):
+    """컬렉션의 모든 청크를 원문 순서(포인트 id = order)로 한 페이지씩 읽으며 반환 (임베딩 불필요)"""
+    offset = None
+    while True:
+        points, offset = vector_store.client.scroll(
+            collection_name=vector_store.collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for point in points:
+            metadata = dict(point.payload.get(vector_store.metadata_payload_key) or {})
+            metadata["order"] = point.id
+            yield Document(page_content=point.payload.get(vector_store.content_payload_key, ""), metadata=metadata)
+        if offset is None:
+            return
+
+def fetch_all_documents(vector_store) -> list:
+    """컬렉션의 모든 청크를 원문 순서로 한 번에 반환"""
+    return list(iter_all_documents(vector_store, page_size=1000))
+
+def get_document_key(vector_store, file_path: str) -> str:
+    """컬렉션 내용 식별자 (파일 해시 + 청크 수): 제자리 갱신된 컬렉션이면 값이 바뀜"""
+    points_count = vector_store.client.get_collection(vector_store.collection_name).points_count
+    return f"{get_file_hash(file_path)}:{points_count}"
+
+def _ensure_sparse_index(vector_store):
+    """희소 인덱스가 없는 기존 컬렉션은 저장된 청크로 한 번 생성 (임베딩 불필요)"""
+    index = get_sparse_index(vector_store.collection_name)
+    if index is not None:
+        return index
+    return build_sparse_index(vector_store.collection_name, fetch_all_documents(vector_store))
+
+def hybrid_search(vector_store, query: str, k: int, query_vector=None) -> list:
+    """
+    밀집(벡터) 검색과 BM25 희소 검색 결과를 RRF(Reciprocal Rank Fusion)로 합쳐
+    (Document, 융합 점수) 목록을 반환. 코드/이름/숫자 같은 정확 일치 질의를 보완
+    """
+    dense = search_with_scores(vector_store, query, k, query_vector=query_vector)
+    try:
+        sparse = _ensure_sparse_index(vector_store).search(query, k)
+    except Exception as e:
+        print(f"[희소 검색 실패: {e}] - 벡터 검색 결과만 사용")
+        return dense
+
+    documents = {}
+    for doc, _ in dense:
+        documents.setdefault(doc.metadata.get("order", doc.page_content), doc)
+    ranked = reciprocal_rank_fusion(
+        [list(documents), [doc_id for doc_id, _ in sparse]], k, get_setting("HYBRID_RRF_K", 60)
+    )
+
+    # 희소 검색에서만 나온 청크는 Qdrant에서 본문 조회
+    missing = [doc_id for doc_id, _ in ranked if doc_id not in documents]
+    if missing:
+        for point in vector_store.client.retrieve(
+            collection_name=vector_store.collection_name, ids=missing, with_payload=True
+        ):
+            documents[point.id] = Document(
+                page_content=point.payload.get(vector_store.content_payload_key, ""),
+                metadata=point.payload.get(vector_store.metadata_payload_key) or {},
+            )
+    return [(documents[doc_id], score) for doc_id, score in ranked if doc_id in documents]
+
 def smart_determine_params(query: str):
     """개선된 파라미터 결정 - 답변 품질 고려"""
 
@@ -294,30 +756,14 @@ def question_answer_with_memory(file_path: str, query: str, memory: BufferMemory
     
     # 4. 향상된 벡터 검색
     try:
-        docs = vector_store.similarity_search(query, k=k)
-        
-        # 검색 결과가 부족한 경우 추가 검색
-        if len(docs) < k//2:
-            # 쿼리를 단순화해서 다시 검색
-            simple_query = " ".join(query.split()[:3])  # 처음 3단어만
-            additional_docs = vector_store.similarity_search(simple_query, k=k)
-            # 중복 제거하면서 합치기
-            seen = set()
-            all_docs = []
-            for doc in docs + additional_docs:
-                doc_hash = hash(doc.page_content[:100])  # 첫 100자로 중복 판단
-                if doc_hash not in seen:
-                    seen.add(doc_hash)
-                    all_docs.append(doc)
-                if len(all_docs) >= k:
-                    break
-            docs = all_docs
+        # 벡터 + BM25 융합 검색 한 번으로 재검색 루프 대체
+        docs = [doc for doc, _ in hybrid_search(vector_store, query, k=k)]
         
         combined_text = "\n\n".join([doc.page_content for doc in docs])
         
         # 텍스트가 너무 짧은 경우 추가 문서 검색
         if len(combined_text) < 500:
-            extra_docs = vector_store.similarity_search("", k=5)  # 일반적인 문서들
+            extra_docs = fetch_leading_documents(vector_store, limit=5)  # 문서 앞부분 청크
             for doc in extra_docs:
                 if doc not in docs:
                     docs.append(doc)
@@ -484,12 +930,14 @@ def clear_cache():
     global _vector_store_cache, _client_cache
     _vector_store_cache.clear()
     _client_cache = None
+    clear_embeddings_registry()
     print("[캐시 초기화 완료]")
 
 def get_cache_stats():
     """캐시 상태 확인"""
     return {
         "vector_stores": len(_vector_store_cache),
+        "vector_store_cache": _vector_store_cache.stats(),
         "client_connected": _client_cache is not None
     }
 